@@ -1,150 +1,326 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objs as go
 from datetime import datetime
+import math
 import os
-import cohere
+import uuid
 import dotenv
 
+from utils.lazy import lazy_import, warm_up
+
 # Load environment variables
 dotenv.load_dotenv()
 
+# Heavy modules are imported on first use, so the first paint (or a visit to
+# the Progress Tracker) doesn't pay for the recording and charting stacks
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objs")
+video_audio = lazy_import("utils.video_audio")  # cv2, speech_recognition, capture pipeline
+
 # Utility Imports (Assumed to be in separate files)
-from utils.video_audio import record_audio_video, analyze_facial_expressions
-from utils.analysis import analyze_response, generate_score
-from utils.feedback import provide_feedback
-from utils.data_handling import load_questions, save_progress, get_feedback_summary
-
-def initialize_cohere_client():
-    """Initialize Cohere client with API key."""
-    try:
-        cohere_api_key = os.getenv("COHERE_API_KEY")
-        if not cohere_api_key:
-            st.warning("Cohere API key not found.")
-            return None
-        return cohere.Client(cohere_api_key)
-    except Exception as e:
-        st.error(f"Cohere initialization error: {e}")
+from utils.analysis import get_nlp
+from utils.question_bank import get_question_bank
+from utils.relevance import get_scorer
+from utils import interview, jobs, llm, tracing
+from utils.data_handling import (
+    load_questions, get_feedback_summary,
+    load_progress_page, export_progress, reset_progress, rebuild_progress_aggregates,
+    on_progress_change, progress_version, get_progress_analytics
+)
+from utils.progress_store import FIELDS as PROGRESS_FIELDS
+from utils.progress_analytics import PASS_SCORE, ROLLING_WINDOW
+
+def job_executor():
+    """The process-wide background job executor, with the interview analysis handler registered."""
+    interview.register()
+    return jobs.get_executor()
+
+def current_user():
+    """
+    Id whose progress this session reads and writes: the `user` query parameter
+    (so the link can be bookmarked), else a new id for this browser session.
+    None with PROGRESS_PARTITION=none, where every session shares one history.
+    """
+    if os.getenv("PROGRESS_PARTITION", "user").lower() == "none":
         return None
+    user = st.query_params.get("user")
+    if not user:
+        user = st.session_state.setdefault("user_id", uuid.uuid4().hex)
+        st.query_params["user"] = user
+    return user
+
+# Rerun caches: Streamlit re-executes main() on every interaction. Progress data
+# is keyed on the user and their store version, so writes from any process
+# invalidate it, and save/reset/rebuild in this process also clear it explicitly.
+@st.cache_data(show_spinner=False)
+def cached_questions():
+    return load_questions()
 
-def check_answer_quality_with_cohere(question, response):
-    """Evaluate answer quality using Cohere."""
-    co = initialize_cohere_client()
-    if not co:
-        return {"error": "Cohere client not initialized"}
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_feedback_summary(user, version):
+    return get_feedback_summary(user)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_progress_page(user, version, topic, start, end, columns, page, page_size):
+    return load_progress_page(user, topic, start, end, list(columns), page, page_size)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_progress_trends(user, version):
+    analytics = get_progress_analytics(user)
+    return analytics.summary(), analytics.summary("question"), analytics.daily_trend()
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_trend_figures(user, version, _trends):
+    """Daily score trend and improvement slope charts; rebuilt only when `user` or `version` changes."""
+    topics, _, daily = _trends
+    fig1 = px.line(
+        daily,
+        x='date',
+        y='rolling_mean',
+        color='topic',
+        markers=True,
+        title="Score Trend (7-day rolling mean)",
+        labels={'rolling_mean': 'Score', 'date': 'Date'},
+        hover_data=['mean', 'attempts']
+    )
+    fig1.update_layout(yaxis=dict(range=[0, 100]))
     
-    try:
-        evaluation_prompt = f"""Evaluate this interview answer:
-
-Question: {question}
-Answer: {response}
-
-Assess:
-1. Relevance to question
-2. Clarity 
-3. Depth
-4. Example usage
-5. Professional communication
-
-Provide score (0-100) and brief feedback."""
-
-        response = co.generate(
-            prompt=evaluation_prompt,
-            model='command-xlarge-nightly',
-            max_tokens=300,
-            temperature=0.3
-        )
-        
-        # Extract Cohere's analysis
-        cohere_analysis = response.generations[0].text.strip()
-        
-        # Basic score extraction
-        import re
-        score_match = re.search(r'Score:\s*(\d+)', cohere_analysis)
-        score = int(score_match.group(1)) if score_match else 0
-        
-        return {
-            "score": score,
-            "detailed_feedback": cohere_analysis
-        }
-    except Exception as e:
-        st.error(f"Cohere API error: {e}")
-        return {"error": str(e)}
-
-def generate_improved_answer_with_cohere(question, original_response):
-    """Generate improved answer using Cohere."""
-    co = initialize_cohere_client()
-    if not co:
-        return "Unable to generate improved answer."
+    fig2 = px.bar(
+        topics,
+        x='topic',
+        y='recent_slope',
+        title=f"Recent Improvement (points per attempt, last {ROLLING_WINDOW} attempts)",
+        labels={'recent_slope': 'Points per attempt', 'topic': 'Topics'},
+        color='recent_slope',
+        color_continuous_scale="RdYlGn",
+        color_continuous_midpoint=0
+    )
+    return fig1, fig2
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_progress_figures(user, version, _summary):
+    """Bar and radar charts of the average scores; rebuilt only when `user` or `version` changes."""
+    topics = list(_summary.keys())
+    scores = [_summary[topic]['average_score'] for topic in topics]
+    
+    df = pd.DataFrame({
+        'Topics': topics,
+        'Scores': scores
+    })
+    
+    # Bar Chart
+    fig1 = px.bar(
+        df, 
+        x='Topics', 
+        y='Scores', 
+        title="Average Performance by Topic",
+        labels={'Scores': 'Average Score'},
+        color='Scores',
+        color_continuous_scale="Viridis"
+    )
+    fig1.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=True, gridcolor='lightgray')
+    )
     
-    try:
-        improvement_prompt = f"""Improve this interview answer:
-
-Question: {question}
-Original Answer: {original_response}
-
-Create a more professional version that:
-- Directly addresses the question
-- Uses clear language
-- Provides specific examples
-- Shows professional communication"""
-
-        response = co.generate(
-            prompt=improvement_prompt,
-            model='command-xlarge-nightly',
-            max_tokens=300,
-            temperature=0.7
+    # Radar Chart 
+    fig2 = go.Figure(data=go.Scatterpolar(
+        r=scores,
+        theta=topics,
+        fill='toself'
+    ))
+    fig2.update_layout(
+        title="Multidimensional Performance Radar",
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+    )
+    return fig1, fig2
+
+def clear_progress_caches():
+    cached_feedback_summary.clear()
+    cached_progress_page.clear()
+    cached_progress_trends.clear()
+    build_progress_figures.clear()
+    build_trend_figures.clear()
+
+on_progress_change("app", clear_progress_caches)
+
+def show_progress_table(summary, user, version):
+    """
+    Paged attempt history. Filters, column selection and paging are passed to
+    the store, so each rerun reads and styles one page, whatever the history size.
+    """
+    st.subheader("Attempt History")
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        topic_filter = st.selectbox("Topic", ["All topics"] + sorted(summary), key="history_topic")
+    with col2:
+        dates = st.date_input("Date range", value=(), key="history_dates")
+    with col3:
+        columns = st.multiselect(
+            "Columns", PROGRESS_FIELDS, default=["topic", "question", "score", "timestamp"], key="history_columns"
         )
-        
-        return response.generations[0].text.strip()
-    except Exception as e:
-        st.error(f"Cohere API error: {e}")
-        return f"Error generating improved answer: {e}"
+    if not columns:
+        st.write("Select at least one column.")
+        return
+    
+    topic = None if topic_filter == "All topics" else topic_filter
+    # While a range is being picked, only its start is set
+    start, end = (tuple(dates) + (None, None))[:2] if isinstance(dates, (tuple, list)) else (dates, dates)
+    page_size = st.session_state.get("history_page_size", 50)
+    page = st.session_state.get("history_page", 1)
+    
+    records, total = cached_progress_page(user, version, topic, start, end, tuple(columns), page - 1, page_size)
+    pages = max(1, math.ceil(total / page_size))
+    if page > pages:
+        # Filters changed and the old page no longer exists
+        page = st.session_state["history_page"] = pages
+        records, total = cached_progress_page(user, version, topic, start, end, tuple(columns), page - 1, page_size)
+    
+    page_df = pd.DataFrame(records, columns=columns)
+    if "score" in columns and not page_df.empty:
+        # Highlight the best score of the topic (or of all topics), known from the aggregates
+        best = summary[topic]["max_score"] if topic else max(s["max_score"] for s in summary.values())
+        st.dataframe(page_df.style.apply(
+            lambda scores: ["background-color: lightgreen" if score == best else "" for score in scores],
+            subset=["score"]
+        ))
+    else:
+        st.dataframe(page_df)
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key="history_page")
+    with col2:
+        st.selectbox("Rows per page", [25, 50, 100, 200], index=1, key="history_page_size")
+    with col3:
+        st.caption(f"{total} attempts, page {page} of {pages}")
 
-def create_progress_visualization(summary):
+def create_progress_visualization(summary, user, version):
     """Create interactive progress visualizations."""
     st.subheader("Performance Visualization")
     
     if summary:
-        topics = list(summary.keys())
-        scores = [summary[topic]['average_score'] for topic in topics]
-        
-        df = pd.DataFrame({
-            'Topics': topics,
-            'Scores': scores
-        })
-        
-        # Bar Chart
-        fig1 = px.bar(
-            df, 
-            x='Topics', 
-            y='Scores', 
-            title="Average Performance by Topic",
-            labels={'Scores': 'Average Score'},
-            color='Scores',
-            color_continuous_scale="Viridis"
-        )
-        fig1.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='lightgray')
-        )
+        fig1, fig2 = build_progress_figures(user, version, summary)
         st.plotly_chart(fig1)
-        
-        # Radar Chart 
-        fig2 = go.Figure(data=go.Scatterpolar(
-            r=scores,
-            theta=topics,
-            fill='toself'
-        ))
-        fig2.update_layout(
-            title="Multidimensional Performance Radar",
-            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        )
         st.plotly_chart(fig2)
 
+def show_progress_trends(user, version):
+    """Trend charts and per-topic/per-question statistics from the incremental analytics."""
+    st.subheader("Trends")
+    trends = cached_progress_trends(user, version)
+    topics, questions, daily = trends
+    if topics.empty:
+        return
+    fig1, fig2 = build_trend_figures(user, version, trends)
+    st.plotly_chart(fig1)
+    st.plotly_chart(fig2)
+    
+    stats_columns = ['attempts', 'mean', 'rolling_mean', 'std', 'p25', 'p50', 'p75', 'p90',
+                     'slope', 'recent_slope', 'pass_streak', 'best_pass_streak', 'day_streak', 'best_day_streak']
+    st.dataframe(topics.set_index('topic')[stats_columns])
+    with st.expander("Per-question statistics"):
+        st.dataframe(questions.set_index(['topic', 'question'])[stats_columns])
+    st.caption(
+        f"Slopes are score points per attempt; streaks count consecutive attempts scoring {PASS_SCORE}+ "
+        "and consecutive practice days (up to the last practice day)."
+    )
+
+STAGE_LABELS = {
+    "facial_analysis": "Analyzing facial expressions",
+    "response_analysis": "Analyzing the response",
+    "relevance": "Checking relevance",
+    "scoring": "Scoring",
+    "llm_assessment": "Requesting the Cohere assessment",
+    "save_progress": "Saving progress",
+}
+
+def render_interview_results(job):
+    """Results of the stages of an interview analysis job that have finished so far."""
+    params, result = job["params"], job["result"]
+    st.markdown(f"**Question**: {params['question']}")
+    if job["status"] == jobs.FAILED:
+        st.error(f"Analysis failed: {job['error']}")
+    elif job["status"] == jobs.INTERRUPTED:
+        st.warning("The analysis was interrupted (the app restarted). Please record the answer again.")
+    elif job["current_stage"] or job["status"] == jobs.QUEUED:
+        label = STAGE_LABELS.get(job["current_stage"], "Waiting for a worker")
+        st.progress(job["progress"], text=f"{label}... ({len(job['completed'])}/{len(job['stages'])} stages)")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Transcription")
+        st.write(params["transcription"])
+
+        if result.get("emotion_data"):
+            st.subheader("Emotion Analysis")
+            for emotion, intensity in result["emotion_data"].items():
+                st.progress(min(1.0, max(0.0, intensity / 100)), text=f"{emotion}: {intensity:.0f}%")
+
+        if "sentiment" in result:
+            st.subheader("Performance Metrics")
+            if "score" in result:
+                st.metric("Overall Score", f"{result['score']:.2f}/100")
+            st.metric("Sentiment", result["sentiment"])
+            if "relevance" in result:
+                st.metric("Relevance", f"{result['relevance']['score']:.0f}/100")
+
+    with col2:
+        if "cohere_quality" in result:
+            cohere_quality = result["cohere_quality"]
+            st.subheader("Cohere AI Assessment")
+            if "error" in cohere_quality:
+                st.error(f"Cohere API error: {cohere_quality['error']}")
+            if cohere_quality.get("source") == "local":
+                st.caption("Assessed locally with high confidence; no Cohere quality request was made.")
+            if 'score' in cohere_quality:
+                st.metric("Cohere Score", f"{cohere_quality.get('score', 0)}/100")
+
+        if "key_phrases" in result:
+            st.write(f"**Key Phrases**: {', '.join(result['key_phrases'])}")
+            st.write(f"**Quality**: {result['quality']}")
+
+    # Feedback and Improvement Sections
+    if "feedback" in result:
+        st.subheader("Personalized Feedback")
+        st.info(result["feedback"])
+
+    if 'detailed_feedback' in result.get("cohere_quality", {}):
+        st.subheader("Cohere Detailed Feedback")
+        st.write(result["cohere_quality"]['detailed_feedback'])
+
+    if result.get("improved_answer"):
+        st.subheader("Suggested Improved Answer")
+        st.write(result["improved_answer"])
+
+    if result.get("saved"):
+        st.success("Progress saved successfully!")
+
+# Seconds between polls of a running analysis job
+JOB_POLL_SECONDS = 1.0
+
+def show_interview_job(job_id):
+    """
+    Render an interview analysis job. While it runs, only this fragment is
+    re-run to poll the job table; the whole page reruns once it has finished.
+    """
+    job = job_executor().get(job_id)
+    if job is None:
+        st.session_state.pop("interview_job", None)
+        return
+    running = job["status"] not in jobs.FINISHED
+
+    @st.fragment(run_every=JOB_POLL_SECONDS if running else None)
+    def poll():
+        latest = job_executor().get(job_id)
+        render_interview_results(latest)
+        if running and latest["status"] in jobs.FINISHED:
+            # Stop polling and refresh the Progress Tracker with the saved attempt
+            st.rerun()
+
+    poll()
+
 def main():
     # Page Configuration
     st.set_page_config(
@@ -175,6 +351,8 @@ def main():
         unsafe_allow_html=True
     )
     
+    user = current_user()
+    
     # Tabbed Navigation
     tab1, tab2, tab3 = st.tabs(["Interview Practice", "Progress Tracker", "Settings"])
     
@@ -182,7 +360,7 @@ def main():
         st.header("Mock Interview Session")
         
         # Question Selection
-        questions = load_questions()
+        questions = cached_questions()
         col1, col2 = st.columns(2)
         
         with col1:
@@ -190,77 +368,56 @@ def main():
         with col2:
             question = st.selectbox("Select a question:", questions[selected_topic])
         
+        # Related questions from the vector-indexed bank (loads the spaCy model on first use)
+        if st.toggle("Show similar questions"):
+            try:
+                for match in get_question_bank().similar(question, k=3):
+                    st.caption(f"{match['question']} ({match['topic']}, similarity {match['similarity']:.2f})")
+            except FileNotFoundError:
+                st.caption("Question bank file not found.")
+        
         # Interview Start Button
         if st.button("Start Mock Interview", type="primary"):
             st.info("Answer the question within 60 seconds:")
             st.markdown(f"**Question**: {question}")
             
-            # Recording and Analysis
-            with st.spinner('Recording and analyzing...'):
-                frames, transcription = record_audio_video(duration=60)
-                
-                if frames is None or transcription is None:
-                    st.error("Recording failed. Please check your camera and microphone.")
-                else:
-                    # Original Analysis
-                    emotion_data = analyze_facial_expressions(frames)
-                    sentiment, key_phrases, quality = analyze_response(transcription)
-                    score = generate_score(sentiment, emotion_data, transcription)
-                    feedback = provide_feedback(sentiment, emotion_data, quality)
-                    
-                    # Cohere Quality Check
-                    cohere_quality = check_answer_quality_with_cohere(question, transcription)
-                    
-                    # Results Display
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("Transcription")
-                        st.write(transcription)
-                        
-                        # st.subheader("Emotion Analysis")
-                        # for emotion, intensity in emotion_data.items():
-                        #     st.progress(min(1.0, max(0.0, intensity)), text=f"{emotion}: {intensity:.2%}")
-                        
-                        st.subheader("Performance Metrics")
-                        st.metric("Overall Score", f"{score:.2f}/100")
-                        st.metric("Sentiment", sentiment)
-                    
-                    with col2:
-                        
-                        st.subheader("Cohere AI Assessment")
-                        if 'score' in cohere_quality:
-                            st.metric("Cohere Score", f"{cohere_quality.get('score', 0)}/100")
-                        
-                        st.write(f"**Key Phrases**: {', '.join(key_phrases)}")
-                        st.write(f"**Quality**: {quality}")
-                    
-                    # Feedback and Improvement Sections
-                    st.subheader("Personalized Feedback")
-                    st.info(feedback)
-                    
-                    # Cohere Detailed Feedback
-                    if 'detailed_feedback' in cohere_quality:
-                        st.subheader("Cohere Detailed Feedback")
-                        st.write(cohere_quality['detailed_feedback'])
-                    
-                    # Save Progress
-                    save_progress(selected_topic, question, score, feedback)
-                    st.success("Progress saved successfully!")
+            # Recording stays on the script thread (live preview); the analysis runs as a background job
+            with st.spinner('Recording...'), tracing.span("recording") as stage:
+                frames, transcription, recording_stats = video_audio.record_audio_video(duration=60)
+                audio_bytes = recording_stats["transcription"].get("audio_bytes", 0)
+                stage.set("audio_bytes", audio_bytes)
+            # Per session, so concurrent sessions don't see each other's numbers
+            st.session_state["recording_stats"] = recording_stats
+            
+            if frames is None or transcription is None:
+                st.error("Recording failed. Please check your camera and microphone.")
+            else:
+                tracing.count("frames_processed", len(frames))
+                tracing.count("audio_bytes_transcribed", audio_bytes)
+                job_id = job_executor().submit(
+                    "interview",
+                    {"topic": selected_topic, "question": question, "transcription": transcription, "user": user},
+                    user=user, frames=frames
+                )
+                st.session_state["interview_job"] = st.query_params["job"] = job_id
+        
+        # Results of the latest analysis, polled while its stages run (also after reruns and reloads)
+        job_id = st.session_state.get("interview_job") or st.query_params.get("job")
+        if job_id:
+            show_interview_job(job_id)
     
     with tab2:
         st.header("Your Progress and Feedback Summary")
         
-        summary = get_feedback_summary()
+        version = progress_version(user)
+        summary = cached_feedback_summary(user, version)
         
         if summary:
-            create_progress_visualization(summary)
+            create_progress_visualization(summary, user, version)
+            show_progress_trends(user, version)
             
             # Progress Table
-            progress_df = pd.read_csv('progress.csv')
-            st.dataframe(
-                progress_df.style.highlight_max(subset=['score'], color='lightgreen')
-            )
+            show_progress_table(summary, user, version)
         else:
             st.write("No progress data available yet.")
     
@@ -273,19 +430,49 @@ def main():
         
         # Data Management
         st.subheader("Data Management")
+        if user is not None:
+            st.caption(f"Progress ID: {user}. Bookmark this page to come back to your history.")
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("Reset Progress Data", type="secondary"):
-                if os.path.exists('progress.csv'):
-                    os.remove('progress.csv')
+                reset_progress(user)
                 st.success("Progress data reset successfully!")
+            
+            if st.button("Export Progress (CSV/JSON/Parquet)"):
+                paths = export_progress(user=user)
+                st.success(f"Progress exported to {', '.join(paths)}")
+            
+            if st.button("Rebuild Progress Summary"):
+                rebuild_progress_aggregates(user)
+                st.success("Progress summary rebuilt from the full history.")
+        
+            
+            cache_stats = llm.cache.stats()
+            st.caption(
+                f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"(hit rate {cache_stats['hit_rate']:.0%})"
+            )
+            if st.button("Clear LLM Cache"):
+                llm.cache.clear()
+                st.success("LLM cache cleared.")
+            
+            relevance_stats = get_scorer().stats()
+            st.caption(
+                f"Local relevance checks: {relevance_stats['answers']} answers, "
+                f"{relevance_stats['llm_skipped']} LLM quality requests skipped "
+                f"({relevance_stats['skip_rate']:.0%}), {relevance_stats['avg_ms']:.1f} ms per answer"
+            )
         
         with col2:
             st.subheader("Provide Feedback")
-            feedback = st.text_area("Share your thoughts")
+            st.text_area("Share your thoughts")
             if st.button("Submit Feedback"):
                 st.success("Thank you for your feedback!")
+    
+    # Page is painted: load the recording stack, spaCy model and Cohere SDK in
+    # the background so the first interview doesn't wait for them
+    warm_up(video_audio, get_nlp, llm.cohere)
 
 if __name__ == "__main__":
     main()
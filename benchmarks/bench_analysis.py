@@ -0,0 +1,99 @@
+"""
+Compare analyze_response (one trimmed spaCy pass; sentiment re-tokenizes the
+text with TextBlob's regex tokenizer) against the previous version (a TextBlob
+object + full en_core_web_md pipeline).
+
+Each variant runs in its own subprocess so peak RSS is measured independently:
+
+    python -m benchmarks.bench_analysis --runs 200 --words 120
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.generators import make_transcripts
+
+
+def legacy_analyze(nlp, text):
+    """The pre-single-pass implementation, kept here as the baseline."""
+    from textblob import TextBlob
+
+    blob = TextBlob(text)
+    sentiment = "positive" if blob.sentiment.polarity > 0.1 else "negative" if blob.sentiment.polarity < -0.1 else "neutral"
+    doc = nlp(text)
+    key_phrases = [chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) > 1]
+    quality = "high" if len(text) > 100 and sentiment == "positive" else "medium" if len(text) > 50 else "low"
+    return sentiment, key_phrases[:5], quality
+
+
+def run_variant(variant, runs, words):
+    """Time one variant in the current process and return its stats."""
+    load_start = time.perf_counter()
+    if variant == "legacy":
+        import spacy
+        nlp = spacy.load("en_core_web_md")
+
+        def analyze(text):
+            return legacy_analyze(nlp, text)
+    else:
+        from utils.analysis import analyze_response as analyze
+    load_seconds = time.perf_counter() - load_start
+
+    texts = make_transcripts(runs, words)
+    analyze(texts[0])  # warm up
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        analyze(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "variant": variant,
+        "runs": runs,
+        "words": words,
+        "load_seconds": round(load_seconds, 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analyze_response variants.")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--words", type=int, default=120, help="Words per synthetic transcript")
+    parser.add_argument("--variant", choices=["legacy", "single-pass"], help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.runs, args.words)))
+        return
+
+    results = []
+    for variant in ["legacy", "single-pass"]:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_analysis", "--variant", variant,
+             "--runs", str(args.runs), "--words", str(args.words)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    for result in results:
+        print(f"{result['variant']:>12}: mean {result['mean_ms']} ms, p50 {result['p50_ms']} ms, "
+              f"p95 {result['p95_ms']} ms, load {result['load_seconds']} s, peak RSS {result['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
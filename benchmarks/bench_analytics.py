@@ -0,0 +1,129 @@
+"""
+Measure the progress analytics (utils/progress_analytics.py) on large
+histories: building the statistics once, folding in new attempts, and the
+naive alternative of recomputing everything with pandas on every rerun:
+
+    python -m benchmarks.bench_analytics --rows 100000 1000000
+
+Reports the full build, incremental updates of 1 and 1000 attempts, a sync
+with a SQLite store after one save, and the pandas recompute (up to
+--baseline-max rows), and checks that the incremental statistics match the
+recomputed ones.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import make_progress_records
+from utils.progress_analytics import PASS_SCORE, ROLLING_WINDOW, ProgressAnalytics
+from utils.progress_store import SQLiteProgressStore
+
+
+def timed(func, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def columns(records):
+    return ([r["topic"] for r in records], [r["question"] for r in records],
+            [r["score"] for r in records], [r["timestamp"] for r in records])
+
+
+def naive_summary(df):
+    """Per-topic statistics recomputed from the whole history with pandas groupby."""
+    def stats(group):
+        scores = group["score"].to_numpy(dtype=float)
+        passed = scores >= PASS_SCORE
+        # Pass streaks: run lengths of consecutive passes
+        runs = pd.Series(passed).groupby((~pd.Series(passed)).cumsum()).sum()
+        days = group["timestamp"].dt.normalize().drop_duplicates()
+        day_runs = (days.diff() != pd.Timedelta(days=1)).cumsum().value_counts()
+        return pd.Series({
+            "attempts": len(scores),
+            "mean": scores.mean(),
+            "rolling_mean": scores[-ROLLING_WINDOW:].mean(),
+            "p50": np.percentile(scores, 50),
+            "p90": np.percentile(scores, 90),
+            "slope": np.polyfit(np.arange(len(scores)), scores, 1)[0] if len(scores) > 1 else 0.0,
+            "best_pass_streak": runs.max(),
+            "best_day_streak": day_runs.max(),
+        })
+    return df.groupby("topic").apply(stats, include_groups=False)
+
+
+def run(rows, repeat, baseline_max):
+    records = list(make_progress_records(rows + repeat * 1001))
+    history, new = records[:rows], records[rows:]
+    data = columns(history)
+    results = {"rows": rows}
+
+    analytics = ProgressAnalytics()
+    results["full_build_ms"] = timed(lambda: analytics.update(*data))
+    incremental = ProgressAnalytics()
+    incremental.update(*data)
+    position = 0
+    for size in (1, 1000):
+        batches = iter([columns(new[position + i * size:position + (i + 1) * size]) for i in range(repeat)])
+        position += repeat * size
+        results[f"update_{size}_ms"] = timed(lambda: incremental.update(*next(batches)), repeat)
+    results["summary_ms"] = timed(lambda: (incremental.summary(), incremental.summary("question")), repeat)
+    results["daily_trend_ms"] = timed(incremental.daily_trend, repeat)
+
+    directory = tempfile.mkdtemp(prefix="bench-analytics-")
+    try:
+        store = SQLiteProgressStore(os.path.join(directory, "progress.db"))
+        store.append_many(history)
+        synced = ProgressAnalytics()
+        results["store_initial_sync_ms"] = timed(lambda: synced.sync(store))
+
+        def save_and_sync():
+            store.append(**new[0])
+            synced.sync(store)
+        results["store_save_and_sync_ms"] = timed(save_and_sync, repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if rows <= baseline_max:
+        def recompute():
+            df = pd.DataFrame(history)
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            return naive_summary(df)
+        results["pandas_recompute_ms"] = timed(recompute)
+        expected = recompute()
+        actual = analytics.summary().set_index("topic").loc[expected.index]
+        for name in ("attempts", "mean", "rolling_mean", "slope", "best_pass_streak", "best_day_streak"):
+            if not np.allclose(actual[name], expected[name], atol=0.01):
+                raise SystemExit(f"{name} differs from the pandas recompute at {rows} rows")
+        results["matches_recompute"] = True
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the incremental progress analytics.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline-max", type=int, default=1_000_000,
+                        help="Largest history for the pandas recompute baseline")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = [run(rows, args.repeat, args.baseline_max) for rows in args.rows]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare full-frame face detection on every frame with FaceTracker on recorded clips:
+
+    python -m benchmarks.bench_face_tracking clip1.mp4 clip2.mp4 --detect-every 5 --motion-threshold 3
+
+Reports time per frame for both methods and how often the tracker agrees
+with the full-frame detector on whether a face is present.
+"""
+import argparse
+import json
+import time
+
+import cv2
+
+from utils.face_tracking import FaceTracker, detect_faces, load_face_cascade, preprocess
+
+
+def read_clip(path, max_frames=None):
+    """Decode a clip into a list of mirrored BGR frames, as the recorder sees them."""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.flip(frame, 1))
+    capture.release()
+    return frames
+
+
+def run_method(frames, detect):
+    presence = []
+    start = time.perf_counter()
+    for frame in frames:
+        presence.append(len(detect(preprocess(frame))) > 0)
+    elapsed = time.perf_counter() - start
+    return presence, elapsed
+
+
+def bench_clip(path, cascade, detect_every=5, roi_margin=0.5, motion_threshold=None, max_frames=None):
+    frames = read_clip(path, max_frames)
+    if not frames:
+        raise ValueError(f"No frames decoded from {path}")
+
+    baseline, baseline_seconds = run_method(frames, lambda gray: detect_faces(cascade, gray))
+    tracker = FaceTracker(cascade, detect_every, roi_margin, motion_threshold)
+    tracked, tracked_seconds = run_method(frames, tracker.update)
+
+    agreement = sum(a == b for a, b in zip(baseline, tracked)) / len(frames)
+    return {
+        "clip": path,
+        "frames": len(frames),
+        "baseline_ms_per_frame": round(baseline_seconds / len(frames) * 1000, 3),
+        "tracker_ms_per_frame": round(tracked_seconds / len(frames) * 1000, 3),
+        "speedup": round(baseline_seconds / tracked_seconds, 2) if tracked_seconds else None,
+        "baseline_face_frames": sum(baseline),
+        "tracker_face_frames": sum(tracked),
+        "presence_agreement": round(agreement, 4),
+        "tracker_stats": tracker.stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FaceTracker against full-frame detection.")
+    parser.add_argument("clips", nargs="+", help="Recorded video files")
+    parser.add_argument("--detect-every", type=int, default=5)
+    parser.add_argument("--roi-margin", type=float, default=0.5)
+    parser.add_argument("--motion-threshold", type=float)
+    parser.add_argument("--max-frames", type=int)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    cascade = load_face_cascade()
+    results = [
+        bench_clip(clip, cascade, args.detect_every, args.roi_margin, args.motion_threshold, args.max_frames)
+        for clip in args.clips
+    ]
+    print(json.dumps(results, indent=4))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
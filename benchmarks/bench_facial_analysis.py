@@ -0,0 +1,74 @@
+"""
+Time analyze_frames on a recording-sized batch of frames and compare with the
+recording duration it represents:
+
+    python -m benchmarks.bench_facial_analysis --clip clip.mp4 --workers 4
+    python -m benchmarks.bench_facial_analysis --duration 60 --fps 7.5 --width 240 --height 180
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.generators import synthetic_frames
+from utils.facial_analysis import analyze_frames
+
+
+def clip_frames(path, keep_every=1):
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30
+    frames = []
+    index = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if index % keep_every == 0:
+            frames.append(frame)
+        index += 1
+    capture.release()
+    return np.stack(frames), index / fps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the facial analysis engine.")
+    parser.add_argument("--clip", help="Recorded video to analyze instead of synthetic frames")
+    parser.add_argument("--keep-every", type=int, default=2, help="Frame subsampling for --clip")
+    parser.add_argument("--duration", type=float, default=60, help="Synthetic recording length (seconds)")
+    parser.add_argument("--fps", type=float, default=7.5, help="Stored frames per second (synthetic)")
+    parser.add_argument("--width", type=int, default=240)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    if args.clip:
+        frames, duration = clip_frames(args.clip, args.keep_every)
+    else:
+        frames = synthetic_frames(int(args.duration * args.fps), args.width, args.height)
+        duration = args.duration
+
+    # First call includes process pool startup
+    start = time.perf_counter()
+    analyze_frames(frames, args.batch_size, args.workers)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = analyze_frames(frames, args.batch_size, args.workers)
+    warm = time.perf_counter() - start
+
+    print(json.dumps({
+        "frames": len(frames),
+        "recording_seconds": round(duration, 2),
+        "cold_seconds": round(cold, 3),
+        "warm_seconds": round(warm, 3),
+        "realtime_factor": round(duration / warm, 1) if warm else None,
+        "frames_per_sec": round(len(frames) / warm, 1) if warm else None,
+        "metrics": metrics,
+    }, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Drive LLMScheduler against the local stub server with injected latency and 429s:
+
+    python -m benchmarks.bench_llm_scheduler --answers 40 --latency 0.2 --error-rate 0.2 --max-in-flight 4
+"""
+import argparse
+import json
+import time
+
+from utils import llm
+from utils.llm_scheduler import LLMScheduler
+from utils.llm_stub_server import StubLLMServer, StubServerClient
+
+
+def run(answers=40, duplicates=10, latency=0.2, jitter=0.05, error_rate=0.2, server_max_concurrent=None,
+        max_in_flight=4, requests_per_minute=600):
+    server = StubLLMServer(latency=latency, jitter=jitter, error_rate=error_rate,
+                           max_concurrent=server_max_concurrent).start()
+    # Memory-only cache so repeated runs don't hit each other's results
+    llm.cache = llm.LLMCache(cache_dir=None)
+    scheduler = LLMScheduler(
+        max_in_flight=max_in_flight, requests_per_minute=requests_per_minute,
+        backoff_base=0.05, backoff_max=1.0, client=StubServerClient(server.url)
+    )
+
+    start = time.perf_counter()
+    futures = []
+    for i in range(answers):
+        answer = f"Synthetic answer number {i}"
+        # Quality scoring and improved answer for the same answer run concurrently
+        futures.append(scheduler.submit(llm.EVALUATION_PROMPT, "Tell me about yourself.", answer, temperature=0.3))
+        futures.append(scheduler.submit(llm.IMPROVEMENT_PROMPT, "Tell me about yourself.", answer, temperature=0.7))
+    for i in range(duplicates):
+        # Same request as one already in flight: coalesced into its Future
+        futures.append(scheduler.submit(llm.EVALUATION_PROMPT, "Tell me about yourself.", f"Synthetic answer number {i}"))
+
+    failed = 0
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            failed += 1
+    elapsed = time.perf_counter() - start
+
+    scheduler.shutdown()
+    server.shutdown()
+    return {
+        "requests": len(futures),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(futures) / elapsed, 1),
+        "sequential_estimate_seconds": round(2 * answers * latency, 3),
+        "failed": failed,
+        "server_requests": server.requests,
+        "server_429s": server.rejected,
+        "server_peak_concurrency": server.peak_active,
+        "scheduler": dict(scheduler.stats),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the LLM scheduler against a stub server.")
+    parser.add_argument("--answers", type=int, default=40)
+    parser.add_argument("--duplicates", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--server-max-concurrent", type=int)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--requests-per-minute", type=int, default=600)
+    args = parser.parse_args(argv)
+
+    result = run(args.answers, args.duplicates, args.latency, args.jitter, args.error_rate,
+                 args.server_max_concurrent, args.max_in_flight, args.requests_per_minute)
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    main()
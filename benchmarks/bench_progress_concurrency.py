@@ -0,0 +1,127 @@
+"""
+Concurrency stress test for the progress stores: many writer threads or
+processes append records at once, then every record is checked for:
+
+    python -m benchmarks.bench_progress_concurrency --workers 1 2 4 8 --records 200
+    python -m benchmarks.bench_progress_concurrency --mode processes --layout shared --backend jsonl
+
+With --layout per-user each worker writes its own user's store (as the app's
+sessions do); with --layout shared all workers append to one store. Each
+append is a separate transaction, like save_progress. Reports throughput per
+worker count and exits with status 1 if any record is lost or duplicated, or
+if the aggregates disagree with the records.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from utils import progress_store
+
+
+def _store(backend, layout, worker, directory):
+    if layout == "per-user":
+        return progress_store.get_user_store(f"user-{worker}", backend, root=directory)
+    # Each worker opens the shared file itself, as separate app processes would
+    return progress_store.BACKENDS[backend](os.path.join(directory, "shared" + progress_store.EXTENSIONS[backend]))
+
+
+def write_records(backend, layout, worker, records, directory, barrier):
+    """Append `records` records one at a time (each its own transaction)."""
+    store = _store(backend, layout, worker, directory)
+    barrier.wait()
+    for i in range(records):
+        store.append(f"Topic {i % 4}", f"w{worker}-{i}", i % 100, f"feedback {worker}/{i}")
+
+
+def verify(backend, layout, workers, records, directory):
+    """Problems found in the stores after a run (empty if every record is there exactly once)."""
+    problems = []
+    stores = [_store(backend, layout, w, directory) for w in range(workers if layout == "per-user" else 1)]
+    seen = Counter(r["question"] for store in stores for r in store.iter_records())
+    expected = {f"w{w}-{i}" for w in range(workers) for i in range(records)}
+    missing = expected - set(seen)
+    duplicated = [question for question, count in seen.items() if count > 1]
+    if missing:
+        problems.append(f"{len(missing)} records lost (e.g. {sorted(missing)[:3]})")
+    if duplicated:
+        problems.append(f"{len(duplicated)} records duplicated (e.g. {duplicated[:3]})")
+    if set(seen) - expected:
+        problems.append(f"{len(set(seen) - expected)} unexpected records")
+    aggregated = sum(stats.count for store in stores for stats in store.get_aggregates().topics.values())
+    if aggregated != workers * records:
+        problems.append(f"aggregates count {aggregated} records, expected {workers * records}")
+    return problems
+
+
+def run(mode, backend, layout, workers, records):
+    directory = tempfile.mkdtemp(prefix="bench-concurrency-")
+    try:
+        if mode == "threads":
+            barrier = threading.Barrier(workers + 1)
+            pool = [threading.Thread(target=write_records, args=(backend, layout, w, records, directory, barrier))
+                    for w in range(workers)]
+        else:
+            context = multiprocessing.get_context("spawn")
+            barrier = context.Barrier(workers + 1)
+            pool = [context.Process(target=write_records, args=(backend, layout, w, records, directory, barrier))
+                    for w in range(workers)]
+        for worker in pool:
+            worker.start()
+        barrier.wait()  # all writers have opened their store
+        start = time.perf_counter()
+        for worker in pool:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        failed = [w for w in pool if getattr(w, "exitcode", 0)]
+        problems = [f"{len(failed)} writer processes failed"] if failed else []
+        problems += verify(backend, layout, workers, records, directory)
+        return {
+            "workers": workers,
+            "records": workers * records,
+            "seconds": round(elapsed, 3),
+            "records_per_sec": round(workers * records / elapsed, 1),
+            "problems": problems,
+        }
+    finally:
+        with progress_store._stores_lock:
+            progress_store._user_stores.clear()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress-test concurrent progress writes.")
+    parser.add_argument("--mode", default="threads", choices=["threads", "processes"])
+    parser.add_argument("--backend", default="sqlite", choices=sorted(progress_store.BACKENDS))
+    parser.add_argument("--layout", default="per-user", choices=["per-user", "shared"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--records", type=int, default=200, help="Records appended by each worker")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = [run(args.mode, args.backend, args.layout, workers, args.records) for workers in args.workers]
+    base = results[0]["records_per_sec"] / results[0]["workers"]
+    for result in results:
+        # Throughput relative to the first run, per worker (1.0 = linear scaling)
+        result["scaling_efficiency"] = round(result["records_per_sec"] / (base * result["workers"]), 2)
+    report = {"mode": args.mode, "backend": args.backend, "layout": args.layout, "runs": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    problems = [f"{r['workers']} workers: {problem}" for r in results for problem in r["problems"]]
+    if problems:
+        print("FAIL: " + "; ".join(problems), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measure the Progress Tracker table as the history grows: paged reads with
+filters and column projection (store.query_page) against the previous
+approach of loading the whole history into a DataFrame and styling it:
+
+    python -m benchmarks.bench_progress_table --rows 10000 100000 1000000
+
+Reports latency and peak Python memory (tracemalloc) of the first page, a
+deep page, a topic + date filtered page and a projected page for each
+backend. The full-history baseline is only run up to --baseline-max rows.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from benchmarks.generators import make_progress_records
+from utils.progress_store import BACKENDS, EXTENSIONS
+
+QUERIES = {
+    "first_page": dict(),
+    "deep_page": dict(offset=None),  # middle of the history, set per size
+    "topic_and_dates": dict(topic="Python", start=date(2024, 1, 2), end=date(2024, 1, 8)),
+    "two_columns": dict(columns=["score", "timestamp"]),
+}
+
+
+def measure(func, repeat):
+    """(median seconds, peak traced bytes) of `func()`; the first call is reported separately."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return first, statistics.median(times), peak
+
+
+def full_frame(store):
+    import pandas as pd
+
+    df = pd.DataFrame(list(store.iter_records()))
+    # What st.dataframe(df.style.highlight_max(...)) computes before rendering
+    df.style.highlight_max(subset=["score"], color="lightgreen")._compute()
+
+
+def run(backend, rows, page_size, repeat, baseline_max):
+    directory = tempfile.mkdtemp(prefix="bench-table-")
+    try:
+        store = BACKENDS[backend](os.path.join(directory, "progress" + EXTENSIONS[backend]))
+        store.append_many(make_progress_records(rows))
+        results = {"backend": backend, "rows": rows}
+        for name, query in QUERIES.items():
+            query = dict(query, limit=page_size)
+            if "offset" in query:
+                query["offset"] = rows // 2
+            first, median, peak = measure(lambda: store.query_page(**query), repeat)
+            results[name] = {
+                "first_ms": round(first * 1000, 2),
+                "median_ms": round(median * 1000, 2),
+                "peak_mb": round(peak / 2**20, 2),
+            }
+        if rows <= baseline_max:
+            first, median, peak = measure(lambda: full_frame(store), 1)
+            results["full_frame_baseline"] = {
+                "median_ms": round(median * 1000, 1),
+                "peak_mb": round(peak / 2**20, 1),
+            }
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the paged progress table.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--backend", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-max", type=int, default=100_000,
+                        help="Largest history for the full-DataFrame baseline")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = [run(backend, rows, args.page_size, args.repeat, args.baseline_max)
+               for backend in args.backend for rows in args.rows]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure question-bank lookup latency and recall as the bank grows, with
+synthetic clustered embeddings (no spaCy model needed):
+
+    python -m benchmarks.bench_question_bank --sizes 1000 10000 100000
+
+For each size the bank is built once (banks above EXACT_SEARCH_MAX get the
+IVF index), reloaded from its memory-mapped files, and queried with the
+vectors of random bank questions. Recall@k is measured against exact search.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from utils import question_bank
+from utils.question_bank import QuestionBank
+
+
+def clustered_embedder(size, dim, clusters, noise=0.35, seed=0):
+    """Embedder mapping "q <i>" to a fixed vector near one of `clusters` centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[np.arange(size) % clusters] + noise * rng.normal(size=(size, dim)).astype(np.float32)
+
+    def embed(texts):
+        return vectors[[int(text.split()[1]) for text in texts]]
+
+    embed.name = f"synthetic-{dim}"
+    return embed
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(size, dim, k, queries, nprobe, directory):
+    embed = clustered_embedder(size, dim, clusters=max(10, size // 50))
+    questions = [(f"Topic {i % 8}", f"q {i}") for i in range(size)]
+    index_dir = os.path.join(directory, f"bank-{size}.index")
+
+    bank = QuestionBank(questions, embed, index_dir, fingerprint=str(size)).build()
+    build_seconds = bank.build_seconds
+    bank = QuestionBank(questions, embed, index_dir, fingerprint=str(size))
+    start = time.perf_counter()
+    bank.ensure_index()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(size, min(queries, size), replace=False)
+    vectors = [bank.vector(i) for i in picks]
+    dense = np.asarray(bank.matrix)
+
+    latencies, exact_latencies, recalls = [], [], []
+    for query in vectors:
+        start = time.perf_counter()
+        found = bank.search(query, k, nprobe=nprobe)
+        latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sims = dense @ query
+        top = np.argpartition(-sims, k - 1)[:k]
+        exact_latencies.append(time.perf_counter() - start)
+        recalls.append(len({i for i, _ in found} & set(bank.order[top].tolist())) / k)
+
+    return {
+        "size": size,
+        "index": "ivf" if bank.centroids is not None else "exact",
+        "lists": 0 if bank.centroids is None else len(bank.centroids),
+        "build_s": round(build_seconds, 2),
+        "load_ms": round(load_ms, 2),
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+        "exact_p50_us": round(statistics.median(exact_latencies) * 1e6, 1),
+        f"recall_at_{k}": round(statistics.mean(recalls), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark question-bank lookups.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=300, help="Embedding size (en_core_web_md: 300)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, default=question_bank.DEFAULT_NPROBE)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-bank-") as directory:
+        results = [run(size, args.dim, args.k, args.queries, args.nprobe, directory) for size in args.sizes]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
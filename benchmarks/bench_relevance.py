@@ -0,0 +1,111 @@
+"""
+Measure the local relevance scorer (utils/relevance.py) and how many LLM
+quality requests it saves:
+
+    python -m benchmarks.bench_relevance --answers 600 --batch-size 64
+
+Answers are built from the question bank's reference answers: on-topic ones
+(a reference answer with its sentences shuffled and words dropped), answers to
+a different question, and generic interview filler. Reports per-answer
+latency for single and batched scoring (with and without spaCy parsing), how
+often the scorer separates on-topic from off-topic answers, and the share of
+Cohere quality requests it would skip at the configured confidence threshold.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.generators import make_transcripts
+from utils import relevance
+from utils.analysis import get_nlp
+from utils.question_bank import get_question_bank
+from utils.relevance import RelevanceScorer
+
+
+def make_answers(bank, count, seed=0):
+    """(question, answer, references, on_topic) tuples, a third of each kind."""
+    rng = random.Random(seed)
+    questions = [q for q in bank.questions if bank.references_for(q)]
+    if not questions:
+        raise SystemExit("The question bank has no reference answers to build answers from.")
+    filler = make_transcripts(count, 60, seed)
+    cases = []
+    for i in range(count):
+        question = rng.choice(questions)
+        kind = i % 3
+        if kind == 0:
+            words = " ".join(bank.references_for(question)).split()
+            answer = " ".join(word for word in words if rng.random() > 0.2)
+        elif kind == 1:
+            other = rng.choice([q for q in questions if q != question])
+            answer = " ".join(bank.references_for(other))
+        else:
+            answer = filler[i]
+        cases.append((question, answer, bank.references_for(question), kind == 0))
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark local relevance scoring.")
+    parser.add_argument("--answers", type=int, default=600)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=relevance.SKIP_CONFIDENCE,
+                        help="Confidence needed to skip the LLM quality request")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    bank = get_question_bank()
+    cases = make_answers(bank, args.answers)
+    questions, answers, references, on_topic = map(list, zip(*cases))
+    nlp = get_nlp()
+
+    # One answer at a time, as in the app (parse + score)
+    scorer = RelevanceScorer(nlp)
+    scorer.score_batch(questions[:1], answers[:1], references[:1])  # warm the question cache
+    single = []
+    for case in cases[:200]:
+        start = time.perf_counter()
+        scorer.score(case[0], case[1], case[2])
+        single.append(time.perf_counter() - start)
+
+    # Batched, parsing included and comparison only (docs already parsed, as in batch_scoring)
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(cases), args.batch_size):
+        chunk = slice(i, i + args.batch_size)
+        results.extend(scorer.score_batch(questions[chunk], answers[chunk], references[chunk], args.batch_size))
+    batched = time.perf_counter() - start
+    docs = list(nlp.pipe(answers, batch_size=args.batch_size))
+    start = time.perf_counter()
+    for i in range(0, len(cases), args.batch_size):
+        chunk = slice(i, i + args.batch_size)
+        scorer.score_docs(questions[chunk], docs[chunk], references[chunk])
+    compare_only = time.perf_counter() - start
+
+    skipped = [r for r in results if r["confidence"] >= args.threshold]
+    separated = sum((r["score"] >= 50) == topical for r, topical in zip(results, on_topic))
+    skipped_correct = sum((r["score"] >= 50) == topical for r, topical in zip(results, on_topic)
+                          if r["confidence"] >= args.threshold)
+    result = {
+        "answers": len(cases),
+        "single_p50_ms": round(statistics.median(single) * 1000, 3),
+        "batched_ms_per_answer": round(batched / len(cases) * 1000, 3),
+        "compare_only_ms_per_answer": round(compare_only / len(cases) * 1000, 4),
+        "on_off_topic_accuracy": round(separated / len(cases), 3),
+        "threshold": args.threshold,
+        "llm_quality_requests_skipped": len(skipped),
+        "llm_skip_rate": round(len(skipped) / len(cases), 3),
+        # Each answer costs two LLM requests (quality + improved answer)
+        "llm_requests_saved_pct": round(len(skipped) / (2 * len(cases)) * 100, 1),
+        "skipped_accuracy": round(skipped_correct / len(skipped), 3) if skipped else None,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+End-to-end recording benchmark without a camera or microphone: replays a
+video file and a WAV file through record_audio_video (capture, face
+detection, preview, VAD and streaming transcription), then runs the facial
+analysis on the stored frames:
+
+    python -m benchmarks.bench_replay --video clip.mp4 --audio answer.wav
+    python -m benchmarks.bench_replay --video clip.mp4 --audio answer.wav --fast --backend fake
+
+Real-time pacing (the default) measures latencies as a live session would
+see them; --fast measures throughput. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from utils import video_audio
+from utils.facial_analysis import analyze_frames
+from utils.replay import VideoFileSource, WavAudioSource
+
+
+def run(video, audio, realtime=True, duration=60, backend="fake", vad=True, keep_every=2, workers=None):
+    os.environ.setdefault("TRANSCRIPTION_BACKEND", backend)
+    video_source = VideoFileSource(video, realtime=realtime)
+    audio_source = WavAudioSource(audio, realtime=realtime)
+
+    start = time.perf_counter()
+    frames, transcription, stats = video_audio.record_audio_video(
+        duration=duration,
+        keep_every=keep_every,
+        expected_fps=video_source.fps,
+        transcription_backend=backend,
+        vad=vad,
+        # Unpaced audio finishes long before unpaced video; don't let it end the session
+        end_silence=3.0 if realtime else None,
+        video_source=video_source,
+        audio_source=audio_source,
+    )
+    recording_seconds = time.perf_counter() - start
+    if frames is None:
+        raise RuntimeError("Replay recording failed")
+
+    start = time.perf_counter()
+    metrics = analyze_frames(frames, workers=workers) if len(frames) else {}
+    analysis_seconds = time.perf_counter() - start
+
+    pipeline = stats["pipeline"]
+    media_seconds = video_source.frames_read / video_source.fps
+    return {
+        "realtime": realtime,
+        "media_seconds": round(media_seconds, 2),
+        "recording_seconds": round(recording_seconds, 3),
+        "analysis_seconds": round(analysis_seconds, 3),
+        "speed": round(media_seconds / recording_seconds, 2) if recording_seconds else None,
+        "frames_read": video_source.frames_read,
+        "frames_kept": len(frames),
+        "capture_fps": pipeline["capture"]["fps"],
+        "detection_fps": pipeline["detection"]["fps"],
+        "detection_dropped": pipeline["detection"]["dropped"],
+        "preview_latency_ms": pipeline["preview_transport"].get("mean_latency_ms"),
+        "preview_p95_latency_ms": pipeline["preview_transport"].get("p95_latency_ms"),
+        "transcription": stats["transcription"],
+        "transcript_words": len(transcription.split()) if transcription else 0,
+        "face_presence": metrics.get("face_presence"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the capture pipeline.")
+    parser.add_argument("--video", required=True, help="Video file replayed instead of the camera")
+    parser.add_argument("--audio", required=True, help="16-bit PCM WAV file replayed instead of the microphone")
+    parser.add_argument("--fast", action="store_true", help="Read as fast as possible instead of in real time")
+    parser.add_argument("--duration", type=float, default=60, help="Maximum session length (seconds)")
+    parser.add_argument("--backend", default="fake", help="Transcription backend (see utils.transcription)")
+    parser.add_argument("--no-vad", action="store_true", help="Disable voice activity detection")
+    parser.add_argument("--keep-every", type=int, default=2)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the session this many times")
+    args = parser.parse_args(argv)
+
+    runs = [
+        run(args.video, args.audio, not args.fast, args.duration, args.backend, not args.no_vad,
+            args.keep_every, args.workers)
+        for _ in range(args.repeat)
+    ]
+    result = runs[-1]
+    if args.repeat > 1:
+        result["recording_seconds_runs"] = [r["recording_seconds"] for r in runs]
+        result["recording_seconds_median"] = float(np.median(result["recording_seconds_runs"]))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure Streamlit rerun latency of app.py against a prefilled progress
+history, using Streamlit's headless AppTest runner:
+
+    python -m benchmarks.bench_rerun --rows 10000 --reruns 20
+
+The first run is reported separately (cold caches); every following rerun
+corresponds to a widget interaction that doesn't change the data.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generators import make_progress_records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Streamlit rerun latency of the app.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Progress history size")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "jsonl"])
+    parser.add_argument("--timeout", type=float, default=120, help="Per-run AppTest timeout (seconds)")
+    parser.add_argument("--app", help="Streamlit script to run (default: app.py), e.g. an older version")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="bench-rerun-")
+    os.environ["PROGRESS_BACKEND"] = args.backend
+    os.environ["PROGRESS_USERS_DIR"] = directory
+
+    from streamlit.testing.v1 import AppTest
+    from utils.progress_store import get_user_store
+
+    get_user_store("bench", args.backend).append_many(make_progress_records(args.rows))
+
+    app_path = os.path.abspath(args.app) if args.app else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py"
+    )
+    app = AppTest.from_file(app_path, default_timeout=args.timeout)
+    app.query_params["user"] = "bench"
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"app.py raised: {app.exception}")
+
+    latencies = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    result = {
+        "rows": args.rows,
+        "backend": args.backend,
+        "first_run_ms": round(first * 1000, 1),
+        "rerun_median_ms": round(statistics.median(latencies) * 1000, 1),
+        "rerun_p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 1),
+        "reruns": args.reruns,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load-test the headless analysis service (utils/service.py):
+
+    python -m benchmarks.bench_service --concurrency 1 8 32 --requests 400
+    python -m benchmarks.bench_service --url http://127.0.0.1:8080 --concurrency 16
+
+Without --url a service is started in-process, once with micro-batching and
+once with --max-batch 1 (one nlp.pipe call per request) for comparison.
+Each client thread keeps one connection open and sends POST /analyze
+requests back to back. Reports p50/p99 latency, requests/sec and the mean
+batch size the service formed.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from itertools import count
+from urllib.parse import urlparse
+
+from benchmarks.generators import TOPICS, make_transcripts
+
+QUESTION = "Tell me about a project you are proud of."
+
+
+def make_payloads(requests, words, seed=0):
+    return [
+        json.dumps({"transcription": text, "question": QUESTION, "topic": TOPICS[i % len(TOPICS)]}).encode("utf-8")
+        for i, text in enumerate(make_transcripts(requests, words, seed))
+    ]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def get_json(url, path):
+    parsed = urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def load_test(url, payloads, concurrency):
+    """Send `payloads` from `concurrency` threads; returns latency and throughput stats."""
+    parsed = urlparse(url)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    next_index = count()
+
+    def client():
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+        try:
+            while True:
+                i = next(next_index)
+                if i >= len(payloads):
+                    return
+                start = time.perf_counter()
+                try:
+                    connection.request("POST", "/analyze", payloads[i], {"Content-Type": "application/json"})
+                    response = connection.getresponse()
+                    body = response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException) as e:
+                    ok, body = False, str(e).encode("utf-8")
+                    connection.close()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors.append(body[:200].decode("utf-8", "replace"))
+        finally:
+            connection.close()
+
+    before = get_json(url, "/health")["batching"]
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    after = get_json(url, "/health")["batching"]
+
+    batches = after["batches"] - before["batches"]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        "mean_batch": round((after["requests"] - before["requests"]) / batches, 2) if batches else None,
+    }
+
+
+def run_local(label, payloads, concurrency_levels, warmup, **service_options):
+    from utils.service import AnalysisService
+
+    service = AnalysisService(("127.0.0.1", 0), **service_options).start()
+    try:
+        load_test(service.url, payloads[:warmup], 4)
+        return [dict(load_test(service.url, payloads, concurrency), service=label)
+                for concurrency in concurrency_levels]
+    finally:
+        service.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the analysis service.")
+    parser.add_argument("--url", help="Service to test (default: start one in-process)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--words", type=int, default=120, help="Words per transcript")
+    parser.add_argument("--workers", type=int, default=1, help="Batch workers of the in-process service")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    payloads = make_payloads(args.requests, args.words)
+    if args.url:
+        results = [load_test(args.url, payloads, concurrency) for concurrency in args.concurrency]
+    else:
+        warmup = min(len(payloads), 50)
+        results = run_local("batched", payloads, args.concurrency, warmup, workers=args.workers,
+                            max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        results += run_local("unbatched", payloads, args.concurrency, warmup, workers=args.workers,
+                             max_batch=1, max_wait_ms=0)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
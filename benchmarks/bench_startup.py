@@ -0,0 +1,100 @@
+"""
+Measure the cold import cost of the Streamlit app with `python -X importtime`
+and guard against heavy modules creeping back into startup:
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-ms 800 --output startup.json
+
+Each run imports `app` in a fresh interpreter. Reports the median cumulative
+import time of `app`, the slowest top-level imports and any of the
+--forbid modules (loaded lazily by design) that were imported eagerly.
+Exits with status 1 if a forbidden module is imported or --max-ms is exceeded.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Loaded on first use (utils/lazy.py); none of these may be imported by `import app`.
+# (Streamlit itself imports plotly.graph_objects, so only plotly.express is ours to defer.)
+DEFAULT_FORBIDDEN = ["spacy", "cv2", "cohere", "plotly.express", "speech_recognition", "pyaudio", "textblob"]
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def measure(module="app"):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(rows, module, forbidden, top=10):
+    by_name = {name: cumulative for name, _, cumulative, _ in rows}
+    # Direct imports of `module` are listed (depth 1) just before it
+    direct = sorted(
+        ((name, cumulative) for name, _, cumulative, depth in rows if depth == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    imported = {name for name, _, _, _ in rows} | {name.split(".")[0] for name, _, _, _ in rows}
+    return {
+        "total_ms": round(by_name.get(module, 0) / 1000, 1),
+        "modules": len(rows),
+        "slowest": [{"module": name, "ms": round(us / 1000, 1)} for name, us in direct[:top]],
+        "eager_forbidden": sorted(set(forbidden) & imported),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's import-time cost.")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Packages or modules that must not be imported at startup")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    runs = [summarize(measure(args.module), args.module, args.forbid) for _ in range(args.runs)]
+    totals = [run["total_ms"] for run in runs]
+    result = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "modules": runs[-1]["modules"],
+        "slowest": runs[-1]["slowest"],
+        "eager_forbidden": runs[-1]["eager_forbidden"],
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    failures = []
+    if result["eager_forbidden"]:
+        failures.append(f"imported at startup: {', '.join(result['eager_forbidden'])}")
+    if args.max_ms is not None and result["median_ms"] > args.max_ms:
+        failures.append(f"median import time {result['median_ms']} ms > {args.max_ms} ms")
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
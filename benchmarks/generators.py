@@ -0,0 +1,80 @@
+"""
+Synthetic, seeded data for the benchmarks: transcripts, emotion readings,
+progress history rows and video frames/clips.
+"""
+import random
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+
+WORDS = (
+    "I have worked on Python projects with a great team and learned to handle stress "
+    "by planning my work carefully the project was difficult but we delivered on time "
+    "my strengths are communication and problem solving and I enjoy learning new things"
+).split()
+
+TOPICS = ["Python", "Machine Learning", "Data Science", "Web Development"]
+EMOTIONS = ["happy", "neutral", "sad", "surprise", "angry", "fear", "disgust"]
+
+
+def make_transcripts(count, words, seed=0):
+    """`count` transcripts of `words` words drawn from interview-like vocabulary."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + "." for _ in range(count)]
+
+
+def make_emotions(count, seed=0):
+    """`count` emotion dicts with percentages summing to 100 (some empty, as when no face was seen)."""
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(EMOTIONS)), size=count) * 100
+    return [
+        {} if i % 10 == 0 else dict(zip(EMOTIONS, np.round(row, 2).tolist()))
+        for i, row in enumerate(weights)
+    ]
+
+
+def make_sentiments(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(["positive", "neutral", "negative"]) for _ in range(count)]
+
+
+def make_progress_records(count, seed=0, questions_per_topic=5):
+    """
+    Yield `count` progress rows (topic, question, score, feedback, timestamp)
+    with timestamps one minute apart, ready for ProgressStore.append_many.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    feedback = "Great job maintaining a positive tone! Provide more examples to improve."
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        yield {
+            "topic": topic,
+            "question": f"{topic} question {rng.randrange(questions_per_topic)}",
+            "score": rng.randint(20, 100),
+            "feedback": feedback,
+            "timestamp": (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def synthetic_frames(count, width, height, seed=0):
+    """Smoothly varying frames (a drifting gradient plus noise) stacked as (N, H, W, 3)."""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    frames = np.empty((count, height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        base = (xs + ys + i * 2) % 256
+        noise = rng.integers(0, 16, (height, width))
+        frames[i] = np.clip(base + noise, 0, 255)[..., None]
+    return frames
+
+
+def write_clip(path, frames, fps=15):
+    """Write BGR frames to an MJPG .avi that utils.replay.VideoFileSource can replay."""
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return path
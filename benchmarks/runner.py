@@ -0,0 +1,168 @@
+"""
+Run the benchmark suite (benchmarks/suite.py) and store the results as JSON,
+optionally comparing them with an earlier run:
+
+    python -m benchmarks.runner --quick
+    python -m benchmarks.runner --filter Persistence --compare benchmarks/results/<earlier>.json
+
+Results go to benchmarks/results/<timestamp>-<commit>.json by default. Each
+benchmark is timed per call: calls are batched until a sample takes at least
+`--min-sample` seconds, and the median/min/max of `repeat` samples are kept.
+A benchmark more than `--threshold` times slower than in the compared run is
+reported as a regression (exit status 1 with --fail-on-regression).
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import suite
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def discover(pattern=None):
+    """Yield (class, method name) for every time_* method whose full name matches `pattern`."""
+    for _, cls in inspect.getmembers(suite, inspect.isclass):
+        if cls.__module__ != suite.__name__:
+            continue
+        for name in sorted(vars(cls)):
+            if name.startswith("time_") and (not pattern or re.search(pattern, f"{cls.__name__}.{name}")):
+                yield cls, name
+
+
+def time_call(func, args, repeat, min_sample):
+    """Median/min/max seconds per call over `repeat` samples."""
+    start = time.perf_counter()
+    func(*args)
+    first = time.perf_counter() - start
+    number = 1 if first >= min_sample else max(1, int(min_sample / max(first, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_suite(pattern=None, quick=False, repeat=5, min_sample=0.05, log=print):
+    results = {}
+    by_class = {}
+    for cls, name in discover(pattern):
+        by_class.setdefault(cls, []).append(name)
+
+    for cls, names in by_class.items():
+        params = getattr(cls, "quick_params", None) if quick else None
+        params = params or getattr(cls, "params", [[]])
+        param_names = getattr(cls, "param_names", [])
+        for combo in itertools.product(*params):
+            instance = cls()
+            setup_start = time.perf_counter()
+            if hasattr(instance, "setup"):
+                instance.setup(*combo)
+            setup_seconds = time.perf_counter() - setup_start
+            try:
+                for name in names:
+                    key = f"{cls.__name__}.{name}"
+                    label = ", ".join(f"{n}={v}" for n, v in zip(param_names, combo))
+                    stats = time_call(getattr(instance, name), combo, getattr(cls, "repeat", repeat), min_sample)
+                    stats["params"] = dict(zip(param_names, combo))
+                    stats["setup_seconds"] = round(setup_seconds, 3)
+                    results.setdefault(key, []).append(stats)
+                    log(f"{key}({label}): {format_seconds(stats['median'])}")
+            finally:
+                if hasattr(instance, "teardown"):
+                    instance.teardown(*combo)
+    return results
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def compare(current, previous, threshold=1.2):
+    """Return (benchmark, params, ratio) for every benchmark slower than `threshold` x previous."""
+    regressions = []
+    for key, runs in current.items():
+        earlier = {json.dumps(run["params"], sort_keys=True): run for run in previous.get(key, [])}
+        for run in runs:
+            before = earlier.get(json.dumps(run["params"], sort_keys=True))
+            if not before or not before["median"]:
+                continue
+            ratio = run["median"] / before["median"]
+            if ratio > threshold:
+                regressions.append((key, run["params"], round(ratio, 2)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--filter", help="Regex on Class.time_method names")
+    parser.add_argument("--quick", action="store_true", help="Use each benchmark's smaller quick_params")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark (unless the class sets repeat)")
+    parser.add_argument("--min-sample", type=float, default=0.05, help="Minimum seconds per sample")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    started = datetime.now()
+    results = run_suite(args.filter, args.quick, args.repeat, args.min_sample)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{started:%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "started": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare(results, previous["results"], args.threshold)
+        print(f"Compared with {previous['commit']}: {len(regressions)} regression(s)")
+        for key, params, ratio in regressions:
+            print(f"  {key} {params}: {ratio}x slower")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
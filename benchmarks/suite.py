@@ -0,0 +1,150 @@
+"""
+Benchmark definitions for benchmarks/runner.py, in the asv style: each class
+may declare `params` (a list of value lists) and `param_names`, and gets
+`setup(*params)` / `teardown(*params)` around its `time_*` methods, which are
+timed per call for every parameter combination.
+"""
+import os
+import shutil
+import tempfile
+
+from benchmarks.generators import (
+    make_emotions, make_progress_records, make_sentiments, make_transcripts, synthetic_frames, write_clip
+)
+
+
+class AnalyzeResponse:
+    """analyze_response latency by transcript length."""
+
+    params = [[20, 100, 500, 2000]]
+    param_names = ["words"]
+
+    def setup(self, words):
+        from utils.analysis import analyze_response
+
+        self.analyze_response = analyze_response
+        self.texts = make_transcripts(16, words)
+        self.index = 0
+        analyze_response(self.texts[0])
+
+    def time_analyze_response(self, words):
+        self.analyze_response(self.texts[self.index % len(self.texts)])
+        self.index += 1
+
+
+class ScoringBatch:
+    """generate_score / provide_feedback over a whole batch of analyzed answers."""
+
+    params = [[1_000, 100_000]]
+    param_names = ["batch"]
+    quick_params = [[1_000]]
+
+    def setup(self, batch):
+        self.sentiments = make_sentiments(batch)
+        self.emotions = make_emotions(batch)
+        self.transcripts = make_transcripts(min(batch, 1_000), 60)
+        self.qualities = [("low", "medium", "high")[i % 3] for i in range(batch)]
+
+    def time_generate_score(self, batch):
+        from utils.analysis import generate_score
+
+        transcripts = self.transcripts
+        for i, (sentiment, emotions) in enumerate(zip(self.sentiments, self.emotions)):
+            generate_score(sentiment, emotions, transcripts[i % len(transcripts)])
+
+    def time_provide_feedback(self, batch):
+        from utils.feedback import provide_feedback
+
+        for sentiment, emotions, quality in zip(self.sentiments, self.emotions, self.qualities):
+            provide_feedback(sentiment, emotions, quality)
+
+
+class Persistence:
+    """save_progress / track_progress / get_feedback_summary against a prefilled history."""
+
+    params = [["sqlite", "jsonl"], [1_000, 100_000, 1_000_000]]
+    param_names = ["backend", "rows"]
+    quick_params = [["sqlite", "jsonl"], [1_000, 100_000]]
+    # Loading a million-row history takes seconds; a few samples are enough
+    repeat = 3
+
+    def setup(self, backend, rows):
+        from utils.progress_store import get_progress_store
+
+        self.directory = tempfile.mkdtemp(prefix="bench-progress-")
+        self.path = os.path.join(self.directory, "progress.db" if backend == "sqlite" else "progress.log.jsonl")
+        self.saved_env = {key: os.environ.get(key) for key in ("PROGRESS_BACKEND", "PROGRESS_STORE_PATH")}
+        # The data_handling functions resolve their store from the environment
+        os.environ["PROGRESS_BACKEND"] = backend
+        os.environ["PROGRESS_STORE_PATH"] = self.path
+        get_progress_store(backend, self.path).append_many(make_progress_records(rows))
+
+    def teardown(self, backend, rows):
+        from utils import progress_store
+
+        # Forget the cached store so the next parameter set starts from an empty file
+        with progress_store._stores_lock:
+            progress_store._stores.pop((backend, self.path), None)
+        for key, value in self.saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_save_progress(self, backend, rows):
+        from utils.data_handling import save_progress
+
+        save_progress("Python", "Python question 1", 80, "Good structure.")
+
+    def time_track_progress(self, backend, rows):
+        from utils.data_handling import track_progress
+
+        track_progress()
+
+    def time_get_feedback_summary(self, backend, rows):
+        from utils.data_handling import get_feedback_summary
+
+        get_feedback_summary()
+
+
+class FaceDetectionReplay:
+    """
+    Face detection on frames replayed from a clip (synthetic unless
+    $BENCH_CLIP names a recorded one), full-frame vs tracked.
+    """
+
+    params = [["full", "tracker"]]
+    param_names = ["method"]
+    repeat = 3
+
+    def setup(self, method):
+        from utils.face_tracking import FaceTracker, detect_faces, load_face_cascade, preprocess
+        from utils.replay import VideoFileSource
+
+        self.directory = tempfile.mkdtemp(prefix="bench-replay-")
+        clip = os.getenv("BENCH_CLIP") or write_clip(
+            os.path.join(self.directory, "clip.avi"), synthetic_frames(150, 240, 180)
+        )
+        source = VideoFileSource(clip, realtime=False)
+        self.frames = []
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            self.frames.append(frame)
+        source.release()
+
+        cascade = load_face_cascade()
+        self.preprocess = preprocess
+        if method == "tracker":
+            self.detect = FaceTracker(cascade, detect_every=5).update
+        else:
+            self.detect = lambda gray: detect_faces(cascade, gray)
+
+    def teardown(self, method):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_detect_clip(self, method):
+        for frame in self.frames:
+            self.detect(self.preprocess(frame))
@@ -0,0 +1,31 @@
+import threading
+
+from utils import jobs
+
+
+def _job(store, owner, pid):
+    job_id = store.create("test", {}, ["stage"])
+    store.set_status(job_id, jobs.RUNNING)
+    with store.transaction() as conn:
+        conn.execute("UPDATE jobs SET owner = ?, pid = ? WHERE id = ?", (owner, pid, job_id))
+    return job_id
+
+
+def test_mark_interrupted_keeps_jobs_of_live_executors(tmp_path):
+    store = jobs.JobStore(str(tmp_path / "jobs.db"))
+    release = threading.Event()
+    # A worker of another executor in this process, e.g. from before a module reload
+    worker = threading.Thread(target=release.wait, name=jobs._thread_prefix("reloaded") + "_0")
+    worker.start()
+    try:
+        own = _job(store, jobs.OWNER, jobs.os.getpid())
+        reloaded = _job(store, "reloaded", jobs.os.getpid())
+        gone = _job(store, "gone", jobs.os.getpid())
+        dead = _job(store, "dead", 2**22 + 12345)
+        assert store.mark_interrupted() == 2
+        assert [store.get(job_id)["status"] for job_id in (own, reloaded, gone, dead)] == [
+            jobs.RUNNING, jobs.RUNNING, jobs.INTERRUPTED, jobs.INTERRUPTED
+        ]
+    finally:
+        release.set()
+        worker.join()
@@ -0,0 +1,111 @@
+import os
+import time
+
+import pytest
+
+from utils import llm
+from utils.llm import FakeCohereClient, LLMCache
+
+QUESTION = "Tell me about yourself."
+ANSWER = "I am a software engineer with five years of experience."
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMCache(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(llm, "cache", cache)
+    return cache
+
+
+def generate(client, **kwargs):
+    return llm.generate(llm.EVALUATION_PROMPT, QUESTION, kwargs.pop("answer", ANSWER), client=client, **kwargs)
+
+
+def test_miss_calls_the_client(cache):
+    client = FakeCohereClient(text="Score: 80")
+    assert generate(client) == "Score: 80"
+    assert client.calls == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_memory_hit_does_not_call_the_client(cache):
+    client = FakeCohereClient()
+    first = generate(client)
+    assert generate(client) == first
+    assert client.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 0, 1)
+
+
+def test_disk_hit_does_not_call_the_client(cache, tmp_path, monkeypatch):
+    client = FakeCohereClient()
+    first = generate(client)
+    # A new cache on the same directory, as after a restart
+    restarted = LLMCache(cache_dir=cache.cache_dir)
+    monkeypatch.setattr(llm, "cache", restarted)
+    assert generate(client) == first
+    assert client.calls == 1
+    stats = restarted.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+
+
+@pytest.mark.parametrize("change", [
+    dict(model="other-model"),
+    dict(temperature=0.7),
+    dict(answer="Something else."),
+])
+def test_changed_request_is_a_miss(cache, change):
+    client = FakeCohereClient()
+    generate(client)
+    generate(client, **change)
+    assert client.calls == 2
+
+
+def test_key_depends_on_prompt_model_and_params():
+    args = (llm.EVALUATION_PROMPT, llm.DEFAULT_MODEL, 0.3, QUESTION, ANSWER)
+    key = LLMCache.make_key(*args)
+    assert key == LLMCache.make_key(*args)
+    variants = [
+        (llm.IMPROVEMENT_PROMPT,) + args[1:],
+        args[:1] + ("other-model",) + args[2:],
+        args[:2] + (0.7,) + args[3:],
+        args[:3] + ("Why this role?", ANSWER),
+        args[:4] + ("Something else.",),
+    ]
+    assert len({key} | {LLMCache.make_key(*variant) for variant in variants}) == len(variants) + 1
+    # Moving text from the question to the answer changes the key
+    assert LLMCache.make_key("t", "m", 0.3, "ab", "c") != LLMCache.make_key("t", "m", 0.3, "a", "bc")
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), ttl=0.1)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.2)
+    assert cache.get("key") is None
+    assert LLMCache(cache_dir=str(tmp_path), ttl=0.1).get("key") is None
+
+
+def test_memory_level_evicts_least_recently_used():
+    cache = LLMCache(cache_dir=None, max_entries=3)
+    for key in "abc":
+        cache.set(key, key.upper())
+    cache.get("a")
+    cache.set("d", "D")
+    assert cache.stats()["memory_entries"] == 3
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+
+
+def test_disk_level_evicts_oldest_files_over_budget(tmp_path):
+    budget = 4096
+    cache = LLMCache(cache_dir=str(tmp_path), max_disk_bytes=budget)
+    start = time.time() - 100
+    for i in range(20):
+        cache.set(f"key{i:02d}", "x" * 500)
+        # Distinct modification times, so "oldest first" is well defined
+        os.utime(os.path.join(tmp_path, f"key{i:02d}.json"), (start + i, start + i))
+    files = sorted(name for name in os.listdir(tmp_path) if name.endswith(".json"))
+    assert sum(os.path.getsize(os.path.join(tmp_path, name)) for name in files) <= budget
+    assert len(files) > 1
+    assert files == [f"key{i:02d}.json" for i in range(20 - len(files), 20)]
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from utils import progress_store
+
+
+@pytest.fixture
+def user_stores(monkeypatch):
+    monkeypatch.setattr(progress_store, "MAX_OPEN_USER_STORES", 2)
+    monkeypatch.setattr(progress_store, "_user_stores", progress_store.OrderedDict())
+    yield progress_store._user_stores
+    for store in progress_store._user_stores.values():
+        store.close()
+
+
+@pytest.mark.parametrize("backend", sorted(progress_store.BACKENDS))
+def test_evicted_user_store_is_closed_and_reopens(user_stores, tmp_path, backend, monkeypatch):
+    closed = []
+    store_class = progress_store.BACKENDS[backend]
+    original_close = store_class.close
+    monkeypatch.setattr(store_class, "close", lambda self: closed.append(self) or original_close(self))
+
+    stores = []
+    for user in range(4):
+        store = progress_store.get_user_store(f"user-{user}", backend, root=str(tmp_path))
+        store.append("Python", f"q{user}", 50 + user, "feedback")
+        stores.append(store)
+
+    assert len(user_stores) == 2
+    assert closed == stores[:2]
+    # An evicted store still works, and reopening the user finds their records
+    assert stores[0].count() == 1
+    reopened = progress_store.get_user_store("user-0", backend, root=str(tmp_path))
+    assert reopened is not stores[0]
+    assert [record["question"] for record in reopened.iter_records()] == ["q0"]
+
+
+def test_sqlite_close_releases_connections(tmp_path):
+    store = progress_store.SQLiteProgressStore(str(tmp_path / "progress.db"))
+    store.append("Python", "q", 70, "feedback")
+    store.close()
+    assert store._connections == []
+    # The next use opens a new connection
+    assert store.count() == 1
+
+
+@pytest.mark.parametrize("topic, start, end", [
+    (None, None, None),
+    ("Python", None, None),
+    ("Python", date(2024, 1, 3), date(2024, 1, 15)),
+])
+def test_backends_page_in_the_same_order(tmp_path, topic, start, end):
+    # Saved out of timestamp order, with both stored timestamp formats
+    records = [
+        {"topic": "Python" if i % 2 else "SQL", "question": f"q{i}", "score": i, "feedback": "",
+         "timestamp": f"2024-01-{1 + (i * 7) % 20:02d}{'T' if i % 3 else ' '}10:00:00"}
+        for i in range(30)
+    ]
+    pages = []
+    for backend in sorted(progress_store.BACKENDS):
+        store = progress_store.BACKENDS[backend](str(tmp_path / ("progress" + progress_store.EXTENSIONS[backend])))
+        store.append_many(records)
+        pages.append(store.query_page(topic=topic, start=start, end=end, offset=3, limit=8))
+        store.close()
+    assert pages[0] == pages[1]
+    page, total = pages[0]
+    expected = [
+        record for record in reversed(records)
+        if topic in (None, record["topic"])
+        and (start is None or start.isoformat() <= record["timestamp"][:10] <= end.isoformat())
+    ]
+    assert total == len(expected)
+    assert [record["question"] for record in page] == [record["question"] for record in expected[3:11]]
+    assert all("T" in record["timestamp"] for record in page)
@@ -0,0 +1,57 @@
+import json
+import socket
+
+import pytest
+
+from utils.service import MAX_BODY_BYTES, AnalysisService, RequestError, validate
+
+
+@pytest.fixture
+def service():
+    service = AnalysisService(("127.0.0.1", 0), workers=2).start()
+    yield service
+    service.shutdown()
+
+
+def post(service, headers, body=b""):
+    """Send a raw POST /analyze and return (status, JSON body)."""
+    with socket.create_connection(service.server_address[:2], timeout=5) as sock:
+        request = "POST /analyze HTTP/1.1\r\nHost: test\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        sock.sendall(request.encode("ascii") + b"\r\n" + body)
+        response = b""
+        while chunk := sock.recv(65536):
+            response += chunk
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({}, 400),
+    ({"Content-Length": "-1"}, 400),
+    ({"Content-Length": "ten"}, 400),
+    ({"Content-Length": str(MAX_BODY_BYTES + 1)}, 413),
+])
+def test_bad_content_length_is_rejected_without_reading(service, headers, status):
+    # The connection is closed after the reply, so a handler blocked on the body would time out here
+    assert post(service, headers)[0] == status
+
+
+def test_invalid_json_is_a_bad_request(service):
+    assert post(service, {"Content-Length": "3"}, b"{x}") == (400, {"error": "Request body is not valid JSON"})
+
+
+@pytest.mark.parametrize("answer", [
+    {"transcription": "x", "references": "not json"},
+    {"transcription": "x", "question": 3},
+    {"transcription": "x", "emotion_data": {"happy": "a"}},
+    {"transcription": " "},
+])
+def test_validate_rejects_bad_field_types(answer):
+    with pytest.raises(RequestError):
+        validate(answer)
+
+
+def test_shutdown_stops_every_worker():
+    service = AnalysisService(("127.0.0.1", 0), workers=3).start()
+    service.shutdown()
+    assert not any(worker.is_alive() for worker in service.batcher._workers)
@@ -1,17 +1,64 @@
 
-import spacy
-from textblob import TextBlob  # Retain for sentiment analysis
+from utils.lazy import lazy_resource
+
+# Components whose output the analysis never reads (noun_chunks only needs tagger + parser)
+UNUSED_COMPONENTS = ["ner", "lemmatizer"]
+
+
+def textblob_sentiment(doc):
+    """
+    Set `doc._.polarity` to TextBlob's polarity of the text, inside the spaCy
+    pipeline. Sentiment is not computed from the shared spaCy tokens: the
+    pattern analyzer tokenizes `doc.text` a second time with its own
+    whitespace tokenizer, which keeps dash-joined words ("great—amazing",
+    "well-done") together where spaCy splits them, so the polarity equals
+    TextBlob(text).sentiment.polarity. That second pass is a few regexes
+    (about 0.5 ms per 120-word answer); TextBlob objects are not created.
+    """
+    from textblob.en import sentiment as pattern_sentiment  # TextBlob's default sentiment analyzer
+
+    doc._.polarity = pattern_sentiment(doc.text)[0]
+    return doc
+
+
+@lazy_resource("nlp")
+def get_nlp():
+    """
+    The spaCy medium model, trimmed to what the analysis uses. spaCy and the
+    model are loaded on first use and shared by the whole process.
+    """
+    import spacy
+    from spacy.language import Language
+    from spacy.tokens import Doc
+
+    Doc.set_extension("polarity", default=0.0, force=True)
+    if "textblob_sentiment" not in Language.factories:
+        Language.component("textblob_sentiment", func=textblob_sentiment)
+    nlp = spacy.load("en_core_web_md", exclude=UNUSED_COMPONENTS)
+    nlp.add_pipe("textblob_sentiment", last=True)
+    return nlp
+
+
+def __getattr__(name):
+    # `from utils.analysis import nlp` keeps working, but loads the model then
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Load the spaCy medium model
-nlp = spacy.load("en_core_web_md")
 
 def analyze_response(text):
-    # Sentiment analysis (using TextBlob)
-    blob = TextBlob(text)
-    sentiment = "positive" if blob.sentiment.polarity > 0.1 else "negative" if blob.sentiment.polarity < -0.1 else "neutral"
+    return analyze_doc(get_nlp()(text))
+
+
+def analyze_doc(doc):
+    """Analyze a response that has already been processed by `nlp` (e.g. via `nlp.pipe`)."""
+    text = doc.text
+
+    # Sentiment from the textblob_sentiment component
+    polarity = doc._.polarity
+    sentiment = "positive" if polarity > 0.1 else "negative" if polarity < -0.1 else "neutral"
 
     # Extract key phrases using spaCy
-    doc = nlp(text)
     key_phrases = [chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) > 1]
 
     # Assess response quality
@@ -20,12 +67,19 @@ def analyze_response(text):
     return sentiment, key_phrases[:5], quality  # Limit to top 5 key phrases
 
 
-def generate_score(sentiment, emotion_data, transcription):
+def generate_score(sentiment, emotion_data, transcription, relevance=None):
+    """
+    Overall 0-100 score. With a `relevance` result (utils.relevance), how well
+    the answer addresses the question counts as a fourth component.
+    """
     # Example scoring formula
     length_score = min(len(transcription) / 200, 1)
     emotion_score = 1 if emotion_data.get('happy', 0) > 50 else 0.5
     sentiment_score = 1 if sentiment == "positive" else 0.5
-    return round((length_score + emotion_score + sentiment_score) / 3 * 100, 2)
+    if relevance is None:
+        return round((length_score + emotion_score + sentiment_score) / 3 * 100, 2)
+    relevance_score = relevance["score"] / 100
+    return round((length_score + emotion_score + sentiment_score + relevance_score) / 4 * 100, 2)
 
 def track_progress():
     import json
@@ -0,0 +1,185 @@
+"""
+Offline batch scoring of stored interview transcripts.
+
+Streams records from a JSONL or CSV file through `nlp.pipe` and applies the
+same analysis, scoring and feedback as the app to every record:
+
+    python -m utils.batch_scoring transcripts.jsonl scored.jsonl --batch-size 64 --n-process 4
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from utils.analysis import get_nlp, analyze_doc, generate_score
+from utils.feedback import provide_feedback
+from utils.relevance import get_scorer
+
+RESULT_FIELDS = ["sentiment", "key_phrases", "quality", "score", "feedback"]
+
+
+def _is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def read_records(path):
+    """Yield input records one at a time from a JSONL or CSV file."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if _is_csv(path):
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _emotion_data(record):
+    emotion_data = record.get("emotion_data") or {}
+    # CSV columns hold the emotion dict as a JSON string
+    if isinstance(emotion_data, str):
+        emotion_data = json.loads(emotion_data)
+    return emotion_data
+
+
+def _references(record):
+    references = record.get("references") or []
+    # CSV columns hold the list as a JSON string
+    if isinstance(references, str):
+        references = json.loads(references)
+    return references
+
+
+def _relevance(batch, question_field):
+    """Relevance results for a batch of (doc, record), None for records without a question."""
+    asked = [i for i, (_, record) in enumerate(batch) if record.get(question_field)]
+    results = [None] * len(batch)
+    if asked:
+        scored = get_scorer().score_docs(
+            [batch[i][1][question_field] for i in asked],
+            [batch[i][0] for i in asked],
+            [_references(batch[i][1]) for i in asked],
+        )
+        for i, result in zip(asked, scored):
+            results[i] = result
+    return results
+
+
+def score_docs(batch, question_field="question"):
+    """
+    Score a batch of (doc, record) pairs, returning (results, relevance):
+    each record extended with sentiment, key phrases, quality, score and
+    feedback, and the full relevance result per record (None without a question).
+    """
+    relevance_results = _relevance(batch, question_field)
+    results = []
+    for (doc, record), relevance in zip(batch, relevance_results):
+        sentiment, key_phrases, quality = analyze_doc(doc)
+        emotion_data = _emotion_data(record)
+        result = dict(record)
+        result.update({
+            "sentiment": sentiment,
+            "key_phrases": key_phrases,
+            "quality": quality,
+            "score": generate_score(sentiment, emotion_data, doc.text, relevance),
+            "feedback": provide_feedback(sentiment, emotion_data, quality),
+        })
+        if relevance is not None:
+            result["relevance"] = relevance["score"]
+            result["keyword_coverage"] = relevance["coverage"]
+        results.append(result)
+    return results, relevance_results
+
+
+def score_records(records, text_field="transcription", batch_size=64, n_process=1, question_field="question"):
+    """
+    Score an iterable of records lazily, yielding each input record
+    extended with sentiment, key phrases, quality, score and feedback.
+    Records with a question (and optionally "references") are also scored
+    for relevance, one batch at a time.
+    """
+    texts = ((record.get(text_field) or "", record) for record in records)
+    docs = get_nlp().pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process)
+    while True:
+        batch = list(islice(docs, batch_size))
+        if not batch:
+            break
+        yield from score_docs(batch, question_field)[0]
+
+
+class ResultWriter:
+    """Write scored records to JSONL or CSV as they are produced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.csv_writer = None
+
+    def write(self, result):
+        if not _is_csv(self.path):
+            self.file.write(json.dumps(result) + "\n")
+            return
+
+        if self.csv_writer is None:
+            fieldnames = list(result.keys())
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction="ignore")
+            self.csv_writer.writeheader()
+        row = dict(result)
+        row["key_phrases"] = json.dumps(row["key_phrases"])
+        if isinstance(row.get("references"), list):
+            row["references"] = json.dumps(row["references"])
+        if isinstance(row.get("emotion_data"), dict):
+            row["emotion_data"] = json.dumps(row["emotion_data"])
+        self.csv_writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+def run(input_path, output_path, text_field="transcription", batch_size=64, n_process=1,
+        report_every=1000, log=sys.stderr, question_field="question"):
+    """
+    Score `input_path` into `output_path` and return throughput stats.
+    """
+    writer = ResultWriter(output_path)
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in score_records(read_records(input_path), text_field, batch_size, n_process, question_field):
+            writer.write(result)
+            count += 1
+            if report_every and count % report_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{count} docs, {count / elapsed:.1f} docs/sec", file=log)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "docs": count,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+    print(f"Scored {stats['docs']} docs in {stats['seconds']}s ({stats['docs_per_sec']} docs/sec)", file=log)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score interview transcripts.")
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl or .csv file")
+    parser.add_argument("--text-field", default="transcription", help="Field holding the transcript")
+    parser.add_argument("--question-field", default="question", help="Field holding the question (for relevance)")
+    parser.add_argument("--batch-size", type=int, default=64, help="nlp.pipe batch size")
+    parser.add_argument("--n-process", type=int, default=1, help="Number of spaCy worker processes")
+    parser.add_argument("--report-every", type=int, default=1000, help="Progress report interval (docs)")
+    args = parser.parse_args(argv)
+
+    run(args.input, args.output, args.text_field, args.batch_size, args.n_process, args.report_every,
+        question_field=args.question_field)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.preview import PreviewThrottle
+
+
+class StageStats:
+    """Processed/dropped counters and throughput for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.started = None
+        self.stopped = None
+        self._lock = threading.Lock()
+
+    def mark(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.monotonic()
+            self.processed += 1
+
+    def drop(self, count=1):
+        with self._lock:
+            self.dropped += count
+
+    def fps(self):
+        if self.started is None:
+            return 0.0
+        elapsed = (self.stopped or time.monotonic()) - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {"processed": self.processed, "dropped": self.dropped, "fps": round(self.fps(), 1)}
+
+
+class DropOldestQueue:
+    """
+    Bounded queue that never blocks producers: when full, the oldest item is
+    discarded (and counted as dropped on `stats`), so consumers always see the
+    most recent items.
+    """
+
+    def __init__(self, maxsize=1, stats=None):
+        self._items = deque()
+        self.maxsize = maxsize
+        self.stats = stats
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                if self.stats:
+                    self.stats.drop()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None if nothing arrives within `timeout`."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+
+class CapturePipeline:
+    """
+    Three-stage video pipeline:
+
+    capture   (thread) reads frames at the camera rate and stores them
+    detection (thread) runs face detection on the newest frame only
+    preview   (caller's thread) hands the newest annotated frame to a PreviewThrottle
+
+    Slow detection or preview drops stale frames instead of slowing capture.
+    """
+
+    def __init__(self, video_recorder, duration, preview_fps=10, preview_max_width=320, preview_jpeg_quality=70,
+                 end_event=None):
+        self.recorder = video_recorder
+        self.duration = duration
+        self.preview_fps = preview_fps
+        self.preview_max_width = preview_max_width
+        self.preview_jpeg_quality = preview_jpeg_quality
+        self.preview_transport = {}
+        self.capture_stats = StageStats("capture")
+        self.detection_stats = StageStats("detection")
+        self.preview_stats = StageStats("preview")
+        self.to_detection = DropOldestQueue(1, self.detection_stats)
+        self.to_preview = DropOldestQueue(1, self.preview_stats)
+        self.read_failures = 0
+        self.faces_detected = 0
+        self.capture_done = threading.Event()
+        self.stop_event = threading.Event()
+        # Set by another component (e.g. voice activity detection) to end capture early
+        self.end_event = end_event or threading.Event()
+        self._threads = []
+
+    def start(self):
+        ctx = get_script_run_ctx()
+        for target in (self._capture_loop, self._detection_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            # Let the workers report errors to the Streamlit page
+            add_script_run_ctx(thread, ctx)
+            thread.start()
+            self._threads.append(thread)
+
+    def _capture_loop(self):
+        start_time = time.monotonic()
+        capture = self.recorder.video_capture
+        try:
+            while (not self.stop_event.is_set() and not self.end_event.is_set()
+                   and time.monotonic() - start_time < self.duration):
+                ret, frame = capture.read()
+                if not ret:
+                    if getattr(capture, "exhausted", False):
+                        # Replayed file ended (see utils.replay)
+                        break
+                    self.read_failures += 1
+                    time.sleep(0.01)
+                    continue
+
+                # Flip frame horizontally for mirror effect
+                frame = cv2.flip(frame, 1)
+                # Store the clean frame before face boxes are drawn onto it
+                self.recorder.frames.add(frame)
+                self.capture_stats.mark()
+                self.to_detection.put((time.monotonic(), frame))
+        finally:
+            self.capture_stats.stopped = time.monotonic()
+            self.capture_done.set()
+
+    def _detection_loop(self):
+        while not self.stop_event.is_set():
+            item = self.to_detection.get(timeout=0.1)
+            if item is None:
+                if self.capture_done.is_set():
+                    break
+                continue
+            captured_at, frame = item
+            frame_with_faces, faces_detected = self.recorder.detect_and_draw_faces(frame)
+            self.detection_stats.mark()
+            if faces_detected:
+                self.faces_detected += 1
+            self.to_preview.put((captured_at, frame_with_faces))
+        self.detection_stats.stopped = time.monotonic()
+
+    def run_preview(self, display):
+        """
+        Feed annotated frames to `display` (a Streamlit placeholder) through a
+        PreviewThrottle until capture has finished.
+        """
+        throttle = PreviewThrottle(display, self.preview_fps, self.preview_max_width, self.preview_jpeg_quality)
+        try:
+            while not self.capture_done.is_set():
+                item = self.to_preview.get(timeout=0.1)
+                if item is None:
+                    continue
+                captured_at, frame = item
+                if throttle.submit(frame, captured_at):
+                    self.preview_stats.mark()
+                else:
+                    self.preview_stats.drop()
+        finally:
+            throttle.close()
+            self.preview_stats.stopped = time.monotonic()
+            self.preview_transport = throttle.stats()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self):
+        return {
+            "capture": self.capture_stats.to_dict(),
+            "detection": self.detection_stats.to_dict(),
+            "preview": self.preview_stats.to_dict(),
+            "preview_transport": self.preview_transport,
+            "read_failures": self.read_failures,
+            "faces_detected": self.faces_detected,
+        }
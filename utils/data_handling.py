@@ -1,134 +1,204 @@
-import json
-import csv
+import os
+
+from utils import tracing
+from utils.progress_analytics import forget_analytics, get_analytics
+from utils.progress_store import get_progress_store, get_user_store, user_key, user_store_path
+from utils.question_bank import get_question_bank
+
+# Callbacks run after this process changes the progress data (cache invalidation)
+_change_listeners = {}
+
+def on_progress_change(name, callback):
+    """
+    Call `callback()` after every save, reset or rebuild. Registering the same
+    `name` again replaces the previous callback (safe on Streamlit reruns).
+    """
+    _change_listeners[name] = callback
+
+def _notify_progress_change():
+    for callback in list(_change_listeners.values()):
+        callback()
+
+def progress_store(user=None):
+    """
+    The store for `user`'s progress, or the shared store when `user` is None
+    (CLI tools, single-user setups with PROGRESS_PARTITION=none).
+    """
+    return get_progress_store() if user is None else get_user_store(user)
+
+def progress_version(user=None):
+    """
+    Token that changes whenever the progress data changes, including writes
+    from other processes; use it as a cache key.
+    """
+    return progress_store(user).version()
+
+# Built-in questions, used when the question bank file is missing
+DEFAULT_QUESTIONS = {
+    "HR Questions": [
+        "Tell me about yourself.",
+        "What are your strengths and weaknesses?",
+        "Why do you want to work for this company?",
+        "Where do you see yourself in 5 years?",
+        "How do you handle stress and pressure?"
+    ],
+    "OOPs Concepts": [
+        "What is object-oriented programming?",
+        "Explain the four pillars of object-oriented programming.",
+        "What is the difference between abstraction and encapsulation?",
+        "Describe the concept of inheritance in object-oriented programming.",
+        "How does polymorphism work in object-oriented programming?"
+    ],
+    "Python": [
+        "What are the key features of Python?",
+        "Explain the difference between lists and tuples in Python.",
+        "How does memory management work in Python?",
+        "What is the GIL in Python?",
+        "Explain the use of decorators in Python."
+    ],
+    "Data Structures": [
+        "What is the difference between a stack and a queue?",
+        "Explain the concept of a binary search tree.",
+        "What is a hash table and how does it work?",
+        "Describe the time complexity of common sorting algorithms.",
+        "What is the difference between a linked list and an array?"
+    ],
+    "Machine Learning": [
+        "What is the difference between supervised and unsupervised learning?",
+        "Explain the concept of overfitting and how to prevent it.",
+        "What is the difference between classification and regression?",
+        "Describe the k-means clustering algorithm.",
+        "What is the purpose of cross-validation in machine learning?"
+    ],
+    "Web Development": [
+        "What is the difference between GET and POST HTTP methods?",
+        "Explain the concept of RESTful APIs.",
+        "What is CORS and why is it important?",
+        "Describe the differences between SQL and NoSQL databases.",
+        "What are the key principles of responsive web design?"
+    ]
+}
 
 # Load predefined questions
 def load_questions():
-    return {
-        "HR Questions": [
-            "Tell me about yourself.",
-            "What are your strengths and weaknesses?",
-            "Why do you want to work for this company?",
-            "Where do you see yourself in 5 years?",
-            "How do you handle stress and pressure?"
-        ],
-        "OOPs Concepts": [
-            "What is object-oriented programming?",
-            "Explain the four pillars of object-oriented programming.",
-            "What is the difference between abstraction and encapsulation?",
-            "Describe the concept of inheritance in object-oriented programming.",
-            "How does polymorphism work in object-oriented programming?"
-        ],
-        "Python": [
-            "What are the key features of Python?",
-            "Explain the difference between lists and tuples in Python.",
-            "How does memory management work in Python?",
-            "What is the GIL in Python?",
-            "Explain the use of decorators in Python."
-        ],
-        "Data Structures": [
-            "What is the difference between a stack and a queue?",
-            "Explain the concept of a binary search tree.",
-            "What is a hash table and how does it work?",
-            "Describe the time complexity of common sorting algorithms.",
-            "What is the difference between a linked list and an array?"
-        ],
-        "Machine Learning": [
-            "What is the difference between supervised and unsupervised learning?",
-            "Explain the concept of overfitting and how to prevent it.",
-            "What is the difference between classification and regression?",
-            "Describe the k-means clustering algorithm.",
-            "What is the purpose of cross-validation in machine learning?"
-        ],
-        "Web Development": [
-            "What is the difference between GET and POST HTTP methods?",
-            "Explain the concept of RESTful APIs.",
-            "What is CORS and why is it important?",
-            "Describe the differences between SQL and NoSQL databases.",
-            "What are the key principles of responsive web design?"
-        ]
-    }
+    """
+    {topic: [questions]} from the question bank file ($QUESTION_BANK_PATH,
+    default questions.json), or the built-in questions if there is none.
+    """
+    try:
+        return get_question_bank().topics()
+    except FileNotFoundError:
+        return DEFAULT_QUESTIONS
 
 # Save progress along with feedback and scores
-def save_progress(topic, question, score, feedback):
+def save_progress(topic, question, score, feedback, user=None):
     """
-    Save the user's progress in both JSON and CSV formats.
+    Append one attempt to the progress store (of `user`, if given).
+    Each save is a single append, independent of the size of the history.
     """
-    # Create data directory if it doesn't exist
-    # Path("data").mkdir(exist_ok=True)
-    
-    # Load existing progress
-    progress = track_progress()
-    
-    # Ensure the topic exists in the progress dictionary
-    progress.setdefault(topic, [])
-    
-    # Add the new progress record
-    progress[topic].append({
-        "question": question,
-        "score": float(score),  # Ensure score is float
-        "feedback": feedback.strip('"\'')  # Remove any quotes
-    })
-    
-    # Save to JSON file
-    with open("progress.json", "w", encoding='utf-8') as f:
-        json.dump(progress, f, indent=4)
-
-    # Save to CSV file
-    with open("progress.csv", "w", encoding='utf-8', newline='') as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
-        writer.writerow(["topic", "question", "score", "feedback"])
-        for topic_name, records in progress.items():
-            for record in records:
-                writer.writerow([
-                    topic_name,
-                    record["question"],
-                    record["score"],
-                    record["feedback"]
-                ])
-
-def track_progress():
-    """
-    Load the progress data from the CSV file, or return an empty dictionary if the file doesn't exist.
+    progress_store(user).append(topic, question, score, feedback)
+    if tracing.tracer.enabled:
+        # Payload size of the record (text fields + score), not the backend's on-disk overhead
+        tracing.count("progress_bytes_written", len(f"{topic}{question}{score}{feedback}".encode("utf-8")))
+    _notify_progress_change()
+
+def track_progress(user=None):
     """
-    try:
-        progress = {}
-        with open("progress.csv", "r", encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                topic = row["topic"]
-                progress.setdefault(topic, [])
-                progress[topic].append({
-                    "question": row["question"],
-                    "score": float(row["score"]),
-                    "feedback": row["feedback"]
-                })
-        return progress
-    except FileNotFoundError:
-        return {}
+    Load the progress data grouped by topic, or return an empty dictionary if there is none.
+    """
+    return progress_store(user).load_progress()
+
+def load_progress_records(user=None):
+    """
+    Return all progress records as flat dicts (topic, question, score, feedback, timestamp).
+    """
+    return list(progress_store(user).iter_records())
+
+def load_progress_page(user=None, topic=None, start=None, end=None, columns=None, page=0, page_size=50):
+    """
+    One page (0-based) of progress records, newest first, as (records, total
+    matching). Topic/date filters and the column selection are applied by the
+    store, so only the rows and columns of the page are read.
+    """
+    return progress_store(user).query_page(topic, start, end, columns, page * page_size, page_size)
+
+def export_progress(csv_path=None, json_path=None, user=None, parquet_path=None):
+    """
+    Export the progress store to the CSV and JSON formats used by earlier
+    versions and to Parquet. Defaults to progress.csv/.json/.parquet, or files
+    next to `user`'s store. Returns the paths written.
+    """
+    if user is None:
+        base = "progress"
+    else:
+        base = os.path.join(os.path.dirname(user_store_path(user)), user_key(user) + "-export")
+    csv_path = csv_path or base + ".csv"
+    json_path = json_path or base + ".json"
+    parquet_path = parquet_path or base + ".parquet"
+    store = progress_store(user)
+    store.export_csv(csv_path)
+    store.export_json(json_path)
+    store.export_parquet(parquet_path)
+    return csv_path, json_path, parquet_path
+
+def reset_progress(user=None):
+    """
+    Delete the stored progress records (only `user`'s, if given).
+    """
+    store = progress_store(user)
+    store.clear()
+    forget_analytics(store)
+    _notify_progress_change()
+
+def rebuild_progress_aggregates(user=None):
+    """
+    Recompute the per-topic/per-question aggregates from the full history.
+    """
+    progress_store(user).rebuild_aggregates()
+    _notify_progress_change()
 
 # Retrieve detailed feedback summary
-# Enhanced get_feedback_summary with missing key handling
-def get_feedback_summary():
+def get_feedback_summary(user=None):
     """
-    Generate a summary of feedback and scores for all topics and questions.
-    Handles missing feedback keys gracefully.
+    Generate a summary of feedback and scores for all topics.
+    Reads the running aggregates kept up to date by save_progress, so the cost
+    depends on the number of topics rather than the size of the history.
+    Only the most recent feedback entries per topic are included.
     """
-    progress = track_progress()
+    store = progress_store(user)
+    aggregates = store.get_aggregates()
     summary = {}
 
-    for topic, records in progress.items():
-        total_score = 0
-        feedback_list = []
-        for record in records:
-            total_score += record["score"]
-            # Handle missing feedback key
-            feedback_list.append(f"- {record.get('feedback', 'No feedback available for this response.')}")
-        
-        # Calculate average score per topic
-        average_score = total_score / len(records) if records else 0
+    for topic, stats in aggregates.topics.items():
+        feedback_list = [
+            f"- {feedback or 'No feedback available for this response.'}"
+            for feedback in store.read_feedback(stats.feedback_offsets)
+        ]
         summary[topic] = {
-            "average_score": round(average_score, 2),
+            "average_score": round(stats.average, 2),
+            "attempts": stats.count,
+            "min_score": stats.min,
+            "max_score": stats.max,
+            "recent_scores": stats.recent,
             "feedback": feedback_list,
         }
     
     return summary
+
+def get_question_summary(topic, user=None):
+    """
+    Return average score and attempt count for each question of `topic`.
+    """
+    questions = progress_store(user).get_aggregates().questions.get(topic, {})
+    return {
+        question: {"average_score": round(stats.average, 2), "attempts": stats.count}
+        for question, stats in questions.items()
+    }
+
+def get_progress_analytics(user=None):
+    """
+    Rolling means, percentiles, improvement slopes and streaks per topic and
+    question (utils/progress_analytics.py), updated with the attempts saved
+    since the last call rather than recomputed from the whole history.
+    """
+    return get_analytics(progress_store(user))
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+
+from utils.lazy import lazy_resource
+
+# Haar cascade parameters used for all face detection in the app
+DETECT_PARAMS = dict(
+    scaleFactor=1.3,  # Increased from 1.1
+    minNeighbors=3,   # Reduced from 5
+    minSize=(30, 30)
+)
+
+
+def load_face_cascade():
+    """Load OpenCV's frontal face Haar cascade (None if the file is missing)."""
+    cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    cascade = cv2.CascadeClassifier(cascade_path)
+    return None if cascade.empty() else cascade
+
+
+@lazy_resource("face_cascade")
+def get_face_cascade():
+    """The face cascade shared by every recording in this process (parsed once)."""
+    return load_face_cascade()
+
+
+def preprocess(frame):
+    """Grayscale + histogram equalization, as used before every detection."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.equalizeHist(gray)
+
+
+def detect_faces(cascade, gray):
+    """Full-frame cascade search. Returns a list of (x, y, w, h)."""
+    return [tuple(face) for face in cascade.detectMultiScale(gray, **DETECT_PARAMS)]
+
+
+class FaceTracker:
+    """
+    Cheaper face detection for consecutive frames.
+
+    The full-frame cascade runs only every `detect_every` frames or when the
+    face is lost. In between, the cascade searches a region of interest
+    around the last face box (grown by `roi_margin` of its size on each side).
+    With `motion_threshold` set, frames whose ROI barely changed since the
+    last searched frame (mean absolute difference below the threshold, in
+    gray levels) reuse the previous box without running the cascade at all,
+    and a still scene without a face is not searched again.
+    """
+
+    def __init__(self, cascade, detect_every=5, roi_margin=0.5, motion_threshold=None):
+        self.cascade = cascade
+        self.detect_every = detect_every
+        self.roi_margin = roi_margin
+        self.motion_threshold = motion_threshold
+        self.box = None
+        self.frames_since_full = 0
+        self.prev_gray = None
+        self.stats = {"frames": 0, "full_detections": 0, "roi_detections": 0, "roi_misses": 0, "motion_skips": 0}
+
+    def reset(self):
+        self.box = None
+        self.prev_gray = None
+        self.frames_since_full = 0
+
+    def _roi(self, shape):
+        x, y, w, h = self.box
+        margin_x, margin_y = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+        x1, y1 = min(shape[1], x + w + margin_x), min(shape[0], y + h + margin_y)
+        return x0, y0, x1, y1
+
+    def _still(self, gray, x0, y0, x1, y1):
+        """True if the region barely changed since the last searched frame."""
+        if self.motion_threshold is None or self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            return False
+        # Compare every other pixel; enough to tell a still scene from motion
+        diff = cv2.absdiff(gray[y0:y1:2, x0:x1:2], self.prev_gray[y0:y1:2, x0:x1:2])
+        return float(np.mean(diff)) < self.motion_threshold
+
+    def _full(self, gray):
+        self.stats["full_detections"] += 1
+        self.frames_since_full = 0
+        faces = detect_faces(self.cascade, gray)
+        # Track the largest face
+        self.box = max(faces, key=lambda f: f[2] * f[3]) if faces else None
+        return faces
+
+    def update(self, gray):
+        """Return the face boxes for the preprocessed grayscale frame `gray`."""
+        self.stats["frames"] += 1
+        self.frames_since_full += 1
+
+        if self.box is None and self._still(gray, 0, 0, gray.shape[1], gray.shape[0]):
+            # No face last time and the scene hasn't changed
+            self.stats["motion_skips"] += 1
+            return []
+
+        if self.box is None or self.frames_since_full >= self.detect_every:
+            faces = self._full(gray)
+            self.prev_gray = gray
+            return faces
+
+        x0, y0, x1, y1 = self._roi(gray.shape)
+        roi = gray[y0:y1, x0:x1]
+
+        if self._still(gray, x0, y0, x1, y1):
+            self.stats["motion_skips"] += 1
+            return [self.box]
+        self.prev_gray = gray
+
+        faces = detect_faces(self.cascade, roi)
+        if not faces:
+            # Lost the face near its last position: fall back to a full search
+            self.stats["roi_misses"] += 1
+            return self._full(gray)
+
+        self.stats["roi_detections"] += 1
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        self.box = (x + x0, y + y0, w, h)
+        return [self.box]
@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from utils.face_tracking import FaceTracker, load_face_cascade
+
+# BGR -> luma weights (ITU-R BT.601), applied to whole batches at once
+LUMA_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+# Below this many frames the analysis runs in-process; pool startup would dominate
+MIN_FRAMES_FOR_POOL = 64
+
+_face_cascade = None
+_smile_cascade = None
+
+
+def _load_cascades():
+    global _face_cascade, _smile_cascade
+    if _face_cascade is None:
+        _face_cascade = load_face_cascade()
+        smile = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_smile.xml")
+        _smile_cascade = None if smile.empty() else smile
+
+
+def _batch_frames(spec):
+    """Resolve a batch spec: either an array or a slice of a memory-mapped FrameStore spill file."""
+    if isinstance(spec, np.ndarray):
+        return spec
+    path, shape, start, stop = spec
+    return np.memmap(path, dtype=np.uint8, mode="r", shape=shape)[start:stop]
+
+
+def analyze_batch(spec):
+    """
+    Per-frame measurements for one (N, H, W, 3) BGR batch:
+    face presence, face center/size (normalized to the frame), brightness,
+    contrast and whether a smile was detected inside the face.
+    """
+    _load_cascades()
+    frames = _batch_frames(spec)
+    count, height, width = frames.shape[:3]
+
+    # Vectorized over the whole batch
+    gray = (frames.astype(np.float32) @ LUMA_WEIGHTS)
+    brightness = gray.mean(axis=(1, 2)) / 255
+    contrast = gray.std(axis=(1, 2)) / 255
+    gray = gray.astype(np.uint8)
+
+    presence = np.zeros(count, dtype=bool)
+    centers = np.full((count, 2), np.nan, dtype=np.float32)
+    sizes = np.zeros(count, dtype=np.float32)
+    smiles = np.zeros(count, dtype=bool)
+
+    if _face_cascade is not None:
+        tracker = FaceTracker(_face_cascade, detect_every=5)
+        for i in range(count):
+            equalized = cv2.equalizeHist(gray[i])
+            faces = tracker.update(equalized)
+            if not faces:
+                continue
+            x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+            presence[i] = True
+            centers[i] = ((x + w / 2) / width, (y + h / 2) / height)
+            sizes[i] = (w * h) / (width * height)
+            if _smile_cascade is not None:
+                # Smiles are searched in the lower half of the face only
+                mouth = equalized[y + h // 2:y + h, x:x + w]
+                found = _smile_cascade.detectMultiScale(mouth, scaleFactor=1.7, minNeighbors=20)
+                smiles[i] = len(found) > 0
+
+    return {
+        "presence": presence,
+        "centers": centers,
+        "sizes": sizes,
+        "brightness": brightness,
+        "contrast": contrast,
+        "smiles": smiles,
+    }
+
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Process pool reused across recordings (workers keep their cascades loaded)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a multi-threaded Streamlit server is unsafe
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _batch_specs(frames, batch_size):
+    """Split frames (FrameStore, array or list) into batch specs without copying where possible."""
+    if hasattr(frames, "chunk_ranges"):
+        if frames.spill_path and frames.buffer is not None:
+            # Workers map the spill file themselves instead of receiving pickled frames
+            frames.buffer.flush()
+            return [
+                (frames.spill_path, frames.buffer.shape, first, min(first + batch_size, stop))
+                for start, stop in frames.chunk_ranges()
+                for first in range(start, stop, batch_size)
+            ]
+        chunks = frames.chunks()
+    elif isinstance(frames, np.ndarray):
+        chunks = [frames]
+    else:
+        chunks = [np.stack(frames)] if len(frames) else []
+
+    return [chunk[start:start + batch_size] for chunk in chunks for start in range(0, len(chunk), batch_size)]
+
+
+def summarize(measurements):
+    """Combine per-frame measurements into session-level metrics and an emotion dict."""
+    presence = measurements["presence"]
+    total = len(presence)
+    face_frames = int(presence.sum())
+    if not total:
+        return {"frames": 0, "face_frames": 0, "emotions": {}}
+
+    metrics = {
+        "frames": total,
+        "face_frames": face_frames,
+        "face_presence": round(face_frames / total, 3),
+        "brightness": round(float(measurements["brightness"].mean()), 3),
+        "contrast": round(float(measurements["contrast"].mean()), 3),
+        "emotions": {},
+    }
+    if not face_frames:
+        return metrics
+
+    centers = measurements["centers"][presence]
+    # Mean frame-to-frame displacement of the face center, in frame widths/heights
+    motion = np.linalg.norm(np.diff(centers, axis=0), axis=1).mean() if face_frames > 1 else 0.0
+    # Mean distance of the face center from the middle of the frame (0 = centered)
+    offset = np.linalg.norm(centers - 0.5, axis=1).mean()
+    smile_ratio = float(measurements["smiles"][presence].mean())
+
+    metrics.update({
+        "head_motion": round(float(motion), 4),
+        "stability": round(float(max(0.0, 1 - motion * 10)), 3),
+        "framing_offset": round(float(offset), 3),
+        "face_size": round(float(measurements["sizes"][presence].mean()), 3),
+        "smile_ratio": round(smile_ratio, 3),
+        # Percentages in the shape generate_score/provide_feedback expect
+        "emotions": {
+            "happy": round(smile_ratio * 100, 2),
+            "neutral": round((1 - smile_ratio) * 100, 2),
+        },
+    })
+    return metrics
+
+
+def analyze_frames(frames, batch_size=32, workers=None):
+    """
+    Analyze a recording (FrameStore, (N, H, W, 3) array or list of BGR frames).
+    Batches are spread over a process pool when there are enough frames.
+    """
+    specs = _batch_specs(frames, batch_size)
+    if not specs:
+        return summarize({"presence": np.zeros(0, dtype=bool)})
+
+    frame_count = sum(len(spec) if isinstance(spec, np.ndarray) else spec[3] - spec[2] for spec in specs)
+    workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+    if workers > 1 and frame_count >= MIN_FRAMES_FOR_POOL:
+        results = list(_get_pool(workers).map(analyze_batch, specs))
+    else:
+        results = [analyze_batch(spec) for spec in specs]
+
+    measurements = {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+    return summarize(measurements)
@@ -0,0 +1,133 @@
+import os
+
+import cv2
+import numpy as np
+
+
+class FrameStore:
+    """
+    Bounded store for recorded video frames.
+
+    Frames are copied into a single preallocated (capacity, H, W, 3) uint8
+    ring buffer, allocated on the first frame, so memory never grows past
+    `capacity` frames regardless of recording length or camera resolution.
+    Only every `keep_every`-th frame is kept, optionally downscaled by
+    `scale`; with `spill_path` the buffer is a memory-mapped file instead of
+    RAM. Reads return views into the buffer, not copies.
+    """
+
+    def __init__(self, capacity=450, keep_every=1, scale=1.0, spill_path=None):
+        if capacity < 1 or keep_every < 1:
+            raise ValueError("capacity and keep_every must be at least 1")
+        self.capacity = capacity
+        self.keep_every = keep_every
+        self.scale = scale
+        self.spill_path = spill_path
+        self.buffer = None
+        self.frames_seen = 0
+        self.frames_stored = 0
+        self._next = 0
+        self._count = 0
+
+    def _allocate(self, shape):
+        shape = (self.capacity,) + shape
+        if self.spill_path:
+            self.buffer = np.memmap(self.spill_path, dtype=np.uint8, mode="w+", shape=shape)
+        else:
+            self.buffer = np.empty(shape, dtype=np.uint8)
+
+    def add(self, frame):
+        """Store `frame` if it falls on the sampling stride. Returns True if stored."""
+        self.frames_seen += 1
+        if (self.frames_seen - 1) % self.keep_every:
+            return False
+
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if self.buffer is None:
+            self._allocate(frame.shape)
+        elif frame.shape != self.buffer.shape[1:]:
+            # Camera changed resolution mid-recording; fit it to the buffer
+            height, width = self.buffer.shape[1:3]
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        self.buffer[self._next] = frame
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.frames_stored += 1
+        return True
+
+    def __len__(self):
+        return self._count
+
+    def _start(self):
+        # Index of the oldest frame
+        return self._next if self._count == self.capacity else 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame index out of range")
+        return self.buffer[(self._start() + index) % self.capacity]
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def chunk_ranges(self):
+        """Buffer index ranges [(start, stop), ...] holding the stored frames in order."""
+        if not self._count:
+            return []
+        start = self._start()
+        if start == 0:
+            return [(0, self._count)]
+        return [(start, self.capacity), (0, start)]
+
+    def chunks(self):
+        """
+        Return the stored frames in order as at most two contiguous
+        (N, H, W, 3) views (two once the ring buffer has wrapped).
+        """
+        return [self.buffer[start:stop] for start, stop in self.chunk_ranges()]
+
+    def as_array(self):
+        """All stored frames as one array; a view unless the buffer has wrapped."""
+        chunks = self.chunks()
+        if not chunks:
+            return np.empty((0, 0, 0, 3), dtype=np.uint8)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the frame buffer (its peak size; it never grows)."""
+        return 0 if self.buffer is None else self.buffer.nbytes
+
+    def stats(self):
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_stored": self.frames_stored,
+            "frames_kept": self._count,
+            "frames_overwritten": self.frames_stored - self._count,
+            "frame_shape": None if self.buffer is None else self.buffer.shape[1:],
+            "buffer_mb": round(self.nbytes / (1024 * 1024), 2),
+            "spilled": bool(self.spill_path),
+        }
+
+    def close(self, remove=True):
+        """
+        Release the frame buffer, flushing and optionally deleting the spill
+        file. Views must not be used afterwards.
+        """
+        if isinstance(self.buffer, np.memmap):
+            self.buffer.flush()
+        self.buffer = None
+        self._count = self._next = 0
+        if self.spill_path and remove and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,121 @@
+"""
+Analysis of a recorded mock interview answer, without the Streamlit UI:
+facial analysis, response analysis, relevance, scoring, the Cohere
+assessment and saving progress. `interview_job` runs these stages as a
+background job (utils/jobs.py, registered with `register()`) so the page stays responsive and survives
+reruns while they run.
+"""
+import re
+
+from utils import llm, llm_scheduler, tracing
+from utils.analysis import analyze_doc, generate_score, get_nlp
+from utils.data_handling import save_progress
+from utils.feedback import provide_feedback
+from utils.jobs import job_handler
+from utils.lazy import lazy_import
+from utils.question_bank import get_question_bank
+from utils.relevance import get_scorer, local_quality
+
+video_audio = lazy_import("utils.video_audio")  # cv2 and the face cascade
+
+STAGES = ["facial_analysis", "response_analysis", "relevance", "scoring", "llm_assessment", "save_progress"]
+
+
+def reference_answers(question):
+    """Reference answers for `question` from the question bank (none without a bank file)."""
+    try:
+        return get_question_bank().references_for(question)
+    except FileNotFoundError:
+        return []
+
+
+def parse_cohere_quality(cohere_analysis):
+    """Extract the score from a Cohere evaluation."""
+    score_match = re.search(r'Score:\s*(\d+)', cohere_analysis)
+    score = int(score_match.group(1)) if score_match else 0
+
+    return {
+        "score": score,
+        "detailed_feedback": cohere_analysis
+    }
+
+
+def evaluate_answer(question, response, local_assessment=None):
+    """
+    Run quality scoring and improved-answer generation concurrently.
+    With a confident `local_assessment`, the quality request is skipped and
+    that assessment is returned in its place.
+    Returns (quality dict, improved answer text); errors are reported in
+    them ("error" key, message text) rather than raised.
+    """
+    if not llm.get_cohere_client():
+        return local_assessment or {"error": "Cohere client not initialized"}, "Unable to generate improved answer."
+
+    scheduler = llm_scheduler.get_scheduler()
+    quality_future = None
+    if local_assessment is None:
+        quality_future = scheduler.submit(llm.EVALUATION_PROMPT, question, response, temperature=0.3)
+    improved_future = scheduler.submit(llm.IMPROVEMENT_PROMPT, question, response, temperature=0.7)
+
+    try:
+        cohere_quality = parse_cohere_quality(quality_future.result()) if quality_future else local_assessment
+    except Exception as e:
+        cohere_quality = {"error": str(e)}
+
+    try:
+        improved_answer = improved_future.result()
+    except Exception as e:
+        improved_answer = f"Error generating improved answer: {e}"
+
+    return cohere_quality, improved_answer
+
+
+def interview_job(topic, question, transcription, user=None, frames=None, use_llm=True, save=True):
+    """
+    Analyze one recorded answer stage by stage, yielding (stage, results)
+    after each one. `frames` are the recorded video frames (in memory only).
+    """
+    with tracing.span("interview_analysis", topic=topic):
+        with tracing.span("facial_analysis", frames=0 if frames is None else len(frames)):
+            try:
+                emotion_data = video_audio.analyze_facial_expressions(frames)
+            finally:
+                # The frames are only needed here; release the buffer and its spill file
+                if hasattr(frames, "close"):
+                    frames.close()
+        yield "facial_analysis", {"emotion_data": emotion_data}
+
+        with tracing.span("response_analysis", characters=len(transcription)):
+            doc = get_nlp()(transcription)
+            sentiment, key_phrases, quality = analyze_doc(doc)
+        yield "response_analysis", {"sentiment": sentiment, "key_phrases": key_phrases, "quality": quality}
+
+        with tracing.span("relevance"):
+            scorer = get_scorer()
+            relevance = scorer.score(question, doc, reference_answers(question))
+        yield "relevance", {"relevance": relevance}
+
+        with tracing.span("scoring"):
+            score = generate_score(sentiment, emotion_data, transcription, relevance)
+            feedback = provide_feedback(sentiment, emotion_data, quality)
+        yield "scoring", {"score": score, "feedback": feedback}
+
+        # Cohere quality check (skipped when the local check is confident) and improved answer
+        with tracing.span("llm_assessment"):
+            if use_llm:
+                local_assessment = local_quality(relevance) if scorer.should_skip_llm(relevance) else None
+                cohere_quality, improved_answer = evaluate_answer(question, transcription, local_assessment)
+            else:
+                cohere_quality, improved_answer = local_quality(relevance), None
+        yield "llm_assessment", {"cohere_quality": cohere_quality, "improved_answer": improved_answer}
+
+        if save:
+            with tracing.span("save_progress"):
+                save_progress(topic, question, score, feedback, user=user)
+        yield "save_progress", {"saved": save}
+    tracing.tracer.write_prometheus()
+
+
+def register():
+    """Register `interview_job` as the handler of "interview" jobs (repeat calls are harmless)."""
+    job_handler("interview", STAGES)(interview_job)
@@ -0,0 +1,304 @@
+"""
+Background jobs with a persistent job table.
+
+A job handler is a generator registered with @job_handler: it runs one stage
+at a time and yields (stage name, stage result) after each one. JobExecutor
+runs handlers on a thread pool and records every finished stage in an
+SQLite table (`jobs.db`), so a Streamlit rerun, another tab or another
+process can poll a job by id and render the results of the stages that have
+finished so far. Jobs left running by a process that has exited are marked
+interrupted.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+FINISHED = (DONE, FAILED, INTERRUPTED)
+
+# kind -> (handler, stage names), filled by @job_handler
+HANDLERS = {}
+
+# Identifies this process in the job table (pids can be reused after a restart)
+OWNER = uuid.uuid4().hex
+
+
+def job_handler(kind, stages):
+    """
+    Register a generator function as the handler of `kind` jobs. It is called
+    with the job's params (and in-memory inputs) as keyword arguments and
+    yields (stage, result dict) for each of `stages` as it finishes them.
+    """
+    def decorator(handler):
+        HANDLERS[kind] = (handler, list(stages))
+        return handler
+    return decorator
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _json_default(value):
+    # NumPy scalars and the like
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return _windows_pid_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _windows_pid_alive(pid):
+    # os.kill(pid, 0) would send CTRL_C_EVENT on Windows; ask for the exit code instead
+    import ctypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle:
+        # Access denied means the process exists but belongs to someone else
+        return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED
+    try:
+        exit_code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == 259  # STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _executor_alive(owner):
+    """True if this process still has worker threads of the executor of `owner`."""
+    prefix = _thread_prefix(owner) + "_"
+    return any(thread.name.startswith(prefix) for thread in threading.enumerate())
+
+
+def _thread_prefix(owner):
+    return f"job-{owner}"
+
+
+class JobStore:
+    """SQLite table of jobs: status, stage progress, params and stage results."""
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    user TEXT,
+                    status TEXT NOT NULL,
+                    stages TEXT NOT NULL,
+                    completed TEXT NOT NULL DEFAULT '[]',
+                    params TEXT NOT NULL,
+                    result TEXT NOT NULL DEFAULT '{}',
+                    error TEXT,
+                    pid INTEGER,
+                    owner TEXT,
+                    created TEXT NOT NULL,
+                    updated TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs (user, created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+
+    @property
+    def conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def create(self, kind, params, stages, user=None):
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user, status, stages, params, pid, owner, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, user, QUEUED, json.dumps(stages),
+                 json.dumps(params, default=_json_default), os.getpid(), OWNER, now, now)
+            )
+        return job_id
+
+    def set_status(self, job_id, status, error=None):
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(?, error), updated = ? WHERE id = ?",
+                (status, error, _now(), job_id)
+            )
+
+    def stage_done(self, job_id, stage, result):
+        """Record a finished stage and merge its result into the job's result."""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT completed, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            completed = json.loads(row["completed"]) + [stage]
+            merged = dict(json.loads(row["result"]), **(result or {}))
+            conn.execute(
+                "UPDATE jobs SET completed = ?, result = ?, updated = ? WHERE id = ?",
+                (json.dumps(completed), json.dumps(merged, default=_json_default), _now(), job_id)
+            )
+
+    def get(self, job_id):
+        """The job as a dict (None if unknown), with `current_stage` and `progress` (0..1) added."""
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def recent(self, user=None, limit=20):
+        """Most recent jobs first, of `user` (or of every user when None)."""
+        if user is None:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE user = ? ORDER BY created DESC LIMIT ?", (user, limit)
+            )
+        return [self._job(row) for row in rows.fetchall()]
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        for key in ("stages", "completed", "params", "result"):
+            job[key] = json.loads(job[key])
+        pending = [stage for stage in job["stages"] if stage not in job["completed"]]
+        job["current_stage"] = pending[0] if pending and job["status"] == RUNNING else None
+        job["progress"] = len(job["completed"]) / len(job["stages"]) if job["stages"] else 1.0
+        return job
+
+    def mark_interrupted(self):
+        """
+        Mark queued/running jobs whose process, or (in this process) whose
+        executor, no longer exists as interrupted. Returns how many.
+        """
+        rows = self.conn.execute(
+            "SELECT id, pid, owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+        ).fetchall()
+        orphans = [
+            row["id"] for row in rows
+            if row["owner"] != OWNER and not (
+                # Same pid: a reloaded module (new OWNER) whose old executor may still be
+                # running the job, or an earlier process that had this pid
+                _executor_alive(row["owner"]) if row["pid"] == os.getpid() else _pid_alive(row["pid"])
+            )
+        ]
+        for job_id in orphans:
+            self.set_status(job_id, INTERRUPTED, "The process running this job exited.")
+        return len(orphans)
+
+    def prune(self, max_age_days=7):
+        """Delete finished jobs older than `max_age_days`."""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+        with self.transaction() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated < ?", FINISHED + (cutoff,)
+            ).rowcount
+
+
+class JobExecutor:
+    """
+    Runs registered job handlers on a thread pool. Threads (not processes)
+    share the loaded models and can take in-memory inputs such as recorded
+    frames, which are passed to the handler but not stored in the job table.
+    """
+
+    def __init__(self, store=None, max_workers=2):
+        self.store = store or JobStore()
+        self.store.mark_interrupted()
+        self.store.prune()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=_thread_prefix(OWNER))
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params, user=None, **inputs):
+        """
+        Queue a `kind` job and return its id. `params` (JSON-serializable) are
+        stored with the job; `inputs` are only passed to the handler.
+        """
+        handler, stages = HANDLERS[kind]
+        job_id = self.store.create(kind, params, stages, user)
+        future = self._pool.submit(self._run, job_id, handler, dict(params, **inputs))
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id, handler, kwargs):
+        self.store.set_status(job_id, RUNNING)
+        try:
+            for stage, result in handler(**kwargs):
+                self.store.stage_done(job_id, stage, result)
+        except Exception as e:
+            self.store.set_status(job_id, FAILED, str(e) or type(e).__name__)
+        else:
+            self.store.set_status(job_id, DONE)
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job submitted by this executor has finished; returns the job."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.store.get(job_id)
+
+    def active(self):
+        """Number of jobs of this process that are queued or running."""
+        with self._lock:
+            return len(self._futures)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide executor shared by all sessions (and reruns)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor(max_workers=int(os.getenv("JOB_WORKERS", "2")))
+        return _executor
@@ -0,0 +1,126 @@
+import importlib
+import threading
+import time
+
+# Named resources created with @lazy_resource, in registration order
+RESOURCES = {}
+
+_warm_lock = threading.Lock()
+_warm_thread = None
+# Items whose warm-up failed; not retried in the background (e.g. on every rerun)
+_warm_failed = set()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access:
+
+        cv2 = LazyModule("cv2")   # nothing imported yet
+        cv2.flip(...)             # imports cv2 now
+    """
+
+    def __init__(self, name):
+        self.__dict__.update(_name=name, _module=None, _lock=threading.Lock(), load_seconds=None)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    self.load_seconds = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+class LazyResource:
+    """
+    Process-wide value (model, client, ...) built by `loader` on the first
+    call and shared by every later call and thread.
+    """
+
+    def __init__(self, loader, name=None):
+        self.loader = loader
+        self.name = name or loader.__name__
+        self.value = None
+        self.load_seconds = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.__doc__ = loader.__doc__
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    start = time.perf_counter()
+                    self.value = self.loader()
+                    self.load_seconds = time.perf_counter() - start
+                    self._loaded = True
+        return self.value
+
+    __call__ = load
+
+    def reset(self):
+        with self._lock:
+            self.value = None
+            self._loaded = False
+
+
+def lazy_resource(name=None):
+    """Decorator turning a zero-argument loader into a registered LazyResource."""
+    def decorator(loader):
+        resource = LazyResource(loader, name)
+        RESOURCES[resource.name] = resource
+        return resource
+    return decorator
+
+
+def warm_up(*items):
+    """
+    Load `items` (LazyModule/LazyResource objects; default: every registered
+    resource) on a daemon thread, so they are ready before they are needed.
+    Returns the thread, or None if everything is already loaded or a
+    warm-up is still running.
+    """
+    global _warm_thread
+    items = [item for item in (items or RESOURCES.values()) if not item.loaded and id(item) not in _warm_failed]
+    if not items:
+        return None
+    with _warm_lock:
+        if _warm_thread is not None and _warm_thread.is_alive():
+            return None
+
+        def run():
+            for item in items:
+                try:
+                    item.load()
+                except Exception:
+                    # The foreground call will load it again and report the error
+                    _warm_failed.add(id(item))
+
+        _warm_thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        _warm_thread.start()
+        return _warm_thread
+
+
+def status():
+    """{name: load seconds or None} for the registered resources."""
+    return {name: resource.load_seconds for name, resource in RESOURCES.items()}
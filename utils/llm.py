@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.lazy import lazy_import
+
+# Imported on first client creation; the SDK is slow to import
+cohere = lazy_import("cohere")
+
+DEFAULT_MODEL = "command-xlarge-nightly"
+
+EVALUATION_PROMPT = """Evaluate this interview answer:
+
+Question: {question}
+Answer: {answer}
+
+Assess:
+1. Relevance to question
+2. Clarity
+3. Depth
+4. Example usage
+5. Professional communication
+
+Provide score (0-100) and brief feedback."""
+
+IMPROVEMENT_PROMPT = """Improve this interview answer:
+
+Question: {question}
+Original Answer: {answer}
+
+Create a more professional version that:
+- Directly addresses the question
+- Uses clear language
+- Provides specific examples
+- Shows professional communication"""
+
+
+class LLMCache:
+    """
+    Two-level cache for LLM completions: an in-memory LRU in front of a
+    directory of JSON files. Entries expire after `ttl` seconds; the memory
+    level is capped at `max_entries` and the disk level at `max_disk_bytes`
+    (oldest files are evicted first).
+    """
+
+    def __init__(self, cache_dir=".llm_cache", max_entries=256, ttl=7 * 24 * 3600,
+                 max_disk_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(template, model, temperature, question, answer):
+        payload = json.dumps([template, model, temperature, question, answer])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if not self._expired(entry["created"]):
+                    with self._lock:
+                        self._remember(key, entry["created"], entry["value"])
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return entry["value"]
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def set(self, key, value):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = json.dumps({"created": created, "value": value})
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk_bytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json"))
+
+    def _evict_disk(self):
+        """Delete expired and then oldest files until the cache is below 90% of its budget."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_disk_bytes * 0.9 and not self._expired(entry.stat().st_mtime):
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir and os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".json"):
+                        os.remove(entry.path)
+            self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+class _FakeGeneration:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.generations = [_FakeGeneration(text)]
+
+
+class FakeCohereClient:
+    """
+    Local stand-in for `cohere.Client` with the same `generate` signature.
+    Returns a deterministic completion and counts calls; enable in the app
+    with COHERE_FAKE=1.
+    """
+
+    def __init__(self, text=None, latency=0.0):
+        self.text = text
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model=None, max_tokens=None, temperature=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        text = self.text
+        if text is None:
+            score = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16) % 101
+            text = f"Score: {score}\nFeedback: Generated locally by FakeCohereClient."
+        return _FakeResponse(text)
+
+
+_client = None
+_client_lock = threading.Lock()
+cache = LLMCache(
+    cache_dir=os.getenv("LLM_CACHE_DIR", ".llm_cache"),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256")),
+    ttl=int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+)
+
+
+def get_cohere_client():
+    """
+    Return the process-wide Cohere client (created once and reused, so its
+    HTTP connection pool is shared), or None if no API key is configured.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if os.getenv("COHERE_FAKE"):
+                _client = FakeCohereClient()
+            else:
+                api_key = os.getenv("COHERE_API_KEY")
+                if not api_key:
+                    return None
+                _client = cohere.Client(api_key)
+        return _client
+
+
+def set_cohere_client(client):
+    """Replace the shared client (e.g. with a FakeCohereClient)."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def complete(template, question, answer, model=DEFAULT_MODEL, temperature=0.3, max_tokens=300, client=None):
+    """Make one uncached completion request and return the text."""
+    client = client or get_cohere_client()
+    if client is None:
+        raise RuntimeError("Cohere client not initialized")
+
+    response = client.generate(
+        prompt=template.format(question=question, answer=answer),
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature
+    )
+    return response.generations[0].text.strip()
+
+
+def generate(template, question, answer, model=DEFAULT_MODEL, temperature=0.3, max_tokens=300, client=None):
+    """
+    Fill `template` with the question and answer and return the completion text,
+    served from the cache when the same (template, model, temperature, question,
+    answer) was generated before.
+    """
+    key = LLMCache.make_key(template, model, temperature, question, answer)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    text = complete(template, question, answer, model, temperature, max_tokens, client)
+    cache.set(key, text)
+    return text
@@ -0,0 +1,160 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils import llm
+
+
+def is_rate_limited(exc):
+    """True if `exc` is an HTTP 429 from the Cohere SDK or the stub client."""
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    return status == 429 or type(exc).__name__ == "TooManyRequestsError"
+
+
+class TokenBucket:
+    """
+    Blocking rate limiter for requests and (optionally) tokens per minute.
+    Both budgets refill continuously.
+    """
+
+    def __init__(self, requests_per_minute=60, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens=0):
+        """Block until one request (and `tokens` tokens) fit in the budget."""
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                self._refill()
+                enough_tokens = not self.tokens_per_minute or self._tokens >= tokens
+                if self._requests >= 1 and enough_tokens:
+                    self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+                wait = (1 - self._requests) * 60 / self.requests_per_minute if self._requests < 1 else 0
+                if not enough_tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+            time.sleep(max(wait, 0.01))
+
+
+class LLMScheduler:
+    """
+    Runs LLM completions on a thread pool so several requests for one answer
+    proceed concurrently.
+
+    - at most `max_in_flight` requests run at once
+    - requests wait for the TokenBucket budget before being sent
+    - 429 responses are retried with exponential backoff and jitter
+    - identical requests already in flight share one Future
+    - cached completions are returned without touching the budget
+    """
+
+    def __init__(self, max_in_flight=4, requests_per_minute=60, tokens_per_minute=None,
+                 max_retries=4, backoff_base=0.5, backoff_max=8.0, client=None):
+        self.bucket = TokenBucket(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "sent": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def submit(self, template, question, answer, model=llm.DEFAULT_MODEL, temperature=0.3, max_tokens=300):
+        """Schedule a completion and return a Future resolving to its text."""
+        key = llm.LLMCache.make_key(template, model, temperature, question, answer)
+        self._count("submitted")
+
+        cached = llm.cache.get(key)
+        if cached is not None:
+            self._count("cache_hits")
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = self._executor.submit(
+                self._run, key, template, question, answer, model, temperature, max_tokens
+            )
+            self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _run(self, key, template, question, answer, model, temperature, max_tokens):
+        # Rough token estimate: ~4 characters per prompt token plus the completion budget
+        tokens = (len(template) + len(question) + len(answer)) // 4 + max_tokens
+        attempt = 0
+        while True:
+            self.bucket.acquire(tokens)
+            self._count("sent")
+            try:
+                text = llm.complete(template, question, answer, model, temperature, max_tokens, self.client)
+                llm.cache.set(key, text)
+                return text
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+                self._count("rate_limited")
+                self._count("retries")
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler shared by all sessions."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "4")),
+                requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+                tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")) or None,
+            )
+        return _scheduler
@@ -0,0 +1,146 @@
+"""
+Local HTTP stand-in for the Cohere generate endpoint, for exercising the LLM
+scheduler without network access. Injects latency and 429 responses:
+
+    python -m utils.llm_stub_server --port 8765 --latency 0.2 --jitter 0.1 --error-rate 0.2 --max-concurrent 4
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubRateLimitError(Exception):
+    """Raised by StubServerClient on HTTP 429."""
+
+    status_code = 429
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """
+    Serves POST /v1/generate. Every request sleeps `latency` (+ up to `jitter`)
+    seconds; a request is answered with 429 at random (`error_rate`) or when
+    more than `max_concurrent` requests are being served.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.2, jitter=0.0, error_rate=0.0, max_concurrent=None):
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.peak_active = 0
+        self.requests = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        with server.lock:
+            server.requests += 1
+            overloaded = server.max_concurrent is not None and server.active >= server.max_concurrent
+            if overloaded or random.random() < server.error_rate:
+                server.rejected += 1
+                reject = True
+            else:
+                reject = False
+                server.active += 1
+                server.peak_active = max(server.peak_active, server.active)
+
+        if reject:
+            self._reply(429, {"message": "too many requests"})
+            return
+
+        try:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+            prompt = payload.get("prompt", "")
+            score = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16) % 101
+            self._reply(200, {"generations": [{"text": f"Score: {score}\nFeedback: stub completion."}]})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class _Generation:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Response:
+    def __init__(self, generations):
+        self.generations = [_Generation(g["text"]) for g in generations]
+
+
+class StubServerClient:
+    """Minimal client with `cohere.Client.generate`'s signature that talks to a StubLLMServer."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def generate(self, prompt, model=None, max_tokens=None, temperature=None, **kwargs):
+        body = json.dumps({
+            "prompt": prompt, "model": model, "max_tokens": max_tokens, "temperature": temperature
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + "/v1/generate", data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return _Response(json.loads(response.read())["generations"])
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise StubRateLimitError("429 Too Many Requests") from e
+            raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stub of the Cohere generate endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Base latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--max-concurrent", type=int, help="Reply 429 above this many concurrent requests")
+    args = parser.parse_args(argv)
+
+    server = StubLLMServer((args.host, args.port), args.latency, args.jitter, args.error_rate, args.max_concurrent)
+    print(f"Stub LLM server listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
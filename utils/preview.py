@@ -0,0 +1,114 @@
+import threading
+import time
+
+import cv2
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+class PreviewThrottle:
+    """
+    Rate-limited live preview for a Streamlit placeholder.
+
+    Frames are offered with `submit`; one is sent at most every 1/target_fps
+    seconds, downscaled to `max_width` and JPEG-encoded at `jpeg_quality`
+    (None sends raw RGB arrays). Sending happens on a background thread, and
+    frames offered while the previous one is still being sent are skipped,
+    so a slow connection never stalls the caller.
+    """
+
+    def __init__(self, display, target_fps=5, max_width=320, jpeg_quality=70):
+        self.display = display
+        self.interval = 1.0 / target_fps
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.sent = 0
+        self.skipped_rate = 0
+        self.skipped_busy = 0
+        self.bytes_sent = 0
+        self.latencies = []
+        self.started = None
+        self._last_submit = 0.0
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._send_loop, daemon=True)
+        add_script_run_ctx(self._thread, get_script_run_ctx())
+        self._thread.start()
+
+    def submit(self, frame, captured_at=None):
+        """
+        Offer a BGR frame captured at `captured_at` (time.monotonic()).
+        Returns True if it was queued for sending.
+        """
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        if now - self._last_submit < self.interval:
+            self.skipped_rate += 1
+            return False
+        with self._cond:
+            if self._busy or self._pending is not None:
+                self.skipped_busy += 1
+                return False
+            self._pending = (frame, captured_at or now)
+            self._last_submit = now
+            self._cond.notify()
+        return True
+
+    def _encode(self, frame):
+        height, width = frame.shape[:2]
+        if self.max_width and width > self.max_width:
+            scale = self.max_width / width
+            frame = cv2.resize(frame, (self.max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        if self.jpeg_quality is not None:
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                data = encoded.tobytes()
+                return data, len(data)
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Streamlit compresses arrays itself; count the raw size as an upper bound
+        return frame_rgb, frame_rgb.nbytes
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                frame, captured_at = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                image, size = self._encode(frame)
+                if isinstance(image, bytes):
+                    self.display.image(image)
+                else:
+                    self.display.image(image, channels="RGB")
+                self.sent += 1
+                self.bytes_sent += size
+                self.latencies.append(time.monotonic() - captured_at)
+            finally:
+                with self._cond:
+                    self._busy = False
+
+    def close(self):
+        """Stop the sender after the frame in flight (if any) has been sent."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started if self.started else 0
+        latencies = sorted(self.latencies)
+        return {
+            "sent": self.sent,
+            "skipped_rate": self.skipped_rate,
+            "skipped_busy": self.skipped_busy,
+            "fps": round(self.sent / elapsed, 1) if elapsed else 0.0,
+            "bytes_per_sec": round(self.bytes_sent / elapsed) if elapsed else 0,
+            "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "p95_latency_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else 0.0,
+        }
@@ -0,0 +1,92 @@
+import json
+
+# Number of most recent scores and feedback entries kept per topic/question
+RECENT_WINDOW = 10
+FEEDBACK_WINDOW = 20
+
+
+class RunningStats:
+    """
+    Running aggregate over the scores of one topic or question.
+
+    `feedback_offsets` are backend-specific locations of the most recent
+    feedback texts (row ids for SQLite, byte offsets for the JSONL log), so
+    the texts themselves are only read when a summary is rendered.
+    """
+
+    def __init__(self, count=0, total=0.0, min=None, max=None, recent=None, feedback_offsets=None):
+        self.count = count
+        self.total = total
+        self.min = min
+        self.max = max
+        self.recent = list(recent or [])
+        self.feedback_offsets = list(feedback_offsets or [])
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0
+
+    def update(self, score, offset):
+        score = float(score)
+        self.count += 1
+        self.total += score
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+        self.recent = (self.recent + [score])[-RECENT_WINDOW:]
+        self.feedback_offsets = (self.feedback_offsets + [offset])[-FEEDBACK_WINDOW:]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "recent": self.recent,
+            "feedback_offsets": self.feedback_offsets,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_row(self):
+        """Column values for the SQLite `aggregates` table."""
+        return (self.count, self.total, self.min, self.max,
+                json.dumps(self.recent), json.dumps(self.feedback_offsets))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["count"], row["total"], row["min"], row["max"],
+                   json.loads(row["recent"]), json.loads(row["feedback_offsets"]))
+
+
+class ProgressAggregates:
+    """Per-topic and per-question running stats."""
+
+    def __init__(self, topics=None, questions=None):
+        self.topics = topics or {}
+        # {topic: {question: RunningStats}}
+        self.questions = questions or {}
+
+    def update(self, topic, question, score, offset):
+        self.topics.setdefault(topic, RunningStats()).update(score, offset)
+        self.questions.setdefault(topic, {}).setdefault(question, RunningStats()).update(score, offset)
+
+    def to_dict(self):
+        return {
+            "topics": {topic: stats.to_dict() for topic, stats in self.topics.items()},
+            "questions": {
+                topic: {question: stats.to_dict() for question, stats in questions.items()}
+                for topic, questions in self.questions.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {topic: RunningStats.from_dict(stats) for topic, stats in data.get("topics", {}).items()},
+            {
+                topic: {question: RunningStats.from_dict(stats) for question, stats in questions.items()}
+                for topic, questions in data.get("questions", {}).items()
+            },
+        )
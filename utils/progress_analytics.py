@@ -0,0 +1,378 @@
+"""
+Time-series analytics over the progress history: per-topic and per-question
+rolling means, percentiles, improvement slopes and streaks.
+
+All statistics are kept as mergeable state in NumPy arrays indexed by group
+(a topic, or a topic/question pair): counts, means and co-moments (merged
+with Chan's parallel update, so slopes and variances stay accurate over
+millions of attempts), a 0-100 score histogram for percentiles, streak
+counters, the last few scores and per-day totals. A batch of new attempts is
+folded in with a few bincounts and per-group NumPy operations, so keeping the
+analytics current costs time proportional to the new attempts only.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Attempts in the rolling mean and recent slope
+ROLLING_WINDOW = 5
+# Score that counts towards a pass streak
+PASS_SCORE = 70
+PERCENTILES = (25, 50, 75, 90)
+# Histogram bins: scores 0..100 rounded to whole points
+SCORE_BINS = 101
+# Records read from the store per batch when syncing
+SYNC_BATCH = 100_000
+# Days in the rolling mean of the daily trend charts
+TREND_DAYS = 7
+# Stores whose analytics are kept in memory; older ones are rebuilt on their next use
+MAX_CACHED_ANALYTICS = 256
+
+_STATE = ["count", "mean_x", "mean_y", "m2_x", "m2_y", "c_xy",
+          "pass_streak", "best_pass_streak", "day_streak", "best_day_streak", "last_day"]
+
+
+def _runs(flags, carry, best):
+    """
+    (current, longest) run of True in `flags`, continuing a run of `carry`
+    from earlier data whose longest run was `best`.
+    """
+    breaks = np.flatnonzero(~flags)
+    if not len(breaks):
+        current = carry + len(flags)
+        return current, max(best, current)
+    lengths = np.diff(breaks) - 1
+    current = len(flags) - 1 - breaks[-1]
+    longest = max(best, carry + breaks[0], current, int(lengths.max()) if len(lengths) else 0)
+    return int(current), int(longest)
+
+
+def day_numbers(timestamps):
+    """Days since 1970-01-01 of ISO timestamp strings; -1 where missing or unparseable."""
+    # Stored timestamps start with "YYYY-MM-DD": read the date digits of all of them at once
+    try:
+        prefixes = np.array(timestamps, dtype="S10")
+    except (TypeError, UnicodeEncodeError):
+        prefixes = np.array([str(value or "").encode("ascii", "replace")[:10] for value in timestamps], dtype="S10")
+    chars = prefixes.view(np.uint8).reshape(-1, 10)
+    digits = chars.astype(np.int32) - ord("0")
+    positions = [0, 1, 2, 3, 5, 6, 8, 9]
+    valid = ((digits[:, positions] >= 0) & (digits[:, positions] <= 9)).all(axis=1)
+    valid &= (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+    days = months.astype("datetime64[D]").astype(np.int64) + day - 1
+    return np.where(valid, days, -1)
+
+
+def _columns(records):
+    """(topics, questions, scores, timestamps) of a list of progress records."""
+    return ([r["topic"] for r in records], [r["question"] for r in records],
+            [r["score"] for r in records], [r.get("timestamp") for r in records])
+
+
+class ProgressAnalytics:
+    """
+    Incremental analytics for one progress store. Feed attempts in insertion
+    order with `update` (or `sync` with the store); read results with
+    `summary` and `daily_trend`.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW, pass_score=PASS_SCORE):
+        self.window = window
+        self.pass_score = pass_score
+        self.keys = []      # group row -> (topic, question or None)
+        self.index = {}     # (topic, question or None) -> group row
+        self.recent = {}    # group row -> last `window` scores
+        self.daily = {}     # group row -> {day number: [attempts, total score]}
+        self.attempts = 0
+        self.cursor = None  # store read position after the last sync
+        self.state = None
+        self._lock = threading.Lock()
+        self._allocate(64)
+
+    def _allocate(self, size):
+        old = self.state
+        state = {name: np.zeros(size) for name in _STATE}
+        state["last_day"][:] = -1
+        hist = np.zeros((size, SCORE_BINS), dtype=np.int64)
+        if old is not None:
+            used = len(self.keys)
+            for name in _STATE:
+                state[name][:used] = old[name][:used]
+            hist[:used] = self.hist[:used]
+        self.state, self.hist = state, hist
+
+    def _rows(self, keys):
+        """Group rows of `keys` (a list of hashable keys), registering new groups."""
+        rows = []
+        for key in keys:
+            row = self.index.get(key)
+            if row is None:
+                row = self.index[key] = len(self.keys)
+                self.keys.append(key)
+            rows.append(row)
+        if len(self.keys) > len(self.hist):
+            self._allocate(2 * len(self.keys))
+        return np.array(rows, dtype=np.int64)
+
+    def update(self, topics, questions, scores, timestamps):
+        """Fold a batch of attempts (parallel sequences, oldest first) into the statistics."""
+        if not len(scores):
+            return
+        with self._lock:
+            self._update(topics, questions, scores, timestamps)
+
+    def update_records(self, records):
+        """`update` with a list of progress records (dicts)."""
+        self.update(*_columns(records))
+
+    def _update(self, topics, questions, scores, timestamps):
+        scores = np.asarray(scores, dtype=np.float64)
+        days = day_numbers(timestamps)
+
+        # Every attempt counts for its topic and for its question
+        topic_codes, topic_names = pd.factorize(pd.Series(topics, dtype=object))
+        question_codes, question_names = pd.factorize(pd.Series(questions, dtype=object))
+        pair_codes, pairs = pd.factorize(topic_codes.astype(np.int64) * len(question_names) + question_codes)
+        pair_keys = [(topic_names[pair // len(question_names)], question_names[pair % len(question_names)])
+                     for pair in pairs.tolist()]
+        groups = np.concatenate([
+            self._rows([(topic, None) for topic in topic_names])[topic_codes],
+            self._rows(pair_keys)[pair_codes],
+        ])
+        y = np.concatenate([scores, scores])
+        days = np.concatenate([days, days])
+
+        # Attempt number within each group: the group's earlier count + position in the batch
+        order = np.argsort(groups, kind="stable")
+        sorted_groups = groups[order]
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        lengths = np.diff(np.r_[starts, len(order)])
+        touched = sorted_groups[starts]
+        position = np.arange(len(order)) - np.repeat(starts, lengths)
+        x = np.empty(len(order))
+        x[order] = self.state["count"][sorted_groups] + position
+
+        self._merge_moments(groups, x, y, touched)
+        bins = np.clip(np.rint(y), 0, SCORE_BINS - 1).astype(np.int64)
+        self.hist[:len(self.keys)] += np.bincount(
+            groups * SCORE_BINS + bins, minlength=len(self.keys) * SCORE_BINS
+        ).reshape(len(self.keys), SCORE_BINS)
+
+        # Order-dependent state, one group segment at a time
+        y_sorted, days_sorted = y[order], days[order]
+        state = self.state
+        for row, start, length in zip(touched, starts, lengths):
+            segment = y_sorted[start:start + length]
+            state["pass_streak"][row], state["best_pass_streak"][row] = _runs(
+                segment >= self.pass_score, int(state["pass_streak"][row]), int(state["best_pass_streak"][row])
+            )
+            self.recent[row] = np.r_[self.recent.get(row, []), segment][-self.window:]
+            self._update_days(row, segment, days_sorted[start:start + length])
+        self.attempts += len(scores)
+
+    def _merge_moments(self, groups, x, y, touched):
+        """Chan et al.'s pairwise update of counts, means and (co-)moments."""
+        size = len(self.keys)
+        n_b = np.bincount(groups, minlength=size).astype(np.float64)
+        present = n_b > 0
+        safe = np.where(present, n_b, 1)
+        mean_xb = np.bincount(groups, x, size) / safe
+        mean_yb = np.bincount(groups, y, size) / safe
+        dx, dy = x - mean_xb[groups], y - mean_yb[groups]
+        m2_xb = np.bincount(groups, dx * dx, size)
+        m2_yb = np.bincount(groups, dy * dy, size)
+        c_xyb = np.bincount(groups, dx * dy, size)
+
+        s = self.state
+        n_a = s["count"][:size]
+        n = n_a + n_b
+        total = np.where(present, n, 1)
+        delta_x = mean_xb - s["mean_x"][:size]
+        delta_y = mean_yb - s["mean_y"][:size]
+        weight = n_a * n_b / total
+        s["m2_x"][:size] += np.where(present, m2_xb + delta_x * delta_x * weight, 0)
+        s["m2_y"][:size] += np.where(present, m2_yb + delta_y * delta_y * weight, 0)
+        s["c_xy"][:size] += np.where(present, c_xyb + delta_x * delta_y * weight, 0)
+        s["mean_x"][:size] += np.where(present, delta_x * n_b / total, 0)
+        s["mean_y"][:size] += np.where(present, delta_y * n_b / total, 0)
+        s["count"][:size] = n
+
+    def _update_days(self, row, scores, days):
+        known = days >= 0
+        if not known.any():
+            return
+        days, scores = days[known], scores[known]
+        unique, inverse = np.unique(days, return_inverse=True)
+        counts = np.bincount(inverse)
+        totals = np.bincount(inverse, scores)
+        daily = self.daily.setdefault(row, {})
+        for day, count, total in zip(unique.tolist(), counts.tolist(), totals.tolist()):
+            entry = daily.setdefault(day, [0, 0.0])
+            entry[0] += count
+            entry[1] += total
+
+        # Practice streak: consecutive calendar days with at least one attempt
+        state = self.state
+        last = int(state["last_day"][row])
+        new_days = unique[unique > last] if last >= 0 else unique
+        if len(new_days):
+            previous = np.r_[last, new_days[:-1]]
+            consecutive = (new_days - previous) == 1
+            carry = int(state["day_streak"][row])
+            best = int(state["best_day_streak"][row])
+            # Each day that doesn't follow the previous one starts a new streak of 1
+            current, longest = _runs(consecutive, carry, best)
+            if not consecutive.all():
+                current += 1
+                breaks = np.flatnonzero(~consecutive)
+                segments = np.diff(np.r_[breaks, len(consecutive)])
+                longest = max(longest, int(segments.max()))
+            state["day_streak"][row] = current
+            state["best_day_streak"][row] = max(longest, current)
+            state["last_day"][row] = new_days[-1]
+
+    # -- syncing with a store ------------------------------------------------
+
+    def sync(self, store):
+        """
+        Fold in the attempts appended to `store` since the last sync. Starts
+        over if the store no longer matches (e.g. it was reset elsewhere).
+        """
+        with self._lock:
+            self._read(store)
+            if self.attempts != store.total_attempts():
+                self._reset()
+                self._read(store)
+        return self
+
+    def _read(self, store):
+        while True:
+            records, cursor = store.read_since(self.cursor, SYNC_BATCH)
+            if not records:
+                return
+            self._update(*_columns(records))
+            self.cursor = cursor
+
+    def _reset(self):
+        self.keys, self.index, self.recent, self.daily = [], {}, {}, {}
+        self.attempts = 0
+        self.cursor = None
+        self.state = None
+        self._allocate(64)
+
+    # -- results -------------------------------------------------------------
+
+    def summary(self, level="topic", topic=None):
+        """
+        One row per topic (level="topic") or per question (level="question",
+        optionally of one `topic`) with attempts, mean, std, rolling mean of
+        the last `window` attempts, percentiles, improvement slopes (points
+        per attempt, overall and over the rolling window) and streaks.
+        """
+        with self._lock:
+            rows = [
+                row for row, (group_topic, question) in enumerate(self.keys)
+                if (question is None) == (level == "topic") and (topic is None or group_topic == topic)
+            ]
+            rows = np.array(rows, dtype=np.int64)
+            s = {name: values[rows] for name, values in self.state.items()}
+            hist = self.hist[rows]
+            recent = [self.recent.get(row, np.zeros(0)) for row in rows]
+            keys = [self.keys[row] for row in rows]
+
+        count = s["count"]
+        safe = np.where(count > 0, count, 1)
+        cumulative = np.cumsum(hist, axis=1)
+        frame = pd.DataFrame({
+            "topic": [key[0] for key in keys],
+            "question": [key[1] for key in keys],
+            "attempts": count.astype(np.int64),
+            "mean": np.round(s["mean_y"], 2),
+            "std": np.round(np.sqrt(s["m2_y"] / safe), 2),
+            "rolling_mean": [round(float(r.mean()), 2) if len(r) else None for r in recent],
+        })
+        for q in PERCENTILES:
+            # First score bin whose cumulative count reaches q% of the attempts
+            frame[f"p{q}"] = np.argmax(cumulative >= (q / 100) * count[:, None], axis=1)
+        frame["slope"] = np.round(np.where(s["m2_x"] > 0, s["c_xy"] / np.where(s["m2_x"] > 0, s["m2_x"], 1), 0), 4)
+        frame["recent_slope"] = [
+            round(float(np.polyfit(np.arange(len(r)), r, 1)[0]), 2) if len(r) > 1 else 0.0 for r in recent
+        ]
+        frame["pass_streak"] = s["pass_streak"].astype(np.int64)
+        frame["best_pass_streak"] = s["best_pass_streak"].astype(np.int64)
+        frame["day_streak"] = s["day_streak"].astype(np.int64)
+        frame["best_day_streak"] = s["best_day_streak"].astype(np.int64)
+        frame["last_day"] = pd.to_datetime(np.where(s["last_day"] >= 0, s["last_day"], np.nan), unit="D")
+        if level == "topic":
+            frame = frame.drop(columns="question")
+        return frame
+
+    def daily_trend(self, days=TREND_DAYS):
+        """
+        Daily attempts and mean score per topic, with a `days`-day rolling
+        mean (weighted by attempts, over calendar days), as a long DataFrame.
+        """
+        with self._lock:
+            parts = []
+            for row, (topic, question) in enumerate(self.keys):
+                daily = self.daily.get(row)
+                if question is not None or not daily:
+                    continue
+                day_numbers_, values = zip(*sorted(daily.items()))
+                attempts, totals = np.array(values).T
+                parts.append((topic, np.array(day_numbers_), attempts, totals))
+
+        frames = []
+        for topic, day_list, attempts, totals in parts:
+            index = pd.to_datetime(day_list, unit="D")
+            series = pd.DataFrame({"attempts": attempts, "total": totals}, index=index).asfreq("D", fill_value=0)
+            rolling = series.rolling(days, min_periods=1).sum()
+            series = series[series["attempts"] > 0]
+            frames.append(pd.DataFrame({
+                "date": series.index,
+                "topic": topic,
+                "attempts": series["attempts"].astype(np.int64).to_numpy(),
+                "mean": (series["total"] / series["attempts"]).round(2).to_numpy(),
+                "rolling_mean": (rolling["total"] / rolling["attempts"]).loc[series.index].round(2).to_numpy(),
+            }))
+        if not frames:
+            return pd.DataFrame(columns=["date", "topic", "attempts", "mean", "rolling_mean"])
+        return pd.concat(frames, ignore_index=True)
+
+
+_analytics = OrderedDict()
+_analytics_lock = threading.Lock()
+
+
+def _analytics_key(store):
+    return type(store).__name__, getattr(store, "path", id(store))
+
+
+def get_analytics(store):
+    """The analytics of `store`, brought up to date with its new attempts."""
+    key = _analytics_key(store)
+    with _analytics_lock:
+        analytics = _analytics.get(key)
+        if analytics is None:
+            analytics = _analytics[key] = ProgressAnalytics()
+            if len(_analytics) > MAX_CACHED_ANALYTICS:
+                _analytics.popitem(last=False)
+        else:
+            _analytics.move_to_end(key)
+    return analytics.sync(store)
+
+
+def forget_analytics(store):
+    """Drop the cached analytics of `store` (after its history was deleted)."""
+    with _analytics_lock:
+        _analytics.pop(_analytics_key(store), None)
@@ -0,0 +1,277 @@
+"""
+Columnar (Parquet) copies of the progress history.
+
+`write_parquet` streams records into a Parquet file with typed columns
+(timestamps as timestamp[s]) in fixed-size row groups, and `read_page` reads
+one page of such files with the topic/date filters and the column selection
+pushed down to the Parquet reader: row groups whose min/max statistics
+exclude the filter are skipped, per-row-group match counts are cached, and
+only the row groups holding the page are decoded, for the requested columns.
+"""
+import io
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+
+from utils.lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+pc = lazy_import("pyarrow.compute")
+pj = lazy_import("pyarrow.json")
+
+ROW_GROUP_SIZE = 65_536
+# Bytes of a JSON lines log parsed at once when converting it
+JSONL_BLOCK_SIZE = 8 * 2**20
+COLUMNS = ["topic", "question", "score", "feedback", "timestamp"]
+
+
+def schema():
+    return pa.schema([
+        ("topic", pa.string()),
+        ("question", pa.string()),
+        ("score", pa.float64()),
+        ("feedback", pa.string()),
+        ("timestamp", pa.timestamp("s")),
+    ])
+
+
+def parse_timestamp(value):
+    """Stored timestamps are ISO strings ("2024-01-01T10:00:00" or "2024-01-01 10:00:00")."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def format_timestamp(value):
+    """A stored or decoded timestamp as "2024-01-01T10:00:00" (unparseable strings unchanged)."""
+    if isinstance(value, str):
+        value = parse_timestamp(value) or value
+    return value.isoformat(timespec="seconds") if isinstance(value, datetime) else value
+
+
+def date_bounds(start=None, end=None):
+    """(start, end) datetimes for an inclusive date range; end is exclusive (the next midnight)."""
+    def as_datetime(value):
+        return value if isinstance(value, datetime) else datetime.combine(value, datetime.min.time())
+
+    lower = as_datetime(start) if start else None
+    upper = None
+    if end:
+        upper = end if isinstance(end, datetime) else as_datetime(end + timedelta(days=1))
+    return lower, upper
+
+
+def write_parquet(records, path, metadata=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Stream `records` (dicts with COLUMNS) into a Parquet file, one row group
+    at a time. `metadata` (str -> str) is stored in the file footer. Returns
+    the number of rows written.
+    """
+    target = schema()
+    if metadata:
+        target = target.with_metadata(metadata)
+    tmp_path = path + ".tmp"
+    rows = 0
+    records = iter(records)
+    with pq.ParquetWriter(tmp_path, target, compression="zstd") as writer:
+        while True:
+            chunk = list(islice(records, row_group_size))
+            if not chunk:
+                break
+            columns = {name: [record.get(name) for record in chunk] for name in COLUMNS}
+            columns["score"] = [None if score is None else float(score) for score in columns["score"]]
+            columns["timestamp"] = [parse_timestamp(value) for value in columns["timestamp"]]
+            writer.write_table(pa.table(columns, schema=target))
+            rows += len(chunk)
+    os.replace(tmp_path, path)
+    return rows
+
+
+def _timestamps(column):
+    try:
+        return pc.cast(column, pa.timestamp("s"))
+    except pa.ArrowInvalid:
+        # Not all ISO strings; parse them one by one (unparseable ones become null)
+        return pa.array([parse_timestamp(value) for value in column.to_pylist()], pa.timestamp("s"))
+
+
+def write_parquet_from_jsonl(f, start, end, path, metadata=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Convert the complete lines in bytes `start`..`end` of the JSON lines file
+    `f` (opened in binary mode) to Parquet, parsing blocks of lines with
+    Arrow's JSON reader. Returns the number of rows written.
+    """
+    target = schema()
+    if metadata:
+        target = target.with_metadata(metadata)
+    source_schema = pa.schema([(name, pa.string() if name == "timestamp" else target.field(name).type)
+                               for name in COLUMNS])
+    options = pj.ParseOptions(explicit_schema=source_schema, unexpected_field_behavior="ignore")
+    tmp_path = path + ".tmp"
+    rows = 0
+    f.seek(start)
+    with pq.ParquetWriter(tmp_path, target, compression="zstd") as writer:
+        while f.tell() < end:
+            block = f.read(min(JSONL_BLOCK_SIZE, end - f.tell()))
+            # Stop the block at a line boundary; the rest of the line starts the next one
+            if f.tell() < end:
+                cut = block.rfind(b"\n") + 1
+                f.seek(cut - len(block), os.SEEK_CUR)
+                block = block[:cut]
+            table = pj.read_json(io.BytesIO(block), parse_options=options)
+            table = table.set_column(4, "timestamp", _timestamps(table["timestamp"]))
+            writer.write_table(table.replace_schema_metadata(target.metadata), row_group_size=row_group_size)
+            rows += table.num_rows
+    os.replace(tmp_path, path)
+    return rows
+
+
+def merge_parquet(paths, path, metadata=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Concatenate the Parquet files `paths` (in order) into `path`. Small row
+    groups are combined into ones of up to `row_group_size` rows, holding at
+    most one output row group in memory. Returns the number of rows written.
+    """
+    target = schema()
+    if metadata:
+        target = target.with_metadata(metadata)
+    tmp_path = path + ".tmp"
+    rows = 0
+    pending = []
+    with pq.ParquetWriter(tmp_path, target, compression="zstd") as writer:
+        def flush():
+            # Parquet has no second resolution; timestamps are read back as ms
+            table = pa.concat_tables(pending).cast(target)
+            writer.write_table(table, row_group_size=row_group_size)
+            pending.clear()
+
+        for source in paths:
+            parquet = pq.ParquetFile(source)
+            for i in range(parquet.num_row_groups):
+                table = parquet.read_row_group(i)
+                pending.append(table)
+                rows += table.num_rows
+                if sum(table.num_rows for table in pending) >= row_group_size:
+                    flush()
+        if pending:
+            flush()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def read_metadata(path):
+    """Footer metadata written by write_parquet, or None if the file doesn't exist."""
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except FileNotFoundError:
+        return None
+    return {key.decode(): value.decode() for key, value in metadata.items()}
+
+
+def _row_group_counts(path, mtime_ns, topic, lower, upper):
+    """
+    Matching rows per row group of one (immutable) part file. Row groups are
+    skipped by their min/max statistics where possible; otherwise only the
+    topic and timestamp columns are read to count. Cached per file version.
+    """
+    key = (path, mtime_ns, topic, lower, upper)
+    counts = _count_cache.get(key)
+    if counts is None:
+        parquet = pq.ParquetFile(path)
+        counts = []
+        for i in range(parquet.num_row_groups):
+            group = parquet.metadata.row_group(i)
+            if topic is None and lower is None and upper is None:
+                counts.append(group.num_rows)
+            elif _excluded(group, parquet.schema_arrow, topic, lower, upper):
+                counts.append(0)
+            else:
+                table = parquet.read_row_group(i, columns=["topic", "timestamp"])
+                counts.append(int(pc.sum(_mask(table, topic, lower, upper)).as_py() or 0))
+        if len(_count_cache) >= 1024:
+            _count_cache.clear()
+        _count_cache[key] = counts
+    return counts
+
+
+_count_cache = {}
+
+
+def _excluded(group, arrow_schema, topic, lower, upper):
+    """True if the row group's statistics rule out any match."""
+    for j in range(group.num_columns):
+        column = group.column(j)
+        stats = column.statistics
+        if stats is None or not stats.has_min_max:
+            continue
+        name = column.path_in_schema
+        if name == "topic" and topic is not None and not (stats.min <= topic <= stats.max):
+            return True
+        if name == "timestamp":
+            if lower is not None and stats.max < lower:
+                return True
+            if upper is not None and stats.min >= upper:
+                return True
+    return False
+
+
+def _mask(table, topic, lower, upper):
+    mask = None
+    conditions = []
+    if topic is not None:
+        conditions.append(pc.equal(table["topic"], topic))
+    if lower is not None:
+        conditions.append(pc.greater_equal(table["timestamp"], pa.scalar(lower, pa.timestamp("s"))))
+    if upper is not None:
+        conditions.append(pc.less(table["timestamp"], pa.scalar(upper, pa.timestamp("s"))))
+    for condition in conditions:
+        mask = condition if mask is None else pc.and_kleene(mask, condition)
+    # Rows with a null timestamp never match a date filter
+    return pc.fill_null(mask, False) if mask is not None else None
+
+
+def read_page(paths, topic=None, start=None, end=None, columns=None, offset=0, limit=50, newest_first=True):
+    """
+    One page of matching records from the part files `paths` (a path or a list,
+    in order) as (list of dicts, total matching rows). Only the row groups that
+    hold the page are read, and of those only `columns` (default: all) plus
+    the filter columns.
+    """
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    lower, upper = date_bounds(start, end)
+    columns = [name for name in (columns or COLUMNS) if name in COLUMNS]
+    groups = [
+        (path, i, count)
+        for path in paths
+        for i, count in enumerate(_row_group_counts(path, os.stat(path).st_mtime_ns, topic, lower, upper))
+    ]
+    total = sum(count for _, _, count in groups)
+
+    # Rows are stored oldest first; the newest-first page is a window counted from the end
+    first = max(0, total - offset - limit) if newest_first else offset
+    last = max(0, total - offset) if newest_first else min(total, offset + limit)
+    page = []
+    seen = 0
+    filtered = topic is not None or lower is not None or upper is not None
+    read_columns = list(dict.fromkeys(columns + (["topic", "timestamp"] if filtered else [])))
+    for path, i, count in groups:
+        if seen >= last:
+            break
+        if count and seen + count > first:
+            table = pq.ParquetFile(path).read_row_group(i, columns=read_columns)
+            if filtered:
+                table = table.filter(_mask(table, topic, lower, upper))
+            skip = max(0, first - seen)
+            page.extend(table.select(columns).slice(skip, last - seen - skip).to_pylist())
+        seen += count
+
+    if newest_first:
+        page.reverse()
+    for record in page:
+        if record.get("timestamp") is not None:
+            record["timestamp"] = format_timestamp(record["timestamp"])
+    return page, total
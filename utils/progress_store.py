@@ -0,0 +1,795 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from utils import progress_columnar
+from utils.progress_aggregates import ProgressAggregates, RunningStats
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Legacy files written by earlier versions; now only used as export formats
+LEGACY_CSV_PATH = "progress.csv"
+LEGACY_JSON_PATH = "progress.json"
+PARQUET_EXPORT_PATH = "progress.parquet"
+
+FIELDS = ["topic", "question", "score", "feedback", "timestamp"]
+
+# Per-user stores (one file per user) live under this directory, fanned out
+# into subdirectories by the first two hex digits of the user key
+USERS_DIR = "progress_users"
+# User stores kept open at once; older ones are reopened on their next use
+MAX_OPEN_USER_STORES = 256
+# Parquet part files of the same tier in a JSONL log's columnar copy that are
+# merged into one part of the next tier
+COLUMNAR_MERGE_FANOUT = 8
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _clean_feedback(feedback):
+    return (feedback or "").strip('"\'')
+
+
+def _timestamp_bounds(start, end):
+    """
+    Date range as bounds comparable with the stored ISO timestamp strings.
+    Midnight bounds become bare dates, which order correctly against both
+    "2024-01-01T10:00:00" and "2024-01-01 10:00:00".
+    """
+    def text(bound):
+        if bound is None:
+            return None
+        value = bound.isoformat(sep=" ")
+        return value[:10] if value.endswith(" 00:00:00") else value
+
+    lower, upper = progress_columnar.date_bounds(start, end)
+    return text(lower), text(upper)
+
+
+def _page_record(row, columns):
+    """One record of a page, with the timestamp in the same format on every backend."""
+    record = {name: row[name] for name in columns}
+    if "timestamp" in record:
+        record["timestamp"] = progress_columnar.format_timestamp(record["timestamp"])
+    return record
+
+
+class ProgressStore:
+    """
+    Base class for progress backends.
+
+    Backends only have to implement `append`, `append_many`, `iter_records`,
+    `clear`, `is_migrated` and `_import_legacy`, plus the aggregate methods;
+    everything else is built on top.
+    """
+
+    def append(self, topic, question, score, feedback, timestamp=None):
+        raise NotImplementedError
+
+    def append_many(self, records):
+        raise NotImplementedError
+
+    def iter_records(self, topic=None):
+        """Yield records (dicts with FIELDS) in insertion order."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def is_migrated(self):
+        raise NotImplementedError
+
+    def _import_legacy(self, records):
+        """Atomically import `records` and mark the store as migrated."""
+        raise NotImplementedError
+
+    def get_aggregates(self):
+        """Return the persisted ProgressAggregates without scanning the history."""
+        raise NotImplementedError
+
+    def version(self):
+        """
+        Cheap token that changes whenever the stored data changes (also when
+        another process writes), for use as a cache key.
+        """
+        raise NotImplementedError
+
+    def read_feedback(self, offsets):
+        """Return the feedback texts stored at `offsets` (as kept in RunningStats)."""
+        raise NotImplementedError
+
+    def rebuild_aggregates(self):
+        """Recompute the aggregates from the full history."""
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release open connections and file handles; the store reopens them on
+        its next use. The JSONL backend opens its files per operation, so
+        there is nothing to release.
+        """
+
+    def count(self):
+        return sum(1 for _ in self.iter_records())
+
+    def read_since(self, cursor=None, limit=100_000):
+        """
+        Records appended after `cursor` (None: from the start), oldest first,
+        as (records, new cursor); at most `limit` per call. Cursors are opaque
+        and only valid for this store. Backends resume in constant time; this
+        fallback counts records.
+        """
+        skip = cursor or 0
+        records = list(islice(self.iter_records(), skip, skip + limit))
+        return records, skip + len(records)
+
+    def total_attempts(self):
+        """Number of stored records, from the aggregates (no history scan)."""
+        return sum(stats.count for stats in self.get_aggregates().topics.values())
+
+    def query_page(self, topic=None, start=None, end=None, columns=None, offset=0, limit=50):
+        """
+        One page of records, most recently saved first (the same order on
+        every backend), as (list of dicts, total matching).
+        `start`/`end` are an inclusive date range; `columns` selects the
+        returned fields (default: all). Backends push the filters down to
+        storage; this fallback scans the history holding one page at a time.
+        """
+        columns = [name for name in (columns or FIELDS) if name in FIELDS]
+        lower, upper = _timestamp_bounds(start, end)
+        window = deque(maxlen=offset + limit)
+        total = 0
+        for record in self.iter_records(topic):
+            timestamp = (record["timestamp"] or "").replace("T", " ")
+            if (lower and timestamp < lower) or (upper and timestamp >= upper):
+                continue
+            total += 1
+            window.append(record)
+        page = list(window)[:max(0, len(window) - offset)]
+        return [_page_record(record, columns) for record in reversed(page)], total
+
+    def load_progress(self):
+        """Return records grouped by topic, like the old progress.json layout."""
+        progress = {}
+        for record in self.iter_records():
+            progress.setdefault(record["topic"], []).append({
+                "question": record["question"],
+                "score": record["score"],
+                "feedback": record["feedback"],
+                "timestamp": record["timestamp"],
+            })
+        return progress
+
+    def migrate_legacy(self, csv_path=LEGACY_CSV_PATH, json_path=LEGACY_JSON_PATH):
+        """
+        Import records from the legacy progress.csv (or progress.json) once.
+        Returns the number of imported records.
+        """
+        if self.is_migrated():
+            return 0
+
+        records = []
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    records.append({
+                        "topic": row["topic"],
+                        "question": row["question"],
+                        "score": float(row["score"]),
+                        "feedback": row.get("feedback") or "",
+                        "timestamp": row.get("timestamp") or None,
+                    })
+        elif os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                for topic, items in json.load(f).items():
+                    for item in items:
+                        records.append({
+                            "topic": topic,
+                            "question": item["question"],
+                            "score": float(item["score"]),
+                            "feedback": item.get("feedback", ""),
+                            "timestamp": item.get("timestamp"),
+                        })
+
+        return self._import_legacy(records)
+
+    def export_csv(self, path=LEGACY_CSV_PATH):
+        """Write all records to a CSV file (streaming, one row at a time)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(FIELDS)
+            for record in self.iter_records():
+                writer.writerow([record[field] for field in FIELDS])
+        os.replace(tmp_path, path)
+
+    def export_parquet(self, path=PARQUET_EXPORT_PATH):
+        """Write all records to a Parquet file (typed columns, streamed in row groups)."""
+        return progress_columnar.write_parquet(self.iter_records(), path)
+
+    def export_json(self, path=LEGACY_JSON_PATH):
+        """Write all records grouped by topic to a JSON file."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.load_progress(), f, indent=4)
+        os.replace(tmp_path, path)
+
+
+class SQLiteProgressStore(ProgressStore):
+    """Embedded SQLite backend with indexes on topic, question and timestamp."""
+
+    def __init__(self, path="progress.db"):
+        self.path = path
+        self._local = threading.local()
+        # (thread, connection) of every thread's connection, for close()
+        self._connections = []
+        self._generation = 0
+        self._connections_lock = threading.Lock()
+        self._create_schema()
+        # Databases created before aggregates existed need a one-off rebuild
+        has_records = self.conn.execute("SELECT 1 FROM progress LIMIT 1").fetchone()
+        has_aggregates = self.conn.execute("SELECT 1 FROM aggregates LIMIT 1").fetchone()
+        if has_records and not has_aggregates:
+            self.rebuild_aggregates()
+
+    @property
+    def conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation != self._generation:
+            # The store was closed while this thread held a connection
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                # Drop (and close) the connections of threads that have exited
+                finished = [entry for entry in self._connections if not entry[0].is_alive()]
+                self._connections = [entry for entry in self._connections if entry[0].is_alive()]
+                self._connections.append((threading.current_thread(), conn))
+                self._local.conn, self._local.generation = conn, self._generation
+            for _, finished_conn in finished:
+                finished_conn.close()
+        return conn
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        current = threading.current_thread()
+        for thread, conn in connections:
+            # Another running thread may be using its connection; it closes it itself on
+            # its next use, or it is released with the thread's locals when the thread exits
+            if thread is current or not thread.is_alive():
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; BEGIN IMMEDIATE serializes concurrent writers."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            # Every write transaction bumps the data version (see `version`)
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('version', 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _create_schema(self):
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    feedback TEXT NOT NULL DEFAULT '',
+                    timestamp TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_topic ON progress (topic)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_question ON progress (question)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_timestamp ON progress (timestamp)")
+            # Topic + date range filters of the paged progress table
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_topic_timestamp ON progress (topic, timestamp)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # One row per topic (question = '') and one per (topic, question)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    topic TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    min REAL,
+                    max REAL,
+                    recent TEXT NOT NULL,
+                    feedback_offsets TEXT NOT NULL,
+                    PRIMARY KEY (topic, question)
+                )
+            """)
+
+    def _update_aggregate(self, conn, topic, question, score, offset):
+        row = conn.execute(
+            "SELECT * FROM aggregates WHERE topic = ? AND question = ?", (topic, question)
+        ).fetchone()
+        stats = RunningStats.from_row(row) if row else RunningStats()
+        stats.update(score, offset)
+        conn.execute(
+            "INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (topic, question) + stats.to_row()
+        )
+
+    def _insert(self, conn, topic, question, score, feedback, timestamp):
+        """Insert one record and update its aggregates inside the caller's transaction."""
+        cursor = conn.execute(
+            "INSERT INTO progress (topic, question, score, feedback, timestamp) VALUES (?, ?, ?, ?, ?)",
+            (topic, question, float(score), _clean_feedback(feedback), timestamp)
+        )
+        self._update_aggregate(conn, topic, "", score, cursor.lastrowid)
+        self._update_aggregate(conn, topic, question, score, cursor.lastrowid)
+
+    def append(self, topic, question, score, feedback, timestamp=None):
+        with self.transaction() as conn:
+            self._insert(conn, topic, question, score, feedback, timestamp or _now())
+
+    def append_many(self, records):
+        with self.transaction() as conn:
+            for r in records:
+                self._insert(conn, r["topic"], r["question"], r["score"], r.get("feedback"), r.get("timestamp"))
+
+    def iter_records(self, topic=None):
+        query = "SELECT topic, question, score, feedback, timestamp FROM progress"
+        params = ()
+        if topic is not None:
+            query += " WHERE topic = ?"
+            params = (topic,)
+        for row in self.conn.execute(query + " ORDER BY id", params):
+            yield dict(row)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+
+    def read_since(self, cursor=None, limit=100_000):
+        # The cursor is the last row id read
+        rows = self.conn.execute(
+            "SELECT id, topic, question, score, feedback, timestamp FROM progress WHERE id > ? ORDER BY id LIMIT ?",
+            (cursor or 0, limit)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [dict(row) for row in rows], rows[-1]["id"]
+
+    def query_page(self, topic=None, start=None, end=None, columns=None, offset=0, limit=50):
+        # Most recently saved first (by id, like the log order of the JSONL backend); topic
+        # index entries are already in id order. Only the selected columns of one page are read
+        columns = [name for name in (columns or FIELDS) if name in FIELDS]
+        lower, upper = _timestamp_bounds(start, end)
+        where, params = [], []
+        if topic is not None:
+            where.append("topic = ?")
+            params.append(topic)
+        if lower is not None:
+            where.append("timestamp >= ?")
+            params.append(lower)
+        if upper is not None:
+            where.append("timestamp < ?")
+            params.append(upper)
+        clause = " WHERE " + " AND ".join(where) if where else ""
+
+        if lower is None and upper is None:
+            # Without a date filter the running aggregates already hold the count
+            row = self.conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM aggregates WHERE question = ''" +
+                (" AND topic = ?" if topic is not None else ""), params
+            ).fetchone()
+        else:
+            row = self.conn.execute("SELECT COUNT(*) FROM progress" + clause, params).fetchone()
+        total = int(row[0])
+
+        rows = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM progress{clause} ORDER BY id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [_page_record(row, columns) for row in rows], total
+
+    def version(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def clear(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM progress")
+            conn.execute("DELETE FROM aggregates")
+
+    def get_aggregates(self):
+        aggregates = ProgressAggregates()
+        for row in self.conn.execute("SELECT * FROM aggregates"):
+            if row["question"] == "":
+                aggregates.topics[row["topic"]] = RunningStats.from_row(row)
+            else:
+                aggregates.questions.setdefault(row["topic"], {})[row["question"]] = RunningStats.from_row(row)
+        return aggregates
+
+    def read_feedback(self, offsets):
+        if not offsets:
+            return []
+        placeholders = ", ".join("?" * len(offsets))
+        rows = self.conn.execute(
+            f"SELECT id, feedback FROM progress WHERE id IN ({placeholders})", list(offsets)
+        ).fetchall()
+        feedback = {row["id"]: row["feedback"] for row in rows}
+        return [feedback[offset] for offset in offsets if offset in feedback]
+
+    def rebuild_aggregates(self):
+        with self.transaction() as conn:
+            aggregates = ProgressAggregates()
+            for row in conn.execute("SELECT id, topic, question, score FROM progress ORDER BY id"):
+                aggregates.update(row["topic"], row["question"], row["score"], row["id"])
+            conn.execute("DELETE FROM aggregates")
+            conn.executemany(
+                "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(topic, "") + stats.to_row() for topic, stats in aggregates.topics.items()] +
+                [(topic, question) + stats.to_row()
+                 for topic, questions in aggregates.questions.items()
+                 for question, stats in questions.items()]
+            )
+        return aggregates
+
+    def is_migrated(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+        return row is not None
+
+    def _import_legacy(self, records):
+        with self.transaction() as conn:
+            # Re-check inside the write lock in case another process migrated first
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+                return 0
+            for r in records:
+                self._insert(conn, r["topic"], r["question"], r["score"], r["feedback"], r["timestamp"])
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_migrated', ?)", (_now(),))
+        return len(records)
+
+
+@contextmanager
+def locked_file(path, mode="a+"):
+    """Open `path` holding an exclusive OS-level lock for the duration."""
+    with open(path, mode, encoding=None if "b" in mode else "utf-8") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            f.flush()
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JsonlProgressStore(ProgressStore):
+    """
+    Append-only JSON lines log; each save writes exactly one line under a file lock.
+    Aggregates live in a sidecar JSON file updated under the same lock.
+    """
+
+    def __init__(self, path="progress.log.jsonl"):
+        self.path = path
+        self.aggregates_path = os.path.splitext(path)[0] + ".aggregates.json"
+        self.columnar_dir = os.path.splitext(path)[0] + ".parquet"
+
+    def _load_aggregates(self):
+        try:
+            with open(self.aggregates_path, "r", encoding="utf-8") as f:
+                return ProgressAggregates.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def _save_aggregates(self, aggregates):
+        tmp_path = self.aggregates_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(aggregates.to_dict(), f)
+        os.replace(tmp_path, self.aggregates_path)
+
+    def _scan_aggregates(self):
+        aggregates = ProgressAggregates()
+        offset = 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    record = json.loads(line)
+                    aggregates.update(record["topic"], record["question"], record["score"], offset)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return aggregates
+
+    def _write_records(self, f, records):
+        """Append `records` to the locked log `f` and update the sidecar aggregates."""
+        aggregates = self._load_aggregates()
+        if aggregates is None:
+            aggregates = self._scan_aggregates()
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        lines = []
+        for record in records:
+            # json.dumps escapes non-ASCII, so len(line) is its size in bytes
+            line = json.dumps(record) + "\n"
+            aggregates.update(record["topic"], record["question"], record["score"], offset)
+            offset += len(line)
+            lines.append(line)
+        f.write("".join(lines))
+        f.flush()
+        self._save_aggregates(aggregates)
+
+    def append(self, topic, question, score, feedback, timestamp=None):
+        with locked_file(self.path) as f:
+            self._write_records(f, [{
+                "topic": topic,
+                "question": question,
+                "score": float(score),
+                "feedback": _clean_feedback(feedback),
+                "timestamp": timestamp or _now(),
+            }])
+
+    def append_many(self, records):
+        with locked_file(self.path) as f:
+            self._write_records(f, [{
+                "topic": r["topic"],
+                "question": r["question"],
+                "score": float(r["score"]),
+                "feedback": _clean_feedback(r.get("feedback")),
+                "timestamp": r.get("timestamp"),
+            } for r in records])
+
+    def iter_records(self, topic=None):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # Skip a partially written trailing line
+                    if not line.endswith("\n"):
+                        break
+                    record = json.loads(line)
+                    if topic is None or record["topic"] == topic:
+                        yield record
+        except FileNotFoundError:
+            return
+
+    def clear(self):
+        with locked_file(self.path) as f:
+            f.seek(0)
+            f.truncate()
+            self._save_aggregates(ProgressAggregates())
+            shutil.rmtree(self.columnar_dir, ignore_errors=True)
+
+    def read_since(self, cursor=None, limit=100_000):
+        # The cursor is the byte offset after the last complete line read
+        offset = cursor or 0
+        records = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n") or len(records) >= limit:
+                        break
+                    records.append(json.loads(line))
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return records, offset
+
+    def _columnar_parts(self):
+        """
+        Bring the Parquet copy of the log (`<log>.parquet/`) up to date and
+        return its part files in log order. Lines appended since the last call
+        become one new part, so the cost follows the new records, not the history.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with locked_file(self.path, "rb") as f:
+            parts = self._read_parts()
+            covered = parts[-1][2] if parts else 0
+            # End of the last complete line (a partially written line is left for later)
+            f.seek(covered)
+            end = covered
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                end += len(line)
+            if end > covered:
+                os.makedirs(self.columnar_dir, exist_ok=True)
+                path = os.path.join(self.columnar_dir, f"part-{covered:016d}.parquet")
+                progress_columnar.write_parquet_from_jsonl(
+                    f, covered, end, path, {"start": str(covered), "end": str(end), "tier": "0"}
+                )
+                parts.append((path, covered, end, 0))
+                parts = self._compact_parts(parts)
+        return [path for path, _, _, _ in parts]
+
+    def _read_parts(self):
+        """(path, start, end, tier) of the part files in log order, dropping parts a merge already covers."""
+        parts = []
+        for path in sorted(glob.glob(os.path.join(self.columnar_dir, "part-*.parquet"))):
+            metadata = progress_columnar.read_metadata(path)
+            start, end = int(metadata["start"]), int(metadata["end"])
+            if parts and start < parts[-1][2]:
+                # Left over from a merge interrupted before it removed its sources
+                os.remove(path)
+                continue
+            parts.append((path, start, end, int(metadata.get("tier", 0))))
+        return parts
+
+    def _compact_parts(self, parts):
+        """
+        Tiered compaction: whenever the newest COLUMNAR_MERGE_FANOUT parts share
+        a tier, merge them into one part of the next tier. Every record is
+        rewritten once per tier, so a merge never rewrites the whole history
+        at once and the part count stays logarithmic in the log size.
+        """
+        while len(parts) >= COLUMNAR_MERGE_FANOUT:
+            tail = parts[-COLUMNAR_MERGE_FANOUT:]
+            tier = tail[0][3]
+            if any(part[3] != tier for part in tail):
+                break
+            path, start, end = tail[0][0], tail[0][1], tail[-1][2]
+            progress_columnar.merge_parquet(
+                [part[0] for part in tail], path,
+                {"start": str(start), "end": str(end), "tier": str(tier + 1)}
+            )
+            for part in tail[1:]:
+                os.remove(part[0])
+            parts = parts[:-COLUMNAR_MERGE_FANOUT] + [(path, start, end, tier + 1)]
+        return parts
+
+    def query_page(self, topic=None, start=None, end=None, columns=None, offset=0, limit=50):
+        # Paged reads go to the Parquet copy, where filters and columns are pushed down
+        parts = self._columnar_parts()
+        if not parts:
+            return [], 0
+        return progress_columnar.read_page(parts, topic, start, end, columns, offset, limit)
+
+    def get_aggregates(self):
+        aggregates = self._load_aggregates()
+        if aggregates is None:
+            aggregates = self.rebuild_aggregates()
+        return aggregates
+
+    def read_feedback(self, offsets):
+        feedback = []
+        try:
+            with open(self.path, "rb") as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    feedback.append(json.loads(f.readline())["feedback"])
+        except FileNotFoundError:
+            pass
+        return feedback
+
+    def rebuild_aggregates(self):
+        with locked_file(self.path):
+            aggregates = self._scan_aggregates()
+            self._save_aggregates(aggregates)
+        return aggregates
+
+    def version(self):
+        # Appends grow the log and clear() truncates it; both also touch its mtime
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_migrated(self):
+        # The log file is created on migration, so its existence is the marker
+        return os.path.exists(self.path)
+
+    def _import_legacy(self, records):
+        with locked_file(self.path) as f:
+            f.seek(0, os.SEEK_END)
+            # Another process created and filled the log first
+            if f.tell() > 0:
+                return 0
+            self._write_records(f, records)
+        return len(records)
+
+
+BACKENDS = {
+    "sqlite": SQLiteProgressStore,
+    "jsonl": JsonlProgressStore,
+}
+
+EXTENSIONS = {
+    "sqlite": ".db",
+    "jsonl": ".log.jsonl",
+}
+
+_stores = {}
+_user_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def get_progress_store(backend=None, path=None):
+    """
+    Return the process-wide store for `backend` (default: $PROGRESS_BACKEND or sqlite),
+    migrating the legacy CSV/JSON files on first use.
+    """
+    backend = backend or os.getenv("PROGRESS_BACKEND", "sqlite")
+    path = path or os.getenv("PROGRESS_STORE_PATH")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown progress backend: {backend}")
+
+    key = (backend, path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = BACKENDS[backend](path) if path else BACKENDS[backend]()
+            store.migrate_legacy()
+            _stores[key] = store
+    return store
+
+
+def user_key(user_id):
+    """Stable file-name-safe key for `user_id` (the id itself never appears on disk)."""
+    return hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()[:20]
+
+
+def user_store_path(user_id, backend=None, root=None):
+    """Path of the store file holding `user_id`'s progress."""
+    backend = backend or os.getenv("PROGRESS_BACKEND", "sqlite")
+    root = root or os.getenv("PROGRESS_USERS_DIR", USERS_DIR)
+    key = user_key(user_id)
+    return os.path.join(root, backend, key[:2], key + EXTENSIONS[backend])
+
+
+def get_user_store(user_id, backend=None, root=None):
+    """
+    Return the store holding only `user_id`'s progress: a separate SQLite
+    database or JSONL log per user, so reads, writes and resets of one user
+    never touch another user's data or contend for their locks.
+    """
+    backend = backend or os.getenv("PROGRESS_BACKEND", "sqlite")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown progress backend: {backend}")
+
+    path = user_store_path(user_id, backend, root)
+    with _stores_lock:
+        store = _user_stores.get(path)
+        if store is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # The legacy CSV/JSON files belong to the shared store, not to any one user
+            store = BACKENDS[backend](path)
+            _user_stores[path] = store
+            if len(_user_stores) > MAX_OPEN_USER_STORES:
+                _, evicted = _user_stores.popitem(last=False)
+                evicted.close()
+        else:
+            _user_stores.move_to_end(path)
+    return store
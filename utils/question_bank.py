@@ -0,0 +1,335 @@
+import csv
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# Banks up to this size are searched exactly; larger ones get an IVF index
+EXACT_SEARCH_MAX = 5000
+# Inverted lists probed per query (of about sqrt(N) lists)
+DEFAULT_NPROBE = 8
+# Cosine similarity at or above which two questions count as duplicates
+DUPLICATE_THRESHOLD = 0.95
+INDEX_VERSION = 1
+
+
+def read_records(path):
+    """
+    Read a question file into a list of {"topic", "question", "references"} dicts.
+
+    Supported formats: JSON ({topic: [questions]} or a list of objects), JSON
+    lines and CSV with topic/question columns. Objects and rows may carry
+    reference answers in "reference" (one string; CSV cells may hold several
+    separated by "||") or "references" (a list).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if extension == ".csv":
+            rows = list(csv.DictReader(f))
+        elif extension == ".jsonl":
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                rows = [{"topic": topic, "question": question} for topic, questions in data.items() for question in questions]
+            else:
+                rows = data
+
+    records = []
+    for row in rows:
+        question = (row.get("question") or "").strip()
+        if not question:
+            continue
+        references = row.get("references") or []
+        if row.get("reference"):
+            references = references + row["reference"].split("||")
+        records.append({
+            "topic": (row.get("topic") or "").strip(),
+            "question": question,
+            "references": [text.strip() for text in references if text.strip()],
+        })
+    return records
+
+
+def read_questions(path):
+    """Read a question file into a list of (topic, question) pairs."""
+    return [(record["topic"], record["question"]) for record in read_records(path)]
+
+
+def spacy_embedder(texts):
+    """
+    Mean en_core_web_md word vector of each text (content words only when
+    there are any), as an (N, 300) float32 array. Only the tokenizer runs.
+    """
+    from utils.analysis import get_nlp
+
+    nlp = get_nlp()
+    vectors = nlp.vocab.vectors
+    out = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+    for i, doc in enumerate(nlp.tokenizer.pipe(texts, batch_size=256)):
+        tokens = [t for t in doc if t.has_vector]
+        content = [t for t in tokens if not (t.is_stop or t.is_punct)]
+        if content or tokens:
+            out[i] = np.mean([t.vector for t in (content or tokens)], axis=0)
+    return out
+
+
+spacy_embedder.name = "en_core_web_md"
+
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return (matrix / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+def spherical_kmeans(vectors, clusters, iterations=10, sample=40, seed=0):
+    """Cluster unit vectors by cosine similarity; trains on at most `sample` points per cluster."""
+    rng = np.random.default_rng(seed)
+    train = vectors
+    if len(vectors) > clusters * sample:
+        train = vectors[rng.choice(len(vectors), clusters * sample, replace=False)]
+    centroids = train[rng.choice(len(train), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, train)
+        empty = ~sums.any(axis=1)
+        # Reseed empty clusters with random training points
+        sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign(vectors, centroids, batch=8192):
+    return np.concatenate([
+        np.argmax(vectors[i:i + batch] @ centroids.T, axis=1) for i in range(0, len(vectors), batch)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+class QuestionBank:
+    """
+    Questions with a normalized embedding matrix for semantic lookups.
+
+    Embeddings are persisted next to the question file in `<name>.index/`
+    (embeddings.npy, memory-mapped on load) and rebuilt when the file or the
+    embedder changes. Banks larger than EXACT_SEARCH_MAX are stored grouped
+    by k-means cluster, so a query scans only the `nprobe` closest clusters
+    (contiguous row ranges of the mapped matrix) instead of every row.
+    """
+
+    def __init__(self, questions, embed=None, index_dir=None, fingerprint=None, references=None):
+        self.topics_list = [topic for topic, _ in questions]
+        self.questions = [question for _, question in questions]
+        self.embed = embed or spacy_embedder
+        self.index_dir = index_dir
+        self.fingerprint = fingerprint
+        self.references = references or {}  # question -> reference answers
+        self.by_topic = {}
+        for i, topic in enumerate(self.topics_list):
+            self.by_topic.setdefault(topic, []).append(i)
+        self._lookup = {question.lower(): i for i, question in enumerate(self.questions)}
+        self.matrix = None      # (N, D) unit vectors, rows in `order`
+        self.order = None       # row -> question index
+        self.rows = None        # question index -> row
+        self.centroids = None
+        self.offsets = None     # cluster c occupies rows offsets[c]:offsets[c + 1]
+        self.build_seconds = None
+
+    @classmethod
+    def load(cls, path, embed=None):
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        index_dir = os.path.splitext(path)[0] + ".index"
+        records = read_records(path)
+        references = {record["question"]: record["references"] for record in records if record["references"]}
+        return cls([(record["topic"], record["question"]) for record in records], embed, index_dir, digest, references)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def topics(self):
+        """{topic: [questions]} in file order, as returned by load_questions."""
+        return {topic: [self.questions[i] for i in indices] for topic, indices in self.by_topic.items()}
+
+    def questions_for(self, topic):
+        return [self.questions[i] for i in self.by_topic.get(topic, [])]
+
+    def references_for(self, question):
+        return self.references.get(question, [])
+
+    # -- index -------------------------------------------------------------
+
+    def _meta(self):
+        return {
+            "version": INDEX_VERSION,
+            "fingerprint": self.fingerprint,
+            "embedder": getattr(self.embed, "name", getattr(self.embed, "__name__", "custom")),
+            "count": len(self.questions),
+        }
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.index_dir, "meta.json"), "r", encoding="utf-8") as f:
+                if json.load(f) != self._meta():
+                    return False
+            self.matrix = np.load(os.path.join(self.index_dir, "embeddings.npy"), mmap_mode="r")
+            self.order = np.load(os.path.join(self.index_dir, "order.npy"))
+            if os.path.exists(os.path.join(self.index_dir, "centroids.npy")):
+                self.centroids = np.load(os.path.join(self.index_dir, "centroids.npy"))
+                self.offsets = np.load(os.path.join(self.index_dir, "offsets.npy"))
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def _save_index(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.save(os.path.join(self.index_dir, "embeddings.npy"), self.matrix)
+        np.save(os.path.join(self.index_dir, "order.npy"), self.order)
+        for name in ("centroids", "offsets"):
+            path = os.path.join(self.index_dir, f"{name}.npy")
+            if getattr(self, name) is not None:
+                np.save(path, getattr(self, name))
+            elif os.path.exists(path):
+                os.remove(path)
+        # meta.json last: it marks the other files as complete
+        with open(os.path.join(self.index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self._meta(), f)
+        self.matrix = np.load(os.path.join(self.index_dir, "embeddings.npy"), mmap_mode="r")
+
+    def build(self, batch=2048):
+        """Embed every question and (for large banks) cluster them."""
+        start = time.perf_counter()
+        vectors = np.concatenate([
+            normalize(self.embed(self.questions[i:i + batch])) for i in range(0, len(self.questions), batch)
+        ]) if self.questions else np.zeros((0, 1), dtype=np.float32)
+
+        self.centroids = self.offsets = None
+        if len(vectors) > EXACT_SEARCH_MAX:
+            centroids = spherical_kmeans(vectors, int(np.sqrt(len(vectors))))
+            assignment = assign(vectors, centroids)
+            self.order = np.argsort(assignment, kind="stable")
+            self.centroids = centroids
+            self.offsets = np.searchsorted(assignment[self.order], np.arange(len(centroids) + 1))
+            self.matrix = np.ascontiguousarray(vectors[self.order])
+        else:
+            self.order = np.arange(len(vectors))
+            self.matrix = vectors
+        self.build_seconds = time.perf_counter() - start
+        if self.index_dir:
+            self._save_index()
+        return self
+
+    def ensure_index(self):
+        if self.matrix is None and not (self.index_dir and self._load_index()):
+            self.build()
+        if self.rows is None:
+            self.rows = np.empty(len(self.order), dtype=np.int64)
+            self.rows[self.order] = np.arange(len(self.order))
+        return self
+
+    def vector(self, index):
+        self.ensure_index()
+        return np.asarray(self.matrix[self.rows[index]])
+
+    def embed_text(self, text):
+        return normalize(self.embed([text]))[0]
+
+    # -- queries -----------------------------------------------------------
+
+    def _candidates(self, query, nprobe):
+        """(rows, similarities) of the rows worth scoring for `query`."""
+        if self.centroids is None:
+            return np.arange(len(self.matrix)), np.asarray(self.matrix @ query)
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        ranges = [(self.offsets[c], self.offsets[c + 1]) for c in lists]
+        rows = np.concatenate([np.arange(a, b) for a, b in ranges])
+        sims = np.concatenate([np.asarray(self.matrix[a:b] @ query) for a, b in ranges])
+        return rows, sims
+
+    def search(self, query, k=5, topic=None, exclude=None, nprobe=DEFAULT_NPROBE):
+        """
+        Top-`k` questions for the unit vector `query` as (index, similarity)
+        pairs, best first. With `topic`, only that topic's questions are searched.
+        """
+        self.ensure_index()
+        if topic is not None:
+            rows = np.sort(self.rows[self.by_topic.get(topic, [])])
+            sims = np.asarray(self.matrix[rows]) @ query
+        else:
+            rows, sims = self._candidates(query, nprobe)
+        if exclude is not None:
+            sims[rows == self.rows[exclude]] = -np.inf
+        k = min(k, len(sims))
+        if k <= 0:
+            return []
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(int(self.order[rows[i]]), float(sims[i])) for i in top if sims[i] > -np.inf]
+
+    def similar(self, question, k=5, topic=None, nprobe=DEFAULT_NPROBE):
+        """
+        Questions similar to `question` (a bank question or free text) as
+        dicts with topic, question and similarity.
+        """
+        index = self._lookup.get(question.strip().lower())
+        query = self.vector(index) if index is not None else self.embed_text(question)
+        return [
+            {"topic": self.topics_list[i], "question": self.questions[i], "similarity": round(sim, 4)}
+            for i, sim in self.search(query, k, topic, exclude=index, nprobe=nprobe)
+        ]
+
+    def suggest_topic(self, text):
+        """Topic whose questions are closest on average to `text` (None for an empty bank)."""
+        self.ensure_index()
+        if not self.by_topic:
+            return None
+        query = self.embed_text(text)
+        names = list(self.by_topic)
+        centroids = normalize(np.stack([
+            np.asarray(self.matrix[np.sort(self.rows[self.by_topic[name]])]).mean(axis=0) for name in names
+        ]))
+        return names[int(np.argmax(centroids @ query))]
+
+    def find_duplicate(self, text, threshold=DUPLICATE_THRESHOLD):
+        """The existing question `text` duplicates, or None."""
+        found = self.search(self.embed_text(text), k=1)
+        if found and found[0][1] >= threshold:
+            return self.questions[found[0][0]]
+        return None
+
+    def duplicates(self, threshold=DUPLICATE_THRESHOLD, block=1024):
+        """
+        Pairs of questions (i, j, similarity) at or above `threshold`. Compared
+        within each IVF cluster for large banks (near-duplicates share a
+        cluster), blockwise over the whole matrix otherwise.
+        """
+        self.ensure_index()
+        ranges = [(0, len(self.matrix))] if self.centroids is None else zip(self.offsets[:-1], self.offsets[1:])
+        pairs = []
+        for start, stop in ranges:
+            for a in range(start, stop, block):
+                left = np.asarray(self.matrix[a:min(a + block, stop)])
+                sims = left @ np.asarray(self.matrix[a:stop]).T
+                i, j = np.nonzero(np.triu(sims, k=1) >= threshold)
+                pairs.extend(
+                    (int(self.order[a + x]), int(self.order[a + y]), round(float(sims[x, y]), 4))
+                    for x, y in zip(i, j)
+                )
+        return pairs
+
+
+_banks = {}
+
+
+def get_question_bank(path=None, embed=None):
+    """Process-wide bank for `path` (default: $QUESTION_BANK_PATH or questions.json)."""
+    path = path or os.getenv("QUESTION_BANK_PATH", "questions.json")
+    key = (path, embed)
+    mtime = os.path.getmtime(path)
+    cached = _banks.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = _banks[key] = (mtime, QuestionBank.load(path, embed))
+    return cached[1]
@@ -0,0 +1,248 @@
+"""
+Local relevance scoring: does an answer address the question?
+
+Compares the answer with the question and its reference answers using the
+en_core_web_md word vectors, without a network call:
+
+- relevance: best cosine similarity between any answer sentence and the
+  question or a reference answer (sentence-level max-sim);
+- coverage: share of the question/reference keywords that some answer word
+  matches (exactly or by vector similarity).
+
+A batch of answers is scored with two matrix products (sentences x targets and
+words x keywords) followed by segmented max-reductions, so the per-answer
+cost is dominated by spaCy, not by the comparison.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils import tracing
+from utils.analysis import get_nlp
+from utils.lazy import lazy_resource
+
+# Cosine similarity of mean word vectors maps to relevance 0..1 between these
+# (unrelated English sentences rarely score below 0.5 with en_core_web_md)
+SIMILARITY_FLOOR = 0.5
+SIMILARITY_CEILING = 0.85
+# A keyword counts as covered by an answer word at least this similar
+KEYWORD_MATCH = 0.65
+# Answers with fewer content words than this get proportionally less confidence
+MIN_CONTENT_WORDS = 12
+# Question/reference vectors kept by a scorer (the bank's questions repeat; free-form ones may not)
+MAX_CACHED_QUESTIONS = 4096
+# Skip the LLM quality check when the local confidence reaches this (above 1 disables)
+SKIP_CONFIDENCE = float(os.getenv("RELEVANCE_SKIP_CONFIDENCE", "0.8"))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _sentence_starts(doc):
+    if len(doc) and doc.has_annotation("SENT_START"):
+        return np.array([sent.start for sent in doc.sents])
+    return np.array([0])
+
+
+class DocVectors:
+    """Sentence vectors and distinct content-word vectors of one doc."""
+
+    def __init__(self, doc, vectors, sentences=True):
+        from spacy.attrs import IS_ALPHA, IS_STOP, LOWER
+
+        attrs = doc.to_array([LOWER, IS_ALPHA, IS_STOP]) if len(doc) else np.zeros((0, 3), dtype=np.uint64)
+        rows = vectors.find(keys=attrs[:, 0]) if len(doc) else np.zeros(0, dtype=np.int64)
+        words = (attrs[:, 1] == 1) & (attrs[:, 2] == 0)
+        content = words & (rows >= 0)
+        self.content_words = int(content.sum())
+        # Share of the answer's words we have vectors for (low for garbled transcripts)
+        self.known_rate = self.content_words / words.sum() if words.any() else 0.0
+
+        dim = vectors.shape[1]
+        if sentences and self.content_words:
+            sentence_ids = np.searchsorted(_sentence_starts(doc), np.arange(len(doc)), side="right") - 1
+            sums = np.zeros((sentence_ids[-1] + 1, dim), dtype=np.float32)
+            np.add.at(sums, sentence_ids[content], vectors.data[rows[content]])
+            self.sentences = _normalize(sums[sums.any(axis=1)])
+        elif self.content_words:
+            self.sentences = _normalize(vectors.data[rows[content]].sum(axis=0, keepdims=True))
+        else:
+            self.sentences = np.zeros((0, dim), dtype=np.float32)
+
+        keys, first = np.unique(attrs[content, 0], return_index=True)
+        self.keywords = [doc[int(i)].lower_ for i in np.flatnonzero(content)[first]]
+        self.words = _normalize(vectors.data[rows[content][first]]) if len(keys) else np.zeros((0, dim), dtype=np.float32)
+
+
+class Targets:
+    """What an answer to one question is compared with: question, references and their keywords."""
+
+    def __init__(self, question_vectors, reference_vectors):
+        parts = [question_vectors.sentences] + [ref.sentences for ref in reference_vectors]
+        self.matrix = np.concatenate(parts)
+        self.is_reference = np.repeat([False] + [True] * len(reference_vectors), [len(p) for p in parts])
+
+        keywords = {}
+        for vectors in [question_vectors] + reference_vectors:
+            for word, vector in zip(vectors.keywords, vectors.words):
+                keywords.setdefault(word, vector)
+        self.keywords = list(keywords)
+        dim = question_vectors.words.shape[1]
+        self.keyword_matrix = np.array(list(keywords.values()), dtype=np.float32).reshape(len(keywords), dim)
+
+
+def _segment_max(matrix, counts):
+    """Row-wise max of `matrix` over consecutive segments of `counts` rows (empty segments: 0)."""
+    out = np.zeros((len(counts), matrix.shape[1]), dtype=np.float32)
+    present = counts > 0
+    if present.any():
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        out[present] = np.maximum.reduceat(matrix, starts, axis=0)
+    return out
+
+
+class RelevanceScorer:
+    """
+    Scores answers against questions; question and reference vectors are
+    cached, so scoring many answers to the same questions only embeds the answers.
+    """
+
+    def __init__(self, nlp=None):
+        self._nlp = nlp
+        self._targets = {}
+        self._lock = threading.Lock()
+        self.answers = 0
+        self.llm_skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = get_nlp()
+        return self._nlp
+
+    def targets(self, question, references=()):
+        key = (question, tuple(references))
+        targets = self._targets.get(key)
+        if targets is None:
+            if len(self._targets) >= MAX_CACHED_QUESTIONS:
+                self._targets.clear()
+            vectors = self.nlp.vocab.vectors
+            question_vectors = DocVectors(self.nlp.make_doc(question), vectors, sentences=False)
+            reference_vectors = [DocVectors(doc, vectors, sentences=False) for doc in self.nlp.tokenizer.pipe(references)]
+            targets = self._targets[key] = Targets(question_vectors, reference_vectors)
+        return targets
+
+    def score_docs(self, questions, docs, references=None):
+        """
+        Score answers that have already been processed by `nlp` (e.g. the doc
+        analyze_doc used). `references` is a list with a list of reference
+        answers per question, or None. Returns one dict per answer.
+        """
+        start = time.perf_counter()
+        references = references or [()] * len(questions)
+        answers = [DocVectors(doc, self.nlp.vocab.vectors) for doc in docs]
+        targets = [self.targets(question, refs) for question, refs in zip(questions, references)]
+
+        # Stack the distinct targets of the batch once; answers select their own columns
+        unique = {id(t): t for t in targets}
+        column = {}
+        offset = keyword_offset = 0
+        for key, t in unique.items():
+            column[key] = (offset, keyword_offset)
+            offset += len(t.matrix)
+            keyword_offset += len(t.keywords)
+        dim = self.nlp.vocab.vectors.shape[1]
+        target_matrix = np.concatenate([t.matrix for t in unique.values()] + [np.zeros((0, dim), np.float32)])
+        keyword_matrix = np.concatenate([t.keyword_matrix for t in unique.values()])
+
+        sentence_counts = np.array([len(a.sentences) for a in answers])
+        word_counts = np.array([len(a.words) for a in answers])
+        best_sentence = _segment_max(np.concatenate([a.sentences for a in answers]) @ target_matrix.T, sentence_counts)
+        best_word = _segment_max(np.concatenate([a.words for a in answers]) @ keyword_matrix.T, word_counts)
+
+        results = []
+        for i, (answer, t) in enumerate(zip(answers, targets)):
+            col, keyword_col = column[id(t)]
+            sims = best_sentence[i, col:col + len(t.matrix)]
+            question_sim = float(sims[~t.is_reference].max()) if (~t.is_reference).any() else 0.0
+            reference_sim = float(sims[t.is_reference].max()) if t.is_reference.any() else None
+            best = max(question_sim, reference_sim or 0.0)
+            relevance = min(1.0, max(0.0, (best - SIMILARITY_FLOOR) / (SIMILARITY_CEILING - SIMILARITY_FLOOR)))
+
+            covered = best_word[i, keyword_col:keyword_col + len(t.keywords)] >= KEYWORD_MATCH
+            coverage = float(covered.mean()) if len(t.keywords) else relevance
+            score = round((relevance + coverage) / 2 * 100, 2)
+
+            # Confident when the answer is long enough, mostly known words, and clearly on or off topic
+            decisiveness = min(1.0, abs(score - 50) / 30)
+            length = min(1.0, answer.content_words / MIN_CONTENT_WORDS)
+            confidence = round(float(answer.known_rate * length * decisiveness), 3)
+
+            results.append({
+                "score": score,
+                "relevance": round(relevance, 3),
+                "coverage": round(coverage, 3),
+                "question_similarity": round(question_sim, 3),
+                "reference_similarity": None if reference_sim is None else round(reference_sim, 3),
+                "missing_keywords": [word for word, hit in zip(t.keywords, covered) if not hit][:10],
+                "confidence": confidence,
+            })
+
+        with self._lock:
+            self.answers += len(results)
+            self.seconds += time.perf_counter() - start
+        return results
+
+    def score(self, question, answer, references=()):
+        """Score one answer (text or doc)."""
+        doc = answer if not isinstance(answer, str) else self.nlp(answer)
+        return self.score_docs([question], [doc], [references])[0]
+
+    def score_batch(self, questions, answers, references=None, batch_size=64):
+        """Score many (question, answer text) pairs, parsing the answers with `nlp.pipe`."""
+        docs = list(self.nlp.pipe(answers, batch_size=batch_size))
+        return self.score_docs(questions, docs, references)
+
+    def should_skip_llm(self, result, threshold=None):
+        """
+        True if the local result is confident enough to stand in for the LLM
+        quality check. Counts the decision for stats().
+        """
+        threshold = SKIP_CONFIDENCE if threshold is None else threshold
+        skip = result["confidence"] >= threshold
+        if skip:
+            with self._lock:
+                self.llm_skipped += 1
+            tracing.count("llm_calls_skipped")
+        return skip
+
+    def stats(self):
+        with self._lock:
+            return {
+                "answers": self.answers,
+                "llm_skipped": self.llm_skipped,
+                "skip_rate": round(self.llm_skipped / self.answers, 3) if self.answers else 0.0,
+                "avg_ms": round(self.seconds / self.answers * 1000, 3) if self.answers else 0.0,
+            }
+
+
+@lazy_resource("relevance_scorer")
+def get_scorer():
+    """The process-wide RelevanceScorer (shares the spaCy model with the analysis)."""
+    return RelevanceScorer()
+
+
+def local_quality(result):
+    """The local result in the shape of a Cohere quality assessment, for display in its place."""
+    feedback = (
+        f"Local relevance check: similarity to the question/reference answer {result['relevance']:.0%}, "
+        f"keyword coverage {result['coverage']:.0%}."
+    )
+    if result["missing_keywords"]:
+        feedback += f" Consider covering: {', '.join(result['missing_keywords'][:5])}."
+    return {"score": int(round(result["score"])), "detailed_feedback": feedback, "source": "local"}
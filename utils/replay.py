@@ -0,0 +1,109 @@
+import time
+import wave
+
+import cv2
+import speech_recognition as sr
+
+
+class Pacer:
+    """Sleeps so that item `n` is released no earlier than n / rate seconds after the first."""
+
+    def __init__(self, rate, realtime=True):
+        self.rate = rate
+        self.realtime = realtime
+        self.started = None
+
+    def wait(self, position):
+        if self.started is None:
+            self.started = time.monotonic()
+        if not self.realtime or not self.rate:
+            return
+        delay = self.started + position / self.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VideoFileSource:
+    """
+    Stand-in for `cv2.VideoCapture(0)` that replays a video file.
+
+    With `realtime=True` frames are released at the file's frame rate (or
+    `fps`), like a camera; otherwise as fast as they can be decoded. `read()`
+    returns (False, None) at the end of the file and sets `exhausted`, which
+    ends capture instead of being retried as a camera glitch.
+    """
+
+    def __init__(self, path, realtime=True, fps=None, loop=False):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        self.fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pacer = Pacer(self.fps, realtime)
+        self.frames_read = 0
+        self.exhausted = False
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def set(self, prop, value):
+        # Resolution requests are meant for cameras; replayed frames keep their size
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.capture.get(prop)
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret and self.loop and self.frames_read:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        if not ret:
+            self.exhausted = True
+            return False, None
+        self.pacer.wait(self.frames_read)
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class _PacedStream:
+    def __init__(self, stream, pacer, sample_width):
+        self.stream = stream
+        self.pacer = pacer
+        self.sample_width = sample_width
+        self.samples_read = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        # A microphone returns a buffer once all of it has been recorded
+        self.samples_read += len(data) // self.sample_width
+        self.pacer.wait(self.samples_read)
+        return data
+
+
+class WavAudioSource(sr.AudioFile):
+    """
+    Stand-in for `sr.Microphone()` that replays a 16-bit PCM WAV file through
+    the same recognizer and transcription code, at real-time pace by default
+    (`realtime=False` reads as fast as possible).
+    """
+
+    def __init__(self, path, realtime=True, chunk=1024):
+        super().__init__(path)
+        self.realtime = realtime
+        self.chunk = chunk
+        # Known up front like a microphone's, so transcribers can be set up before recording
+        with wave.open(path, "rb") as reader:
+            self.SAMPLE_RATE = reader.getframerate()
+            self.SAMPLE_WIDTH = reader.getsampwidth()
+
+    def __enter__(self):
+        super().__enter__()
+        # Same buffer size as sr.Microphone, so reads are paced like a device
+        self.CHUNK = self.chunk
+        self.stream = _PacedStream(self.stream, Pacer(self.SAMPLE_RATE, self.realtime), self.SAMPLE_WIDTH)
+        return self
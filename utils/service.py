@@ -0,0 +1,344 @@
+"""
+Headless HTTP/JSON analysis service, for scoring answers without the
+Streamlit UI:
+
+    python -m utils.service --port 8080 --workers 1 --max-batch 32
+
+- POST /analyze with {"transcription": ..., "question": ..., "topic": ...,
+  "references": [...], "emotion_data": {...}, "llm": false, "save": false,
+  "user": ...} returns sentiment, key phrases, quality, score and feedback
+  (as batch scoring), the relevance result for answers with a question, the
+  Cohere assessment with "llm": true, and saves the attempt with "save": true.
+- POST /analyze/batch with {"answers": [...]} analyzes several answers.
+- GET /health reports the batching statistics.
+
+Concurrent requests are micro-batched: each batch worker takes all requests
+waiting in the queue (up to `max_batch`) and parses them with a single
+`nlp.pipe` call, so the relevance matrix products are shared by the batch
+too. Requests that arrive while a batch is processed form the next one, so
+batches grow with the load without delaying a lone request; `max_wait_ms`
+optionally waits that long for more requests after the first.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import tracing
+from utils.analysis import get_nlp
+from utils.batch_scoring import RESULT_FIELDS, score_docs
+from utils.data_handling import save_progress
+from utils.interview import evaluate_answer, reference_answers
+from utils.relevance import get_scorer, local_quality
+
+MAX_BATCH = int(os.getenv("SERVICE_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.getenv("SERVICE_MAX_WAIT_MS", "0"))
+# Largest accepted request body and number of answers per /analyze/batch request
+MAX_BODY_BYTES = 2**20
+MAX_ANSWERS = 256
+
+
+class RequestError(ValueError):
+    """Invalid request; answered with HTTP 400."""
+
+
+def validate(answer):
+    """Check one answer of a request and return it."""
+    if not isinstance(answer, dict):
+        raise RequestError("Each answer must be a JSON object")
+    transcription = answer.get("transcription")
+    if not isinstance(transcription, str) or not transcription.strip():
+        raise RequestError('"transcription" must be a non-empty string')
+    for field in ("question", "topic", "user"):
+        if answer.get(field) is not None and not isinstance(answer[field], str):
+            raise RequestError(f'"{field}" must be a string')
+    references = answer.get("references")
+    if references is not None and not (
+        isinstance(references, list) and all(isinstance(reference, str) for reference in references)
+    ):
+        raise RequestError('"references" must be a list of strings')
+    if answer.get("llm") and not answer.get("question"):
+        raise RequestError('"llm" needs a "question"')
+    if answer.get("save") and not (answer.get("topic") and answer.get("question")):
+        raise RequestError('"save" needs a "topic" and a "question"')
+    emotion_data = answer.get("emotion_data") or {}
+    if not isinstance(emotion_data, dict) or not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) for value in emotion_data.values()
+    ):
+        raise RequestError('"emotion_data" must be an object of numbers')
+    return answer
+
+
+class MicroBatcher:
+    """
+    Collects analysis requests from many threads into batches processed by
+    `workers` threads, each batch with one `nlp.pipe` call.
+    """
+
+    def __init__(self, workers=1, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.seconds = 0.0
+        self._workers = [
+            threading.Thread(target=self._work, name=f"batch-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, record):
+        """Queue a record (with a "transcription") and return a Future of (result, relevance)."""
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def _take_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Shutdown: let this batch finish, then stop the next worker too
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._process(batch)
+
+    @staticmethod
+    def _score(records):
+        docs = get_nlp().pipe([record["transcription"] for record in records], batch_size=len(records))
+        return score_docs(list(zip(docs, records)))
+
+    def _process(self, batch):
+        start = time.perf_counter()
+        records = [record for record, _ in batch]
+        try:
+            with tracing.span("service_batch", size=len(batch)):
+                results, relevance = self._score(records)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+            else:
+                # Score the records one at a time, so only the bad one fails
+                for record, future in batch:
+                    try:
+                        (result,), (result_relevance,) = self._score([record])
+                    except Exception as record_error:
+                        future.set_exception(record_error)
+                    else:
+                        future.set_result((result, result_relevance))
+        else:
+            for (_, future), result, result_relevance in zip(batch, results, relevance):
+                future.set_result((result, result_relevance))
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.seconds += time.perf_counter() - start
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "queued": self._queue.qsize(),
+                "avg_batch_ms": round(self.seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            }
+
+    def shutdown(self):
+        # One stop sentinel per worker; a worker that finds one mid-batch puts it back
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+def analyze(batcher, answers):
+    """
+    Analyze validated answers: the local analysis through `batcher`, then the
+    optional Cohere assessment and progress write per answer.
+    """
+    futures = []
+    for answer in answers:
+        record = dict(answer)
+        if record.get("question") and "references" not in record:
+            record["references"] = reference_answers(record["question"])
+        futures.append(batcher.submit(record))
+
+    responses = []
+    for answer, future in zip(answers, futures):
+        result, relevance = future.result()
+        response = {field: result[field] for field in RESULT_FIELDS}
+        if relevance is not None:
+            response["relevance"] = relevance
+        if answer.get("llm"):
+            with tracing.span("llm_assessment"):
+                scorer = get_scorer()
+                local_assessment = local_quality(relevance) if scorer.should_skip_llm(relevance) else None
+                response["cohere_quality"], response["improved_answer"] = evaluate_answer(
+                    answer["question"], answer["transcription"], local_assessment
+                )
+        if answer.get("save"):
+            with tracing.span("save_progress"):
+                save_progress(answer["topic"], answer["question"], response["score"], response["feedback"],
+                              user=answer.get("user"))
+            response["saved"] = True
+        responses.append(response)
+    return responses
+
+
+class AnalysisService(ThreadingHTTPServer):
+    """Serves the analysis API; every connection gets a thread, analysis goes through the batcher."""
+
+    daemon_threads = True
+    # Room for bursts of new connections from many clients
+    request_queue_size = 128
+
+    def __init__(self, address=("127.0.0.1", 8080), workers=1, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS,
+                 verbose=False):
+        super().__init__(address, _ServiceHandler)
+        self.batcher = MicroBatcher(workers, max_batch, max_wait_ms)
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        super().shutdown()
+        self.server_close()
+        self.batcher.shutdown()
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "InterviewAnalysis/1.0"
+    # Keep-alive, so load-test clients can reuse connections
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, {"status": "ok", "batching": self.server.batcher.stats()})
+        else:
+            self._reply(404, {"error": "Not found"})
+
+    def _content_length(self):
+        """The validated Content-Length, or None after replying with an error."""
+        value = self.headers.get("Content-Length")
+        error = None
+        if value is None:
+            status, error = 400, "Content-Length required"
+        elif not (value.strip().isascii() and value.strip().isdigit()):
+            status, error = 400, "Content-Length must be a non-negative integer"
+        elif int(value) > MAX_BODY_BYTES:
+            status, error = 413, f"Request body larger than {MAX_BODY_BYTES} bytes"
+        if error is None:
+            return int(value)
+        # The body is not read; don't reuse the connection
+        self.close_connection = True
+        self._reply(status, {"error": error})
+        return None
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path not in ("/analyze", "/analyze/batch"):
+            self._reply(404, {"error": "Not found"})
+            return
+        try:
+            length = self._content_length()
+            if length is None:
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise RequestError("Request body is not valid JSON")
+            if path == "/analyze":
+                answers = [validate(payload)]
+            else:
+                answers = payload.get("answers") if isinstance(payload, dict) else None
+                if not isinstance(answers, list) or not 0 < len(answers) <= MAX_ANSWERS:
+                    raise RequestError(f'"answers" must be a list of 1 to {MAX_ANSWERS} answers')
+                answers = [validate(answer) for answer in answers]
+        except RequestError as e:
+            # The body may not have been read; don't reuse the connection
+            self.close_connection = True
+            self._reply(400, {"error": str(e)})
+            return
+
+        try:
+            with tracing.span("service_request", answers=len(answers)):
+                responses = analyze(self.server.batcher, answers)
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, responses[0] if path == "/analyze" else {"results": responses})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve transcript analysis over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1, help="Batch worker threads")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most requests per nlp.pipe call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="How long a batch waits for more requests after the first (default: don't wait)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = AnalysisService((args.host, args.port), args.workers, args.max_batch, args.max_wait_ms, args.verbose)
+    # Load the model before accepting requests, so the first one isn't slow
+    get_nlp()
+    print(f"Serving transcript analysis on {server.url} (POST /analyze, POST /analyze/batch, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
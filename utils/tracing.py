@@ -0,0 +1,274 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (Prometheus `le` labels)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_PREFIX = "interview"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram for one stage."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+        }
+
+
+class Span:
+    """One timed stage; use `set` to attach attributes (frames, bytes, ...)."""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = None
+        self.trace_id = None
+        self.duration = None
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if stack:
+            self.parent = stack[-1].span_id
+            self.trace_id = stack[-1].trace_id
+        else:
+            self.trace_id = uuid.uuid4().hex
+        stack.append(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        self.tracer._stack().pop()
+        self.tracer._finish(self, exc_type)
+        return False
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer: entering, leaving and `set` do nothing."""
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Stage spans, counters and per-stage latency histograms.
+
+    Spans are written as JSON lines to `jsonl_path` (if set) and every
+    finished span updates the histogram of its name; `prometheus_text()`
+    renders histograms and counters in the Prometheus text format, which
+    `write_prometheus` saves to a file and `serve` exposes over HTTP. When
+    disabled, `span` returns a shared no-op object and counters return
+    immediately, so instrumented code pays one attribute check.
+    """
+
+    def __init__(self, enabled=False, jsonl_path=None, prometheus_path=None):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._server = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        """Context manager timing the stage `name`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def trace(self, name=None):
+        """Decorator running the function inside a span (named after it by default)."""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """Add `value` to the counter `name` (e.g. frames_processed, bytes_written)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _finish(self, span, exc_type):
+        record = {
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent,
+            "start": round(span.wall_start, 6),
+            "duration_ms": round(span.duration * 1000, 3),
+            "error": exc_type.__name__ if exc_type else None,
+            "attrs": span.attrs,
+        }
+        with self._lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = Histogram()
+            histogram.observe(span.duration)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def snapshot(self):
+        """Histogram summaries per stage and counter values."""
+        with self._lock:
+            return {
+                "stages": {name: h.to_dict() for name, h in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def prometheus_text(self):
+        metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of mock-interview pipeline stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+            for name, value in sorted(self.counters.items()):
+                counter = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {counter} counter")
+                lines.append(f"{counter} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Write the metrics for a node-exporter style textfile collector (atomic replace)."""
+        path = path or self.prometheus_path
+        if not self.enabled or not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose /metrics over HTTP on a daemon thread (once per process)."""
+        if self._server is not None:
+            return self._server
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+def _from_env():
+    enabled = os.getenv("TRACING", "").lower() in ("1", "true", "yes")
+    tracer = Tracer(
+        enabled,
+        jsonl_path=os.getenv("TRACING_JSONL", "traces.jsonl"),
+        prometheus_path=os.getenv("TRACING_PROMETHEUS", "metrics.prom"),
+    )
+    port = os.getenv("TRACING_PORT")
+    if enabled and port:
+        tracer.serve(int(port))
+    return tracer
+
+
+# Process-wide tracer, configured from $TRACING, $TRACING_JSONL,
+# $TRACING_PROMETHEUS and $TRACING_PORT
+tracer = _from_env()
+span = tracer.span
+trace = tracer.trace
+count = tracer.count
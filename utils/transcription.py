@@ -0,0 +1,233 @@
+import os
+import queue
+import threading
+import time
+
+import speech_recognition as sr
+
+
+class RecognizerBackend:
+    """Turns one `sr.AudioData` chunk into text ("" if nothing was understood)."""
+
+    name = "base"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API (network)."""
+
+    name = "google"
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return ""
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU Sphinx, fully offline (requires `pocketsphinx`)."""
+
+    name = "sphinx"
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_sphinx(audio)
+        except sr.UnknownValueError:
+            return ""
+
+
+class WhisperBackend(RecognizerBackend):
+    """Local Whisper model (requires `openai-whisper`); runs on this machine."""
+
+    name = "whisper"
+
+    def __init__(self, model="base"):
+        super().__init__()
+        self.model = model
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_whisper(audio, model=self.model).strip()
+        except sr.UnknownValueError:
+            return ""
+
+
+class FakeBackend(RecognizerBackend):
+    """
+    Deterministic backend for tests and benchmarks: returns the scripted
+    `texts` in order (then ""), or "chunk N (X.Xs)" if none are given,
+    after an optional `latency`.
+    """
+
+    name = "fake"
+
+    def __init__(self, texts=None, latency=0.0):
+        super().__init__()
+        self.texts = list(texts) if texts is not None else None
+        self.latency = latency
+        self.calls = 0
+
+    def transcribe(self, audio):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.texts is None:
+            seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+            return f"chunk {self.calls} ({seconds:.1f}s)"
+        return self.texts.pop(0) if self.texts else ""
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "whisper": WhisperBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_backend(name=None):
+    """Create the backend named `name` (default: $TRANSCRIPTION_BACKEND or google)."""
+    name = name or os.getenv("TRANSCRIPTION_BACKEND", "google")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name]()
+
+
+class FixedChunkSegmenter:
+    """Cuts a PCM byte stream into chunks of `chunk_seconds`."""
+
+    def __init__(self, sample_rate, sample_width, chunk_seconds=5.0):
+        self.chunk_bytes = int(chunk_seconds * sample_rate) * sample_width
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Add PCM bytes; return the list of completed chunks."""
+        self._buffer.extend(data)
+        chunks = []
+        while len(self._buffer) >= self.chunk_bytes:
+            chunks.append(bytes(self._buffer[:self.chunk_bytes]))
+            del self._buffer[:self.chunk_bytes]
+        return chunks
+
+    def flush(self):
+        """Return the remaining partial chunk (may be empty)."""
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return [chunk] if chunk else []
+
+
+class StreamingTranscriber:
+    """
+    Transcribes audio chunks on a worker thread while recording continues.
+
+    Chunks are transcribed in submission order; `on_partial(text)` is called
+    with the transcript so far after each chunk. `finish()` waits for the
+    remaining chunks and records the time from the end of the last submitted
+    audio to the final transcript as `final_latency`.
+    """
+
+    def __init__(self, backend, sample_rate, sample_width, on_partial=None, on_error=None):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.on_partial = on_partial
+        self.on_error = on_error
+        self.parts = []
+        self.chunks = 0
+        self.audio_bytes = 0
+        self.transcribe_seconds = 0.0
+        self.final_latency = None
+        self._audio_end = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self, thread_setup=None):
+        if thread_setup:
+            thread_setup(self._thread)
+        self._thread.start()
+        return self
+
+    def submit(self, pcm):
+        """Queue PCM bytes that have just been captured."""
+        if not pcm:
+            return
+        self._audio_end = time.monotonic()
+        self.chunks += 1
+        self.audio_bytes += len(pcm)
+        self._queue.put(sr.AudioData(pcm, self.sample_rate, self.sample_width))
+
+    def _worker(self):
+        while True:
+            audio = self._queue.get()
+            if audio is None:
+                return
+            start = time.monotonic()
+            try:
+                text = self.backend.transcribe(audio)
+            except Exception as e:
+                text = ""
+                if self.on_error:
+                    self.on_error(e)
+            self.transcribe_seconds += time.monotonic() - start
+            if text:
+                self.parts.append(text)
+                if self.on_partial:
+                    self.on_partial(self.transcript())
+
+    def transcript(self):
+        return " ".join(self.parts)
+
+    def finish(self):
+        """Wait for all queued chunks and return the final transcript."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._audio_end is not None:
+            self.final_latency = time.monotonic() - self._audio_end
+        return self.transcript()
+
+    def stats(self):
+        return {
+            "backend": self.backend.name,
+            "chunks": self.chunks,
+            "audio_bytes": self.audio_bytes,
+            "transcribe_seconds": round(self.transcribe_seconds, 3),
+            "final_latency_seconds": None if self.final_latency is None else round(self.final_latency, 3),
+        }
+
+
+def stream_audio(source, transcriber, duration, stop_event=None, segmenter=None, recognizer=None):
+    """
+    Read PCM from an open `sr.AudioSource`-like `source` (with `stream.read`,
+    `CHUNK`, `SAMPLE_RATE`, `SAMPLE_WIDTH`) for up to `duration` seconds or
+    until `stop_event` is set, submitting segments to `transcriber`.
+
+    With a VAD segmenter, reading also stops once it reports the end of
+    speech (`segmenter.ended`); returns True in that case.
+    """
+    if recognizer is not None:
+        recognizer.adjust_for_ambient_noise(source)
+        vad = getattr(segmenter, "vad", None)
+        if vad is not None and vad.energy_threshold is None:
+            # Reuse the ambient-noise calibration (same RMS scale as the VAD)
+            vad.energy_threshold = max(vad.min_threshold, recognizer.energy_threshold)
+    segmenter = segmenter or FixedChunkSegmenter(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+    ended = False
+    start = time.monotonic()
+    while time.monotonic() - start < duration and not (stop_event and stop_event.is_set()):
+        data = source.stream.read(source.CHUNK)
+        if not data:
+            break
+        for chunk in segmenter.feed(data):
+            transcriber.submit(chunk)
+        if getattr(segmenter, "ended", False):
+            ended = True
+            break
+    for chunk in segmenter.flush():
+        transcriber.submit(chunk)
+    return ended
@@ -0,0 +1,157 @@
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Energy / zero-crossing voice activity detector for 16-bit mono PCM.
+
+    PCM is split into `frame_ms` frames and classified all at once with NumPy:
+    a frame is speech if its RMS is above `energy_threshold`, unless it also
+    has a high zero-crossing rate (hiss, fans) and is not clearly loud.
+    Without an explicit threshold, the noise floor is estimated from the
+    first frames seen and multiplied by `noise_ratio`.
+    """
+
+    def __init__(self, sample_rate, sample_width=2, frame_ms=30, energy_threshold=None,
+                 noise_ratio=3.0, max_zcr=0.35, min_threshold=100.0):
+        if sample_width != 2:
+            raise ValueError("EnergyVAD expects 16-bit PCM")
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_bytes = self.frame_samples * sample_width
+        self.energy_threshold = energy_threshold
+        self.noise_ratio = noise_ratio
+        self.max_zcr = max_zcr
+        self.min_threshold = min_threshold
+
+    @property
+    def frame_seconds(self):
+        return self.frame_samples / self.sample_rate
+
+    def features(self, pcm):
+        """Per-frame (rms, zcr) arrays for the whole frames in `pcm`."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        count = len(samples) // self.frame_samples
+        frames = samples[:count * self.frame_samples].reshape(count, self.frame_samples).astype(np.float32)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return rms, zcr
+
+    def calibrate(self, rms):
+        """Set the threshold from ambient-noise frame energies."""
+        noise_floor = float(np.percentile(rms, 50)) if len(rms) else 0.0
+        self.energy_threshold = max(self.min_threshold, noise_floor * self.noise_ratio)
+
+    def speech_flags(self, pcm):
+        """Boolean speech flag per whole frame of `pcm`."""
+        rms, zcr = self.features(pcm)
+        if self.energy_threshold is None:
+            self.calibrate(rms)
+        loud = rms > self.energy_threshold
+        return loud & ((zcr < self.max_zcr) | (rms > 2 * self.energy_threshold))
+
+
+def trim_silence(pcm, vad, padding_ms=200):
+    """Drop leading and trailing non-speech from `pcm`, keeping `padding_ms` around speech."""
+    flags = vad.speech_flags(pcm)
+    speech = np.flatnonzero(flags)
+    if not len(speech):
+        return b""
+    padding = int(padding_ms / 1000 / vad.frame_seconds)
+    first = max(0, speech[0] - padding)
+    last = min(len(flags), speech[-1] + 1 + padding)
+    return pcm[first * vad.frame_bytes:last * vad.frame_bytes]
+
+
+class VADSegmenter:
+    """
+    Drop-in replacement for FixedChunkSegmenter that cuts the stream at pauses.
+
+    Segments are emitted once speech is followed by `pause_ms` of silence (or
+    reaches `max_segment_seconds`), with silence trimmed to `padding_ms` on
+    each side; silence between segments is never sent to recognition. After
+    speech has started, `end_silence` seconds of continuous silence set
+    `ended`, which ends the recording early.
+    """
+
+    def __init__(self, vad, pause_ms=600, padding_ms=200, max_segment_seconds=15.0, end_silence=3.0):
+        self.vad = vad
+        self.pause_frames = max(1, int(pause_ms / 1000 / vad.frame_seconds))
+        self.padding_frames = int(padding_ms / 1000 / vad.frame_seconds)
+        self.max_segment_frames = int(max_segment_seconds / vad.frame_seconds)
+        self.end_silence_frames = int(end_silence / vad.frame_seconds) if end_silence else None
+        self.ended = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.speech_frames = 0
+        self._pending = bytearray()
+        self._frames = []          # frames of the current segment (including padding)
+        self._lead = []            # recent silent frames kept as leading padding
+        self._in_speech = False
+        self._silence_run = 0
+        self._heard_speech = False
+
+    def _emit(self):
+        # Keep only `padding_frames` of the trailing silence
+        keep = len(self._frames) - max(0, self._silence_run - self.padding_frames)
+        segment = b"".join(self._frames[:keep])
+        self._frames = []
+        self._in_speech = False
+        self.bytes_out += len(segment)
+        return segment
+
+    def feed(self, data):
+        """Add PCM bytes; return the list of completed speech segments."""
+        self.bytes_in += len(data)
+        self._pending.extend(data)
+        whole = len(self._pending) // self.vad.frame_bytes * self.vad.frame_bytes
+        if not whole:
+            return []
+        pcm = bytes(self._pending[:whole])
+        del self._pending[:whole]
+
+        segments = []
+        frame_bytes = self.vad.frame_bytes
+        for i, is_speech in enumerate(self.vad.speech_flags(pcm)):
+            frame = pcm[i * frame_bytes:(i + 1) * frame_bytes]
+            if is_speech:
+                self.speech_frames += 1
+                self._heard_speech = True
+                if not self._in_speech:
+                    self._in_speech = True
+                    self._frames = self._lead
+                    self._lead = []
+                self._frames.append(frame)
+                self._silence_run = 0
+                if len(self._frames) >= self.max_segment_frames:
+                    segments.append(self._emit())
+                continue
+
+            self._silence_run += 1
+            if self._in_speech:
+                self._frames.append(frame)
+                if self._silence_run >= self.pause_frames:
+                    segments.append(self._emit())
+            else:
+                self._lead = (self._lead + [frame])[-self.padding_frames:] if self.padding_frames else []
+
+            if self._heard_speech and self.end_silence_frames and self._silence_run >= self.end_silence_frames:
+                self.ended = True
+        return [segment for segment in segments if segment]
+
+    def flush(self):
+        """Return the speech segment in progress, if any."""
+        if not self._in_speech:
+            return []
+        segment = self._emit()
+        return [segment] if segment else []
+
+    def stats(self):
+        return {
+            "captured_bytes": self.bytes_in,
+            "sent_bytes": self.bytes_out,
+            "speech_seconds": round(self.speech_frames * self.vad.frame_seconds, 2),
+            "ended_early": self.ended,
+        }
@@ -3,15 +3,32 @@ import numpy as np
 import streamlit as st
 import threading
 import queue
-import pyaudio
 import wave
 import time
 import os
 import sys
 import speech_recognition as sr
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.capture_pipeline import CapturePipeline
+from utils.facial_analysis import analyze_frames
+from utils.face_tracking import FaceTracker, detect_faces, get_face_cascade, preprocess
+from utils.frame_store import FrameStore
+from utils import tracing
+from utils.transcription import FixedChunkSegmenter, StreamingTranscriber, get_backend, stream_audio
+from utils.vad import EnergyVAD, VADSegmenter, trim_silence
+
+
+def destroy_windows():
+    """Close OpenCV windows; headless OpenCV builds (servers, CI) have none."""
+    try:
+        cv2.destroyAllWindows()
+    except cv2.error:
+        pass
 
 class VideoRecorder:
-    def __init__(self):
+    def __init__(self, max_frames=450, keep_every=1, frame_scale=1.0, spill_path=None,
+                 track_faces=True, detect_every=5, motion_threshold=None, video_source=None):
         # Additional error handling for face detection model
         try:
             # Check if OpenCV cascade file exists
@@ -20,19 +37,38 @@ class VideoRecorder:
                 st.error(f"Cascade file not found: {cascade_path}")
                 self.face_cascade = None
             else:
-                self.face_cascade = cv2.CascadeClassifier(cascade_path)
+                # Parsed once per process instead of on every recording
+                self.face_cascade = get_face_cascade()
         except Exception as e:
             st.error(f"Error loading face cascade: {e}")
             self.face_cascade = None
 
+        # Full-frame detection every `detect_every` frames, ROI search in between
+        self.face_tracker = None
+        if track_faces and self.face_cascade is not None:
+            self.face_tracker = FaceTracker(self.face_cascade, detect_every, motion_threshold=motion_threshold)
+
         self.video_capture = None
+        # Object with the cv2.VideoCapture read/isOpened/release interface
+        # (e.g. utils.replay.VideoFileSource) used instead of the camera
+        self.video_source = video_source
         self.is_recording = False
-        self.frames = []
+        self.frame_store_options = dict(
+            capacity=max_frames, keep_every=keep_every, scale=frame_scale, spill_path=spill_path
+        )
+        self.frames = FrameStore(**self.frame_store_options)
 
     def initialize_capture(self):
         """
         Safely initialize video capture with multiple backend attempts
         """
+        if self.video_source is not None:
+            self.video_capture = self.video_source
+            if not self.video_capture.isOpened():
+                st.error("Could not open the replay video source.")
+                return False
+            return True
+
         # List of potential camera backends
         backends = [
             # cv2.CAP_DSHOW,  # DirectShow (Windows)
@@ -73,7 +109,9 @@ class VideoRecorder:
             return False
 
         self.is_recording = True
-        self.frames = []
+        self.frames = FrameStore(**self.frame_store_options)
+        if self.face_tracker:
+            self.face_tracker.reset()
         return True
 
     def stop_recording(self):
@@ -89,19 +127,14 @@ class VideoRecorder:
             return frame, False
 
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Equalize histogram to improve detection
-            gray = cv2.equalizeHist(gray)
+            # Grayscale + histogram equalization to improve detection
+            gray = preprocess(frame)
             
             # Detect faces with more lenient parameters
-            faces = self.face_cascade.detectMultiScale(
-                gray, 
-                scaleFactor=1.3,  # Increased from 1.1
-                minNeighbors=3,   # Reduced from 5
-                minSize=(30, 30)
-            )
+            if self.face_tracker:
+                faces = self.face_tracker.update(gray)
+            else:
+                faces = detect_faces(self.face_cascade, gray)
             
             # Draw rectangles around detected faces
             for (x, y, w, h) in faces:
@@ -113,39 +146,120 @@ class VideoRecorder:
             st.error(f"Face detection error: {e}")
             return frame, False
 
-def record_audio_video(duration=60):
+def record_audio_video(duration=60, keep_every=2, frame_scale=1.0, expected_fps=15, spill_path=None,
+                       preview_fps=5, preview_max_width=320, preview_jpeg_quality=70,
+                       streaming=True, transcription_backend=None, chunk_seconds=5.0,
+                       vad=True, end_silence=3.0, video_source=None, audio_source=None):
     """
     Record audio and video with comprehensive error handling
     
     Args:
         duration (int): Recording duration in seconds
+        keep_every (int): Store only every Nth captured frame
+        frame_scale (float): Downscale factor applied to stored frames
+        expected_fps (int): Camera rate used to size the frame buffer
+        spill_path (str): Optional file to memory-map the frame buffer onto
+        preview_fps (int): Maximum rate of the live preview
+        preview_max_width (int): Preview frames are downscaled to this width
+        preview_jpeg_quality (int): JPEG quality for preview frames (None sends raw RGB)
+        streaming (bool): Transcribe audio chunks while recording instead of afterwards
+        transcription_backend (str): Recognizer backend name (see utils.transcription)
+        chunk_seconds (float): Audio chunk length for streaming transcription (without VAD)
+        vad (bool): Cut audio at pauses, drop silence before recognition and
+            end the session once the candidate stops speaking
+        end_silence (float): Seconds of trailing silence that end the session (None: never)
+        video_source: Replaces the camera (see utils.replay.VideoFileSource)
+        audio_source: Replaces the microphone (see utils.replay.WavAudioSource)
     
     Returns:
-        tuple: (video_frames, transcription)
+        tuple: (video_frames, transcription, stats) where video_frames is a
+        FrameStore and stats holds this recording's per-stage fps/drop
+        counters ("pipeline") and its chunk counts, audio bytes sent,
+        session wall time and end-of-speech-to-transcript latency
+        ("transcription"); (None, None, stats) if recording failed
     """
     # Prevent potential memory leaks by clearing any existing cv2 windows
-    cv2.destroyAllWindows()
+    destroy_windows()
 
     # Video Recording Setup
-    video_recorder = VideoRecorder()
+    # Buffer sized for the whole session at the expected camera rate; older
+    # frames are overwritten if the camera runs faster than that
+    max_frames = max(1, int(duration * expected_fps) // keep_every)
+    video_recorder = VideoRecorder(max_frames, keep_every, frame_scale, spill_path, video_source=video_source)
     
     # Attempt to start recording
     if not video_recorder.start_recording():
         st.error("Failed to start video recording. Check camera permissions and connections.")
-        return None, None
+        return None, None, {"pipeline": {}, "transcription": {}}
     
     # Audio Recording Setup
     audio_recorder = sr.Recognizer()
-    audio_source = sr.Microphone()
+    audio_source = audio_source or sr.Microphone()
     audio_queue = queue.Queue()
+    audio_stop = threading.Event()
+    # Set when voice activity detection decides the answer is over
+    session_end = threading.Event()
+    segmenter_stats = {}
+    transcriber = None
+    ctx = get_script_run_ctx()
+
+    if streaming:
+        # Partial transcripts are shown as each chunk is recognized
+        transcript_display = st.empty()
+        transcriber = StreamingTranscriber(
+            get_backend(transcription_backend),
+            audio_source.SAMPLE_RATE,
+            audio_source.SAMPLE_WIDTH,
+            on_partial=lambda text: transcript_display.caption(f"Transcribing: {text}"),
+            on_error=lambda e: st.warning(f"Transcription error: {e}")
+        ).start(lambda thread: add_script_run_ctx(thread, ctx))
+
+    def listen_phrases(source):
+        """
+        Record phrase after phrase until the recording window ends (or, with
+        VAD, `end_silence` seconds pass without a new phrase once the
+        candidate has spoken, which ends the session like the streaming path).
+        """
+        phrases = []
+        deadline = time.monotonic() + duration
+        while not audio_stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # listen() returns at the end of each phrase; wait for the next one
+            waits_for_silence = vad and phrases and end_silence is not None and end_silence < remaining
+            try:
+                phrases.append(audio_recorder.listen(
+                    source, timeout=end_silence if waits_for_silence else remaining, phrase_time_limit=remaining
+                ))
+            except sr.WaitTimeoutError:
+                if waits_for_silence:
+                    session_end.set()
+                break
+        if not phrases:
+            return None
+        return sr.AudioData(b"".join(phrase.frame_data for phrase in phrases),
+                            phrases[0].sample_rate, phrases[0].sample_width)
 
     def record_audio_thread():
         """Thread for recording audio"""
         try:
             with audio_source as source:
-                audio_recorder.adjust_for_ambient_noise(source)
-                audio_data = audio_recorder.listen(source, timeout=duration)
-                audio_queue.put(audio_data)
+                if streaming:
+                    if vad:
+                        segmenter = VADSegmenter(
+                            EnergyVAD(source.SAMPLE_RATE, source.SAMPLE_WIDTH), end_silence=end_silence
+                        )
+                    else:
+                        segmenter = FixedChunkSegmenter(source.SAMPLE_RATE, source.SAMPLE_WIDTH, chunk_seconds)
+                    if stream_audio(source, transcriber, duration, audio_stop, segmenter, audio_recorder):
+                        session_end.set()
+                    if vad:
+                        segmenter_stats.update(segmenter.stats())
+                    audio_queue.put(None)
+                else:
+                    audio_recorder.adjust_for_ambient_noise(source)
+                    audio_queue.put(listen_phrases(source))
         except Exception as e:
             st.error(f"Audio recording error: {e}")
             audio_queue.put(None)
@@ -153,55 +267,99 @@ def record_audio_video(duration=60):
 
     # Streamlit video display
     video_display = st.empty()
-    start_time = time.time()
-    frames_captured = 0
 
     # Start audio recording in a separate thread
     audio_thread = threading.Thread(target=record_audio_thread)
+    add_script_run_ctx(audio_thread, ctx)
     audio_thread.start()
     
+    session_start = time.monotonic()
+    pipeline_stats, transcription_stats = {}, {}
     try:
-        while time.time() - start_time < duration:
-            # Capture frame
-            ret, frame = video_recorder.video_capture.read()
-            
-            if not ret:
-                st.warning("Frame capture failed. Retrying...")
-                time.sleep(0.1)
-                continue
-            
-            # Flip frame horizontally for mirror effect
-            frame = cv2.flip(frame, 1)
-            
-            # Detect and draw faces
-            frame_with_faces, faces_detected = video_recorder.detect_and_draw_faces(frame)
-            
-            # Convert frame to RGB for Streamlit
-            frame_rgb = cv2.cvtColor(frame_with_faces, cv2.COLOR_BGR2RGB)
-            
-            # Display frame
-            video_display.image(frame_rgb, channels="RGB")
-            
-            # Store frame
-            video_recorder.frames.append(frame)
-            frames_captured += 1
-            
-            # Optional: Break if no frames captured
-            if frames_captured > duration * 10:  # Assuming ~10 fps
-                break
+        # Capture and face detection run on worker threads; this thread only
+        # paces the preview until the recording duration has elapsed (or
+        # voice activity detection ends the session)
+        pipeline = CapturePipeline(
+            video_recorder, duration, preview_fps, preview_max_width, preview_jpeg_quality,
+            end_event=session_end
+        )
+        pipeline.start()
+        try:
+            pipeline.run_preview(video_display)
+        finally:
+            pipeline.stop()
+        
+        pipeline_stats = pipeline.stats()
+        frames_captured = pipeline_stats["capture"]["processed"]
+        if pipeline.read_failures:
+            st.warning(f"Frame capture failed {pipeline.read_failures} times during recording.")
         
         # Stop recording
         final_frames = video_recorder.stop_recording()
         
         # Basic transcription placeholder
         transcription = ""
+        audio_stop.set()
         audio_thread.join()
         recorded_audio = audio_queue.get()
+        session_seconds = round(time.monotonic() - session_start, 2)
+        if session_end.is_set():
+            st.info(f"Recording ended after {session_seconds}s of {duration}s (silence detected).")
 
-        st.success(f"Recording complete. Captured {frames_captured} frames.")
-        if recorded_audio:
+        frame_stats = final_frames.stats()
+        st.success(
+            f"Recording complete. Captured {frames_captured} frames, kept {frame_stats['frames_kept']} "
+            f"({frame_stats['buffer_mb']} MB frame buffer)."
+        )
+        st.caption(
+            f"Capture {pipeline_stats['capture']['fps']} fps, "
+            f"detection {pipeline_stats['detection']['fps']} fps "
+            f"({pipeline_stats['detection']['dropped']} dropped), "
+            f"preview {pipeline_stats['preview']['fps']} fps "
+            f"({pipeline_stats['preview']['dropped']} dropped), "
+            f"{pipeline_stats['preview_transport'].get('bytes_per_sec', 0) / 1024:.1f} KB/s to the browser, "
+            f"preview latency {pipeline_stats['preview_transport'].get('mean_latency_ms', 0)} ms"
+        )
+        if transcriber:
+            # Only the tail of streaming transcription is left at this point
+            with tracing.span("transcription", backend=transcriber.backend.name):
+                transcription = transcriber.finish()
+            transcription_stats = dict(
+                transcriber.stats(), session_seconds=session_seconds, **segmenter_stats
+            )
+            st.success(f"Transcription: {transcription}")
+            st.caption(
+                f"Final transcript {transcription_stats['final_latency_seconds']}s after the end of "
+                f"recording ({transcription_stats['chunks']} chunks, {transcription_stats['backend']}); "
+                f"session {session_seconds}s, {transcription_stats['audio_bytes'] / 1024:.0f} KB of audio "
+                f"sent to recognition"
+                + (f" of {segmenter_stats['captured_bytes'] / 1024:.0f} KB captured" if segmenter_stats else "")
+            )
+        elif recorded_audio:
+            captured_bytes = len(recorded_audio.frame_data)
+            if vad:
+                # Leading/trailing silence only costs upload time and recognition accuracy
+                trimmed = trim_silence(
+                    recorded_audio.frame_data,
+                    EnergyVAD(recorded_audio.sample_rate, recorded_audio.sample_width,
+                              energy_threshold=audio_recorder.energy_threshold)
+                )
+                if trimmed:
+                    recorded_audio = sr.AudioData(trimmed, recorded_audio.sample_rate, recorded_audio.sample_width)
+            transcription_stats = {
+                "backend": "google",
+                "chunks": 1,
+                "captured_bytes": captured_bytes,
+                "audio_bytes": len(recorded_audio.frame_data),
+                "session_seconds": session_seconds,
+            }
+            st.caption(
+                f"Session {session_seconds}s, {transcription_stats['audio_bytes'] / 1024:.0f} KB of "
+                f"{captured_bytes / 1024:.0f} KB captured audio sent to recognition"
+            )
             try:
-                transcription = audio_recorder.recognize_google(recorded_audio)
+                with tracing.span("transcription", backend="google"):
+                    transcription = audio_recorder.recognize_google(recorded_audio)
                 st.success(f"Transcription: {transcription}")
             except sr.UnknownValueError:
                 st.warning("Could not understand audio")
@@ -209,15 +367,20 @@ def record_audio_video(duration=60):
                 st.error(f"Could not request results; {e}")
         
         
-        return final_frames, transcription
+        return final_frames, transcription, {"pipeline": pipeline_stats, "transcription": transcription_stats}
     
     except Exception as e:
         st.error(f"Unexpected error during recording: {e}")
-        return None, None
+        return None, None, {"pipeline": pipeline_stats, "transcription": transcription_stats}
     finally:
         # Ensure resources are released
-        cv2.destroyAllWindows()
+        destroy_windows()
 
-# Placeholder for facial expression analysis (removed)
-def analyze_facial_expressions(frames):
-    return {}
\ No newline at end of file
+def analyze_facial_expressions(frames, batch_size=32, workers=None):
+    """
+    Estimate expression percentages ({"happy": ..., "neutral": ...}) for the
+    recorded frames. Returns {} if no face was found.
+    """
+    if frames is None or len(frames) == 0:
+        return {}
+    return analyze_frames(frames, batch_size, workers)["emotions"]